@@ -1,7 +1,10 @@
 from ursina import *
 import math
+import os
 import random
 
+import numpy as np
+
 app = Ursina()
 window.title = "Lizard Waving Inside a Transparent Sphere"
 
@@ -11,115 +14,282 @@ SPINE_LEN = 13
 SPINE_SPACING = 0.35 * LIZARD_SIZE
 LIMB_LEN = 1.25 * LIZARD_SIZE
 
+# Multi-lizard mode: REPTILE_LIZARDS=30 python 3d_lizard.py
+# Every lizard floats on its own orbit and is scaled down so they all fit.
+# Each frame a lizard poking out of the sphere is moved back in, and
+# lizards whose spines come closer than SEPARATION (times their size) push
+# each other away. Neighbours are found through a 3D spatial hash of the
+# spine bones, so the cost grows with the number of lizards, not pairs.
+LIZARD_COUNT = max(1, int(os.environ.get("REPTILE_LIZARDS", "1")))
+SEPARATION = 0.6      # closest two spine bones of different lizards get, in lizard sizes
+OFFSET_RELAX = 0.35   # how fast a pushed lizard drifts back onto its orbit (per second)
+SHADOW_LIFT = 0.18
+SHADOW_SIDES = 16
+SHADOW_EDGE = SPHERE_RADIUS * 0.95  # farthest a shadow reaches from the sphere's vertical axis
+
 # Make the transparent sphere
 planet = Entity(model='sphere', color=color.azure.tint(-.1), scale=SPHERE_RADIUS*2, y=0,
                 double_sided=True, alpha=0.23)
 
-# Shadow at the bottom of the sphere
-shadow = Entity(model='circle', color=color.black33, scale=(1.6*LIZARD_SIZE,1.6*LIZARD_SIZE,1), y=-SPHERE_RADIUS+0.18, z=0)
-
-# Lizard's floating center point
-center = Vec3(0, 0, 0)
-
-# Build lizard bones
-spine_bones = [Entity(model='sphere', color=color.white, scale=(0.25*LIZARD_SIZE, 0.27*LIZARD_SIZE, 0.25*LIZARD_SIZE)) for _ in range(SPINE_LEN)]
-head = Entity(model='sphere', color=color.azure, scale=(0.44*LIZARD_SIZE, 0.38*LIZARD_SIZE, 0.54*LIZARD_SIZE))
-eyes = [Entity(model='sphere', color=color.black, scale=(0.09*LIZARD_SIZE,0.12*LIZARD_SIZE,0.12*LIZARD_SIZE)) for _ in range(2)]
-limbs = [[],[]]
-for _ in range(2):
-    limbs[0].append([Entity(model='cylinder', color=color.brown.tint(-0.15), scale=(0.09*LIZARD_SIZE, LIMB_LEN*LIZARD_SIZE, 0.09*LIZARD_SIZE)),
-                     Entity(model='cylinder', color=color.white, scale=(0.06*LIZARD_SIZE, LIMB_LEN*0.7*LIZARD_SIZE, 0.06*LIZARD_SIZE))])
-    limbs[1].append([Entity(model='cylinder', color=color.brown.tint(-0.05), scale=(0.11*LIZARD_SIZE, LIMB_LEN*1.12*LIZARD_SIZE, 0.11*LIZARD_SIZE)),
-                     Entity(model='cylinder', color=color.white, scale=(0.07*LIZARD_SIZE, LIMB_LEN*0.72*LIZARD_SIZE, 0.07*LIZARD_SIZE))])
-
-toes = []
-for li in range(4):
-    tlist = []
-    for t in range(-2,3):
-        e = Entity(model='cylinder', color=color.white66, scale=(0.03*LIZARD_SIZE, 0.28*LIZARD_SIZE, 0.03*LIZARD_SIZE))
-        tlist.append(e)
-    toes.append(tlist)
-
-# Camera movement variables
-orbit_angle = 0
-orbit_radius = SPHERE_RADIUS * 0.6
+
+class Lizard:
+    def __init__(self, size=LIZARD_SIZE, orbit=(0.45, 0.39, 0.47), rates=(0.7, 0.32, 0.44), speed=0.26,
+                 angle=0.0, phase=0.0):
+        s = size
+        self.size = s
+        self.spacing = SPINE_SPACING * s / LIZARD_SIZE
+        self.limb_len = LIMB_LEN * s / LIZARD_SIZE  # world units already, like spacing
+        self.bone_radius = 0.14 * s
+        orbit_radius = SPHERE_RADIUS * 0.6
+        self.orbit = [a * orbit_radius for a in orbit]
+        self.rates = rates
+        self.speed = speed
+        self.orbit_angle = angle
+        self.phase = phase  # offsets the wave and the walk so lizards don't move in step
+
+        # Lizard's floating center point, and how far collisions pushed it off its orbit
+        self.center = Vec3(0, 0, 0)
+        self.offset = Vec3(0, 0, 0)
+        self.points = [(0.0, 0.0, 0.0)] * SPINE_LEN  # spine bone positions this frame
+
+        # Build lizard bones
+        self.spine_bones = [Entity(model='sphere', color=color.white, scale=(0.25*s, 0.27*s, 0.25*s)) for _ in range(SPINE_LEN)]
+        self.head = Entity(model='sphere', color=color.azure, scale=(0.44*s, 0.38*s, 0.54*s))
+        self.eyes = [Entity(model='sphere', color=color.black, scale=(0.09*s, 0.12*s, 0.12*s)) for _ in range(2)]
+        limb_len = self.limb_len
+        self.limbs = [[], []]
+        for _ in range(2):
+            self.limbs[0].append([Entity(model='cylinder', color=color.brown.tint(-0.15), scale=(0.09*s, limb_len, 0.09*s)),
+                                  Entity(model='cylinder', color=color.white, scale=(0.06*s, limb_len*0.7, 0.06*s))])
+            self.limbs[1].append([Entity(model='cylinder', color=color.brown.tint(-0.05), scale=(0.11*s, limb_len*1.12, 0.11*s)),
+                                  Entity(model='cylinder', color=color.white, scale=(0.07*s, limb_len*0.72, 0.07*s))])
+
+        self.toes = []
+        for li in range(4):
+            tlist = []
+            for t in range(-2, 3):
+                e = Entity(model='cylinder', color=color.white66, scale=(0.03*s, 0.28*s, 0.03*s))
+                tlist.append(e)
+            self.toes.append(tlist)
+
+    def move(self, dt):
+        # Lizard's center floats in a 3D circle (inside sphere), plus whatever it was pushed by
+        self.orbit_angle += dt * self.speed
+        self.offset *= max(0.0, 1 - dt * OFFSET_RELAX)
+        a = self.orbit_angle
+        self.center.x = math.sin(a*self.rates[0]) * self.orbit[0] + self.offset.x
+        self.center.y = math.sin(a*self.rates[1]) * self.orbit[1] + self.offset.y
+        self.center.z = math.cos(a*self.rates[2]) * self.orbit[2] + self.offset.z
+
+    def place_spine(self, t):
+        # Animate spine in a "snake wave" inside the sphere
+        dir_angle = self.orbit_angle
+        spacing = self.spacing
+        s = self.size
+        cx, cy, cz = self.center.x, self.center.y, self.center.z
+        points = self.points
+        for i in range(SPINE_LEN):
+            f = i/(SPINE_LEN-1)
+            ang = dir_angle + math.sin(t*1.4 + i*0.6 + self.phase) * 0.25 * (1-f)
+            points[i] = (cx + math.sin(ang) * (0.5*s + i*spacing*0.72),
+                         cy + math.sin(ang*1.2 + i*0.35) * (0.18*s + i*spacing*0.68),
+                         cz + math.cos(ang*0.96 + i*0.34) * (0.6*s + i*spacing*0.89))
+
+    def keep_inside(self):
+        # Move the whole lizard toward the middle until its farthest bone is inside the sphere
+        limit = SPHERE_RADIUS - self.bone_radius
+        points = self.points
+        for _ in range(3):
+            far = max(points, key=lambda p: p[0]*p[0] + p[1]*p[1] + p[2]*p[2])
+            distance = math.sqrt(far[0]*far[0] + far[1]*far[1] + far[2]*far[2])
+            if distance <= limit:
+                return
+            k = (distance - limit) / distance
+            dx, dy, dz = -far[0]*k, -far[1]*k, -far[2]*k
+            for i, (x, y, z) in enumerate(points):
+                points[i] = (x + dx, y + dy, z + dz)
+            self.center += Vec3(dx, dy, dz)
+            self.offset += Vec3(dx, dy, dz)  # and stay there next frame
+
+    def push(self, dx, dy, dz, most):
+        # Separation from neighbours, at most `most` per frame; shows from the next frame on
+        length = math.sqrt(dx*dx + dy*dy + dz*dz)
+        if length > most:
+            dx, dy, dz = dx*most/length, dy*most/length, dz*most/length
+        self.offset += Vec3(dx, dy, dz)
+
+    def pose(self, t):
+        spine_bones = self.spine_bones
+        s = self.size
+        for bone, point in zip(spine_bones, self.points):
+            bone.position = point
+        for i, bone in enumerate(spine_bones):
+            # Look toward next bone
+            if i < SPINE_LEN-1:
+                bone.look_at(spine_bones[i+1].position)
+            else:
+                bone.look_at(bone.position + Vec3(1,0,0))
+
+        # Head at the front
+        head = self.head
+        head.position = spine_bones[0].position + head.forward*0.04*s
+        head.look_at(spine_bones[1].position)
+        # Eyes
+        fwd = (spine_bones[1].position - head.position).normalized()
+        right = Vec3.cross(fwd, Vec3(0,1,0)).normalized()
+        up = Vec3.cross(right, fwd).normalized()
+        self.eyes[0].position = head.position + (right*0.19 + up*0.10 + fwd*0.18)*s
+        self.eyes[1].position = head.position + (-right*0.19 + up*0.10 + fwd*0.18)*s
+
+        # Limbs: arms (front) and legs (back) with proper orientation
+        limbs = self.limbs
+        limb_len = self.limb_len
+        arm_bone = spine_bones[3]
+        leg_bone = spine_bones[-4]
+        for idx, (parent, upper, lower, is_leg) in enumerate([
+            (arm_bone, limbs[0][0][0], limbs[0][0][1], False),
+            (arm_bone, limbs[0][1][0], limbs[0][1][1], False),
+            (leg_bone, limbs[1][0][0], limbs[1][0][1], True),
+            (leg_bone, limbs[1][1][0], limbs[1][1][1], True),
+        ]):
+            # Find normal vector (cross product)
+            if not is_leg:
+                base_idx = 3
+            else:
+                base_idx = SPINE_LEN-4
+            if 1 <= base_idx < SPINE_LEN-1:
+                tangent = (spine_bones[base_idx+1].position - spine_bones[base_idx-1].position).normalized()
+            else:
+                tangent = Vec3(1,0,0)
+            up_vec = (spine_bones[base_idx].position - Vec3(0,0,0)).normalized()
+            normal = up_vec.cross(tangent).normalized()
+            side = -1 if idx%2==0 else 1
+            normal = normal * side
+            # Animate "walking" limbs:
+            walk_phase = t*2 + idx*math.pi + self.phase
+            limb_angle = 0.55 + math.sin(walk_phase)*0.47
+            # Upper limb
+            upper.position = parent.position + normal*0.33*s
+            upper.look_at(parent.position + normal*0.95*s + tangent*limb_angle*0.44*s)
+            # Lower limb (jointed)
+            lower.position = upper.position + upper.forward * (limb_len*0.52 if is_leg else limb_len*0.41)
+            lower.look_at(upper.position + upper.forward*s + tangent*limb_angle*0.34*s)
+            # Toes (fan out)
+            toe_root = lower.position + lower.forward*0.66*s
+            for t2, toe in enumerate(self.toes[idx]):
+                ang = (t2-2)*0.23
+                toe.position = toe_root + lower.right*math.sin(ang)*0.19*s + lower.up*math.cos(ang)*0.06*s
+                toe.look_at(toe.position + lower.forward)
+
+
+def separate(lizards, distance):
+    # Push apart lizards whose spine bones are closer than `distance`. Bones
+    # go into a dict of cubes `distance` wide, so each cube only compares
+    # against the 27 cubes around it; both lizards of a close pair move half
+    # the overlap. Returns a (dx, dy, dz) push per lizard.
+    cells = {}
+    for n, lizard in enumerate(lizards):
+        for x, y, z in lizard.points:
+            key = (math.floor(x / distance), math.floor(y / distance), math.floor(z / distance))
+            cell = cells.get(key)
+            if cell is None:
+                cells[key] = cell = []
+            cell.append((n, x, y, z))
+    pushes = [[0.0, 0.0, 0.0] for _ in lizards]
+    limit = distance * distance
+    for (cx, cy, cz), members in cells.items():
+        near = []
+        for ix in (cx-1, cx, cx+1):
+            for iy in (cy-1, cy, cy+1):
+                for iz in (cz-1, cz, cz+1):
+                    cell = cells.get((ix, iy, iz))
+                    if cell is not None:
+                        near.extend(cell)
+        for n, x, y, z in members:
+            push = pushes[n]
+            for m, x2, y2, z2 in near:
+                if m == n:
+                    continue
+                dx, dy, dz = x - x2, y - y2, z - z2
+                d2 = dx*dx + dy*dy + dz*dz
+                if d2 >= limit:
+                    continue
+                if d2 == 0:
+                    dx, d2 = (1.0 if n < m else -1.0), 1.0  # exactly on top of each other: pick a side
+                d = math.sqrt(d2)
+                k = (distance - d) / d * 0.5
+                push[0] += dx * k
+                push[1] += dy * k
+                push[2] += dz * k
+    return pushes
+
+
+class Shadows:
+    # Every lizard's shadow is a disc in one shared mesh, projected straight
+    # down onto the inside of the sphere: one NumPy pass and one mesh upload
+    # per frame for all of them, instead of an entity per lizard
+    def __init__(self, count):
+        ring = np.linspace(0, 2*math.pi, SHADOW_SIDES, endpoint=False)
+        self.ring_x = np.cos(ring)
+        self.ring_z = np.sin(ring)
+        self.vertices = np.zeros((count, SHADOW_SIDES+1, 3))  # per lizard: middle, then the rim
+        triangles = []
+        for n in range(count):
+            base = n * (SHADOW_SIDES+1)
+            for k in range(SHADOW_SIDES):
+                triangles += [base, base+1+k, base+1+(k+1) % SHADOW_SIDES]
+        self.mesh = Mesh(vertices=self.vertices.reshape(-1, 3).tolist(), triangles=triangles, mode='triangle')
+        self.entity = Entity(model=self.mesh, color=color.black33, double_sided=True)
+
+    def update(self, centers, radii):
+        # centers: (count, 3), radii: (count,)
+        v = self.vertices
+        v[:, 0, 0] = centers[:, 0]
+        v[:, 0, 2] = centers[:, 2]
+        v[:, 1:, 0] = centers[:, 0:1] + self.ring_x * radii[:, None]
+        v[:, 1:, 2] = centers[:, 2:3] + self.ring_z * radii[:, None]
+        # Keep the rims within the sphere's outline, then sit on the bottom of the sphere under each vertex
+        reach = np.hypot(v[:, :, 0], v[:, :, 2])
+        inside = np.minimum(1.0, SHADOW_EDGE / np.maximum(reach, 1e-9))
+        v[:, :, 0] *= inside
+        v[:, :, 2] *= inside
+        v[:, :, 1] = SHADOW_LIFT - np.sqrt(SPHERE_RADIUS**2 - (reach * inside)**2)
+        self.mesh.vertices = v.reshape(-1, 3).tolist()
+        self.mesh.generate()
+
+
+if LIZARD_COUNT == 1:
+    lizards = [Lizard()]
+else:
+    rng = random.Random(7)
+    # Smaller lizards the more there are, so they fill the sphere rather than jam it
+    size = LIZARD_SIZE * min(1.0, 1.6 / LIZARD_COUNT ** (1/3))
+    lizards = [Lizard(size=size * rng.uniform(0.85, 1.1),
+                      orbit=[rng.uniform(0.25, 1.0) for _ in range(3)],
+                      rates=[rng.uniform(0.25, 0.8) for _ in range(3)],
+                      speed=rng.uniform(0.15, 0.35),
+                      angle=rng.uniform(0, 40), phase=rng.uniform(0, 2*math.pi))
+               for _ in range(LIZARD_COUNT)]
+separation = SEPARATION * max(lizard.size for lizard in lizards)
+shadows = Shadows(len(lizards))
+shadow_centers = np.zeros((len(lizards), 3))
+shadow_radii = np.array([0.8 * lizard.size for lizard in lizards])
+
 
 def update():
     t = time.time()
-    global orbit_angle
-
-    # Lizard's center floats in a 3D circle (inside sphere)
-    orbit_angle += time.dt * 0.26
-    center.x = math.sin(orbit_angle*0.7) * orbit_radius * 0.45
-    center.y = math.sin(orbit_angle*0.32) * orbit_radius * 0.39
-    center.z = math.cos(orbit_angle*0.44) * orbit_radius * 0.47
-
-    # Animate spine in a "snake wave" inside the sphere
-    dir_angle = orbit_angle
-    for i, bone in enumerate(spine_bones):
-        f = i/(SPINE_LEN-1)
-        ang = dir_angle + math.sin(t*1.4 + i*0.6) * 0.25 * (1-f)
-        bone.x = center.x + math.sin(ang) * (0.5 + i*SPINE_SPACING*0.72)
-        bone.y = center.y + math.sin(ang*1.2 + i*0.35) * (0.18 + i*SPINE_SPACING*0.68)
-        bone.z = center.z + math.cos(ang*0.96 + i*0.34) * (0.6 + i*SPINE_SPACING*0.89)
-        # Look toward next bone
-        if i < SPINE_LEN-1:
-            bone.look_at(Vec3(spine_bones[i+1].x, spine_bones[i+1].y, spine_bones[i+1].z))
-        else:
-            bone.look_at(bone.position + Vec3(1,0,0))
-
-    # Head at the front
-    head.position = spine_bones[0].position + head.forward*0.04
-    head.look_at(spine_bones[1].position)
-    # Eyes
-    fwd = (spine_bones[1].position - head.position).normalized()
-    right = Vec3.cross(fwd, Vec3(0,1,0)).normalized()
-    up = Vec3.cross(right, fwd).normalized()
-    eyes[0].position = head.position + right*0.19 + up*0.10 + fwd*0.18
-    eyes[1].position = head.position - right*0.19 + up*0.10 + fwd*0.18
-
-    # Limbs: arms (front) and legs (back) with proper orientation
-    arm_bone = spine_bones[3]
-    leg_bone = spine_bones[-4]
-    for idx, (parent, upper, lower, is_leg) in enumerate([
-        (arm_bone, limbs[0][0][0], limbs[0][0][1], False),
-        (arm_bone, limbs[0][1][0], limbs[0][1][1], False),
-        (leg_bone, limbs[1][0][0], limbs[1][0][1], True),
-        (leg_bone, limbs[1][1][0], limbs[1][1][1], True),
-    ]):
-        # Find normal vector (cross product)
-        if not is_leg:
-            base_idx = 3
-        else:
-            base_idx = SPINE_LEN-4
-        if 1 <= base_idx < SPINE_LEN-1:
-            tangent = (spine_bones[base_idx+1].position - spine_bones[base_idx-1].position).normalized()
-        else:
-            tangent = Vec3(1,0,0)
-        up_vec = (spine_bones[base_idx].position - Vec3(0,0,0)).normalized()
-        normal = up_vec.cross(tangent).normalized()
-        side = -1 if idx%2==0 else 1
-        normal = normal * side
-        # Animate "walking" limbs:
-        walk_phase = t*2 + idx*math.pi
-        limb_angle = 0.55 + math.sin(walk_phase)*0.47
-        # Upper limb
-        upper.position = parent.position + normal*0.33*LIZARD_SIZE
-        upper.look_at(parent.position + normal*0.95*LIZARD_SIZE + tangent*limb_angle*0.44)
-        # Lower limb (jointed)
-        lower.position = upper.position + upper.forward * (LIMB_LEN*0.52*LIZARD_SIZE if is_leg else LIMB_LEN*0.41*LIZARD_SIZE)
-        lower.look_at(upper.position + upper.forward * 1 + tangent*limb_angle*0.34)
-        # Toes (fan out)
-        toe_root = lower.position + lower.forward*0.66*LIZARD_SIZE
-        for t2, toe in enumerate(toes[idx]):
-            ang = (t2-2)*0.23
-            toe.position = toe_root + lower.right*math.sin(ang)*0.19*LIZARD_SIZE + lower.up*math.cos(ang)*0.06*LIZARD_SIZE
-            toe.look_at(toe.position + lower.forward)
-
-    # Shadow at bottom (y = -radius)
-    shadow.position = Vec3(center.x, -SPHERE_RADIUS+0.18, center.z)
-    shadow.look_at(Vec3(center.x,0,center.z))
+    for lizard in lizards:
+        lizard.move(time.dt)
+        lizard.place_spine(t)
+        lizard.keep_inside()
+    if len(lizards) > 1:
+        for lizard, (dx, dy, dz) in zip(lizards, separate(lizards, separation)):
+            lizard.push(dx, dy, dz, separation * 0.5)
+    for n, lizard in enumerate(lizards):
+        lizard.pose(t)
+        shadow_centers[n] = (lizard.center.x, lizard.center.y, lizard.center.z)
+    # Shadows at bottom, all at once
+    shadows.update(shadow_centers, shadow_radii)
 
 EditorCamera()
 app.run()
-
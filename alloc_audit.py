@@ -0,0 +1,208 @@
+import gc
+import linecache
+import os
+import sys
+import time
+import tracemalloc
+
+# Allocation audit and hot-path GC.
+#
+# An AllocationAudit watches the main loop in two phases of N frames each:
+#
+#   gc     untraced frames: how often the collector runs and how long it pauses
+#   lines  every line of the game's own files is traced; tracemalloc's peak
+#          is reset before each line runs and read after it, so whatever a
+#          line allocates (even if it is freed again right away) is charged
+#          to it. Objects recycled from Python's free lists (small tuples,
+#          floats) never reach the allocator and don't show up, which is fine:
+#          they're what is cheap. Traced code runs unspecialized bytecode,
+#          so on Python 3.11 a line like `x, y = point` shows a 48 byte
+#          iterator the untraced loop doesn't make.
+#
+# It then prints bytes and allocating runs per frame by source line, and
+# what the audited frames left behind (a leak shows up there).
+#
+# HotPathGC is for loops that allocate next to nothing in steady state:
+# startup objects are frozen out of the collector's sight and automatic
+# collection is turned off; the same thresholds are checked once per frame
+# instead, right before the pacer sleeps, so a collection never lands in
+# the middle of drawing.
+
+DEFAULT_FRAMES = 120
+TOP = 20
+ROOT = os.path.dirname(os.path.abspath(__file__))
+HERE = os.path.abspath(__file__)
+
+
+def game_file(path):
+    return path.startswith(ROOT) and path != HERE
+
+
+class AllocationAudit:
+    def __init__(self, frames=DEFAULT_FRAMES, top=TOP):
+        self.frames = frames
+        self.top = top
+        self.count = 0
+        self.phase = "gc"
+        self.collections = [0, 0, 0]
+        self.pause = 0.0
+        self.max_pause = 0.0
+        self.gc_started = None
+        self.started = time.perf_counter()
+        gc.callbacks.append(self.on_gc)
+        print(f"Auditing allocations: {frames} frames for gc, then {frames} traced frames...")
+
+    def on_gc(self, phase, info):
+        if phase == "start":
+            self.gc_started = time.perf_counter()
+        elif self.gc_started is not None:
+            pause = time.perf_counter() - self.gc_started
+            self.collections[info["generation"]] += 1
+            self.pause += pause
+            self.max_pause = max(self.max_pause, pause)
+            self.gc_started = None
+
+    def frame(self):
+        # Call once per frame; returns True when the report has been printed
+        self.count += 1
+        if self.count < self.frames:
+            return False
+        if self.phase == "gc":
+            gc.callbacks.remove(self.on_gc)
+            self.gc_seconds = time.perf_counter() - self.started
+            self.start_tracing()
+            return False
+        self.finish()
+        return True
+
+    def start_tracing(self):
+        self.phase = "lines"
+        self.count = 0
+        self.lines = {}  # (file, line) -> [bytes, allocating runs]
+        self.line = None
+        self.tracer = self.local  # one bound method, not a new one per event
+        tracemalloc.start()
+        self.before = tracemalloc.take_snapshot()
+        self.start = tracemalloc.get_traced_memory()[0]
+        # settrace only reaches frames entered from now on; the loop that
+        # called us (and its callers) are already running
+        sys.settrace(self.trace)
+        frame = sys._getframe(1)
+        while frame is not None:
+            if game_file(frame.f_code.co_filename):
+                frame.f_trace = self.tracer
+            frame = frame.f_back
+
+    def trace(self, frame, event, arg):
+        if game_file(frame.f_code.co_filename):
+            return self.local(frame, event, arg)
+        return None
+
+    def local(self, frame, event, arg):
+        # Charge the line that just finished, then start measuring the next
+        size = tracemalloc.get_traced_memory()[1] - self.start
+        if event == "call":
+            # Tracing itself gave the new frame an object and a locals dict
+            size -= sys.getsizeof(frame) + sys.getsizeof(frame.f_locals)
+        if self.line is not None and size > 0:
+            record = self.lines.get(self.line)
+            if record is None:
+                record = self.lines[self.line] = [0, 0]
+            record[0] += size
+            record[1] += 1
+        if event == "line":
+            self.line = (frame.f_code.co_filename, frame.f_lineno)
+        elif event == "return":
+            # Back in the caller, which is still on the line that made the call
+            back = frame.f_back
+            self.line = (back.f_code.co_filename, back.f_lineno) if back is not None else None
+        self.start = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        return self.tracer
+
+    def finish(self):
+        sys.settrace(None)
+        frame = sys._getframe(1)
+        while frame is not None:
+            frame.f_trace = None
+            frame = frame.f_back
+        if self.phase == "gc":
+            gc.callbacks.remove(self.on_gc)
+            self.gc_seconds = time.perf_counter() - self.started
+            self.lines = {}
+            self.before = None
+        after = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        tracemalloc.stop()
+        print("\n".join(self.report(after)))
+
+    def report(self, after):
+        frames = max(1, self.frames)
+        traced = max(1, self.count)
+        g0, g1, g2 = self.collections
+        lines = [f"Allocation audit ({self.frames} frames, {self.gc_seconds:.1f}s untraced)",
+                 f"  gc: {g0} gen0, {g1} gen1, {g2} gen2 collections "
+                 f"({(g0 + g1 + g2) / frames:.2f}/frame), pauses {self.pause * 1000:.2f}ms total, "
+                 f"{self.max_pause * 1000:.2f}ms max"]
+        if not self.lines and after is None:
+            return lines
+        total = sum(record[0] for record in self.lines.values())
+        runs = sum(record[1] for record in self.lines.values())
+        lines.append(f"  traced {traced} frames: {total / traced / 1024:.1f}KB and {runs / traced:.0f} "
+                     f"allocating line runs per frame")
+        lines.append("     bytes/frame  runs/frame  line")
+        ranked = sorted(((record[0], record[1], key) for key, record in self.lines.items() if game_file(key[0])),
+                        reverse=True)
+        for size, count, (path, line) in ranked[:self.top]:
+            source = linecache.getline(path, line).strip()
+            lines.append(f"  {size / traced:12.0f} {count / traced:11.1f}  "
+                         f"{os.path.basename(path)}:{line}  {source[:60]}")
+        if after is not None and self.before is not None:
+            grown = [stat for stat in after.compare_to(self.before, "lineno")
+                     if stat.size_diff > 0 and game_file(stat.traceback[0].filename)]
+            if grown:
+                lines.append("  still held after the traced frames:")
+                for stat in grown[:5]:
+                    frame = stat.traceback[0]
+                    lines.append(f"  {stat.size_diff:12d}B {stat.count_diff:+6d} blocks  "
+                                 f"{os.path.basename(frame.filename)}:{frame.lineno}")
+        return lines
+
+
+class HotPathGC:
+    def __init__(self):
+        self.thresholds = gc.get_threshold()
+        gc.collect()
+        gc.freeze()  # everything built at startup is never scanned again
+        gc.disable()
+        self.collections = 0
+
+    def frame(self):
+        # Call at the end of a frame, before pacing sleeps
+        # Same policy as the automatic collector: older generations are
+        # collected once enough younger collections have piled up
+        young, middle, old = gc.get_count()
+        t0, t1, t2 = self.thresholds
+        if young < t0:
+            return
+        if old >= t2:
+            gc.collect(2)
+        elif middle >= t1:
+            gc.collect(1)
+        else:
+            gc.collect(0)
+        self.collections += 1
+
+    def close(self):
+        gc.enable()
+        gc.unfreeze()
+
+
+def from_env():
+    # REPTILE_ALLOC_AUDIT=120 audits from startup
+    frames = os.environ.get("REPTILE_ALLOC_AUDIT")
+    return AllocationAudit(int(frames)) if frames else None
+
+
+def hot_path_from_env():
+    # REPTILE_HOT_PATH=1 moves garbage collection to frame boundaries
+    return HotPathGC() if os.environ.get("REPTILE_HOT_PATH") else None
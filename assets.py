@@ -0,0 +1,78 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Background asset loading.
+#
+# Decoding touch.wav and building the sound bank, opening fonts and
+# pre-rendering sprites used to happen before the first frame, with the
+# window sitting black meanwhile. An AssetLoader runs those loaders on a
+# worker thread instead. load() hands back a Slot holding a fallback (a
+# silent sound bank, no HUD font yet, no glow yet) that the game uses
+# straight away.
+#
+# poll() runs on the main thread, right after each flip. It switches every
+# finished asset into its slot and runs its on_ready callback there, so the
+# switch always happens between two frames and never partway through one.
+# A loader that fails just leaves its fallback in place.
+#
+# Both times are measured from when the AssetLoader was created and
+# printed once everything is in:
+#
+#   first frame   the first poll(), i.e. the first flip
+#   fully warm    the last asset switched in
+
+
+class Slot:
+    def __init__(self, name, value):
+        self.name = name
+        self.value = value  # the fallback until the loader finishes
+        self.ready = False
+
+
+class AssetLoader:
+    def __init__(self, workers=1):
+        self.started = time.perf_counter()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="assets")
+        self.pending = []  # (slot, future, on_ready)
+        self.first_frame = None
+        self.warm = None
+
+    def load(self, name, loader, fallback=None, on_ready=None):
+        slot = Slot(name, fallback)
+        self.pending.append((slot, self.executor.submit(loader), on_ready))
+        return slot
+
+    def poll(self):
+        # Call once per frame, right after the flip; True while anything is still loading
+        if self.first_frame is None:
+            self.first_frame = time.perf_counter() - self.started
+        if not self.pending:
+            return False
+        loading = []
+        for slot, future, on_ready in self.pending:
+            if not future.done():
+                loading.append((slot, future, on_ready))
+                continue
+            try:
+                value = future.result()
+            except Exception as e:
+                print(f"Could not load {slot.name} ({e}), keeping the fallback")
+                continue
+            slot.value = value
+            slot.ready = True
+            if on_ready is not None:
+                on_ready(value)
+        self.pending = loading
+        if not loading:
+            self.warm = time.perf_counter() - self.started
+            self.executor.shutdown(wait=False)
+            print(self.report())
+        return bool(loading)
+
+    def report(self):
+        first = f"{self.first_frame * 1000:.0f}ms" if self.first_frame is not None else "-"
+        warm = f"{self.warm * 1000:.0f}ms" if self.warm is not None else "still loading"
+        return f"Startup: first frame after {first}, fully warm after {warm}"
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,74 @@
+import pygame
+
+# Bloom glow: bright geometry is drawn into a buffer at 1/downscale resolution,
+# blurred by a smoothscale down/up chain (cheap separable box filtering) and
+# added back onto the frame. The blur only ever touches the small buffer, and
+# the final upscale is limited to the area that was actually drawn.
+
+
+class Bloom:
+    def __init__(self, size, downscale=4, passes=2, strength=150):
+        self.downscale = downscale
+        self.strength = strength
+        self.small_size = (max(1, size[0] // downscale), max(1, size[1] // downscale))
+        self.buffer = pygame.Surface(self.small_size)
+        self.blurred = pygame.Surface(self.small_size)
+        self.full = pygame.Surface((self.small_size[0] * downscale, self.small_size[1] * downscale))
+
+        # Scratch buffers for the blur, each half the size of the previous one
+        self.chain = []
+        w, h = self.small_size
+        for _ in range(passes):
+            w, h = max(1, w // 2), max(1, h // 2)
+            self.chain.append(pygame.Surface((w, h)))
+        self.pad = 2 ** (passes + 1) + 1
+        self.dirty = None
+
+    def begin(self):
+        self.buffer.fill((0, 0, 0))
+        self.dirty = None
+
+    def _mark(self, rect):
+        # Grown in place: one Rect per frame instead of one per shape
+        if self.dirty is None:
+            self.dirty = rect
+        else:
+            self.dirty.union_ip(rect)
+
+    # Drawing helpers take full-resolution coordinates
+    def circle(self, color, pos, radius):
+        d = self.downscale
+        self._mark(pygame.draw.circle(self.buffer, color, (int(pos[0] / d), int(pos[1] / d)), max(1, int(radius / d))))
+
+    def line(self, color, start, end, width=1):
+        d = self.downscale
+        width = int(width / d)
+        self._mark(pygame.draw.line(self.buffer, color,
+                                    (int(start[0] / d), int(start[1] / d)),
+                                    (int(end[0] / d), int(end[1] / d)), width if width > 1 else 1))
+
+    def apply(self, target):
+        if self.dirty is None:
+            return
+
+        # Blur: shrink through the chain, then grow back up to the buffer size
+        src = self.buffer
+        for surf in self.chain:
+            pygame.transform.smoothscale(src, surf.get_size(), surf)
+            src = surf
+        for surf in reversed(self.chain[:-1]):
+            pygame.transform.smoothscale(src, surf.get_size(), surf)
+            src = surf
+        pygame.transform.smoothscale(src, self.small_size, self.blurred)
+        if self.strength < 255:
+            s = self.strength
+            self.blurred.fill((s, s, s), special_flags=pygame.BLEND_RGB_MULT)
+
+        # Upscale only the region around what was drawn, then add it onto the frame
+        rect = self.dirty.inflate(self.pad * 2, self.pad * 2).clip(self.blurred.get_rect())
+        if rect.w == 0 or rect.h == 0:
+            return
+        d = self.downscale
+        full_rect = pygame.Rect(rect.x * d, rect.y * d, rect.w * d, rect.h * d)
+        pygame.transform.smoothscale(self.blurred.subsurface(rect), full_rect.size, self.full.subsurface(full_rect))
+        target.blit(self.full, full_rect.topleft, full_rect, special_flags=pygame.BLEND_RGB_ADD)
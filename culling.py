@@ -0,0 +1,89 @@
+import math
+
+# View culling.
+#
+# Reptiles keep an axis-aligned box around everything they draw in
+# `bounds` (left, top, right, bottom). It is grown while update() moves
+# the points anyway, then padded by how far limbs, ribs or glow can reach
+# past them, so checking a whole reptile costs four comparisons. draw()
+# then asks the Viewport again per body part and skips whatever is off
+# screen.
+#
+# For swarms a CullGrid buckets reptiles by the coarse cell their box is
+# centered in, so cells far from the viewport are rejected without looking
+# at their reptiles and cells well inside it are accepted the same way.
+
+CELL_SIZE = 128
+
+
+class Viewport:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+
+    def resize(self, width, height):
+        self.width = width
+        self.height = height
+
+    def sees(self, bounds):
+        left, top, right, bottom = bounds
+        return right >= 0 and bottom >= 0 and left <= self.width and top <= self.height
+
+    def sees_point(self, x, y, pad):
+        # Is anything within `pad` of (x, y) on screen?
+        return -pad <= x <= self.width + pad and -pad <= y <= self.height + pad
+
+
+class CullGrid:
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.reach = 0  # farthest any item's bounds have reached past their center
+        self.cells = {}
+        self.where = {}
+
+    def move(self, item):
+        # Call after item.bounds changed
+        left, top, right, bottom = item.bounds
+        reach = max(right - left, bottom - top) / 2
+        if reach > self.reach:
+            self.reach = reach
+        x = (left + right) / 2
+        y = (top + bottom) / 2
+        key = (int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size)))
+        old = self.where.get(item)
+        if old == key:
+            return
+        if old is not None:
+            items = self.cells[old]
+            items.remove(item)
+            if not items:
+                del self.cells[old]
+        self.cells.setdefault(key, []).append(item)
+        self.where[item] = key
+
+    def remove(self, item):
+        key = self.where.pop(item)
+        items = self.cells[key]
+        items.remove(item)
+        if not items:
+            del self.cells[key]
+
+    def visible(self, viewport):
+        size = self.cell_size
+        reach = self.reach
+        width, height = viewport.width, viewport.height
+        out = []
+        for (col, row), items in self.cells.items():
+            left = col * size - reach
+            top = row * size - reach
+            right = (col + 1) * size + reach
+            bottom = (row + 1) * size + reach
+            if right < 0 or bottom < 0 or left > width or top > height:
+                continue  # nothing registered here can reach the screen
+            if left >= 0 and top >= 0 and right <= width and bottom <= height:
+                out.extend(items)  # everything here is fully on screen
+                continue
+            for item in items:
+                if viewport.sees(item.bounds):
+                    out.append(item)
+        return out
@@ -0,0 +1,116 @@
+import math
+
+# Phase-driven gait with planted footfalls.
+#
+# A single gait cycle advances with the distance the body travels. Every
+# foot reads its own phase from it (cycle + offset): during stance the foot
+# stays exactly where it was planted in world space, during swing it moves
+# from where it lifted off to a target that was chosen once, at lift-off.
+# Replanning therefore only happens at phase boundaries; in between a frame
+# just interpolates swinging feet. Limb poses come from closed-form two-bone IK.
+#
+# All feet live in flat parallel lists and are advanced in one loop.
+
+STRIDE = 70.0       # body travel per full gait cycle, px
+DUTY = 0.6          # fraction of the cycle a foot is on the ground
+OVERSTRETCH = 1.15  # force a step when a planted foot is this far past its reach
+SETTLE_STEP = 0.04  # cycle advance per frame while standing, until every foot is down
+
+
+def two_bone_ik(hip_x, hip_y, target_x, target_y, upper, lower, bend_x, bend_y):
+    # Returns (knee_x, knee_y, foot_x, foot_y). The knee bends towards (bend_x, bend_y).
+    dx = target_x - hip_x
+    dy = target_y - hip_y
+    d = math.sqrt(dx * dx + dy * dy)
+    d = min(max(d, abs(upper - lower) + 1e-3), upper + lower - 1e-3)
+    base = math.atan2(dy, dx)
+    cos_a = (upper * upper + d * d - lower * lower) / (2 * upper * d)
+    alpha = math.acos(max(-1.0, min(1.0, cos_a)))
+    # Pick whichever of the two mirror solutions bends the right way
+    if math.cos(base + math.pi / 2) * bend_x + math.sin(base + math.pi / 2) * bend_y < 0:
+        alpha = -alpha
+    knee_x = hip_x + math.cos(base + alpha) * upper
+    knee_y = hip_y + math.sin(base + alpha) * upper
+    return knee_x, knee_y, hip_x + math.cos(base) * d, hip_y + math.sin(base) * d
+
+
+class Gait:
+    def __init__(self, offsets, reach, forward_bias=0.0):
+        # offsets: phase offset per foot (0..1); reach: rest distance from hip per foot
+        n = len(offsets)
+        self.count = n
+        self.offsets = list(offsets)
+        self.reach = list(reach)
+        self.forward_bias = forward_bias
+        self.cycle = 0.0
+        self.phase = [0.0] * n
+        self.swinging = [False] * n
+        self.foot_x = [0.0] * n
+        self.foot_y = [0.0] * n
+        self.from_x = [0.0] * n
+        self.from_y = [0.0] * n
+        self.to_x = [0.0] * n
+        self.to_y = [0.0] * n
+        self.footfalls = []  # feet that touched down during the last update
+        self.initialized = False
+        self.stride = STRIDE
+
+    def rescale(self, k):
+        # Step lengths follow the body when the canvas resolution changes; the feet re-plant
+        self.reach = [reach * k for reach in self.reach]
+        self.stride *= k
+        self.initialized = False
+
+    def rest(self, i, hip_x, hip_y, side_x, side_y, fwd_x, fwd_y, lead):
+        reach = self.reach[i]
+        return (hip_x + side_x * reach + fwd_x * (lead + self.forward_bias * reach),
+                hip_y + side_y * reach + fwd_y * (lead + self.forward_bias * reach))
+
+    def update(self, hips, travelled, fwd_x, fwd_y):
+        # hips: per foot (hip_x, hip_y, side_x, side_y), side = unit vector out from the body
+        self.footfalls.clear()
+        if not self.initialized:
+            for i, (hx, hy, sx, sy) in enumerate(hips):
+                self.foot_x[i], self.foot_y[i] = self.rest(i, hx, hy, sx, sy, fwd_x, fwd_y, 0.0)
+            self.initialized = True
+
+        if travelled > 0:
+            self.cycle = (self.cycle + travelled / self.stride) % 1.0
+            # Land far enough ahead that the foot ends up as far behind at lift-off
+            lead = self.stride * DUTY * 0.5
+        else:
+            # Standing: let any step in the air finish, then everything stays planted
+            if any(self.swinging):
+                self.cycle = (self.cycle + SETTLE_STEP) % 1.0
+            lead = 0.0
+        for i in range(self.count):
+            hx, hy, sx, sy = hips[i]
+            p = (self.cycle + self.offsets[i]) % 1.0
+            was_swinging = self.swinging[i]
+            swinging = p >= DUTY
+
+            if not swinging and not was_swinging:
+                # Planted. Standing still lets a badly stretched foot re-plant.
+                dx = self.foot_x[i] - hx
+                dy = self.foot_y[i] - hy
+                if dx * dx + dy * dy > (self.reach[i] * OVERSTRETCH) ** 2 and travelled == 0:
+                    self.foot_x[i], self.foot_y[i] = self.rest(i, hx, hy, sx, sy, fwd_x, fwd_y, 0.0)
+                    self.footfalls.append(i)
+            elif swinging and not was_swinging:
+                # Lift-off: the only place a step gets planned
+                self.from_x[i] = self.foot_x[i]
+                self.from_y[i] = self.foot_y[i]
+                self.to_x[i], self.to_y[i] = self.rest(i, hx, hy, sx, sy, fwd_x, fwd_y, lead)
+            elif not swinging and was_swinging:
+                # Touch-down
+                self.foot_x[i] = self.to_x[i]
+                self.foot_y[i] = self.to_y[i]
+                self.footfalls.append(i)
+
+            if swinging:
+                s = (p - DUTY) / (1.0 - DUTY)
+                s = s * s * (3 - 2 * s)
+                self.foot_x[i] = self.from_x[i] + (self.to_x[i] - self.from_x[i]) * s
+                self.foot_y[i] = self.from_y[i] + (self.to_y[i] - self.from_y[i]) * s
+            self.swinging[i] = swinging
+            self.phase[i] = p
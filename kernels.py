@@ -0,0 +1,228 @@
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Optional compiled kernels for SkeletalReptile (reptile_cursor.py).
+#
+# The follow-the-leader spine pass, the leg swing and the leg/toe geometry
+# are loops over a few dozen floats: each step depends on the one before,
+# so NumPy can't vectorize them and CPython spends its time on the
+# interpreter. With numba installed these functions are compiled to
+# machine code; without it they are plain Python on the same buffers.
+#
+#   REPTILE_KERNELS=python   use the Python versions even if numba is there
+#
+# Compiled kernels take NumPy arrays, so array() wraps a state view (or any
+# float64 buffer) in a zero-copy array when they are on and hands the view
+# back unchanged when they are off (indexing a memoryview is faster than
+# indexing NumPy from Python). The kernels do exactly the same float
+# operations in the same order either way, so results are bit-identical:
+# `python kernels.py` checks each kernel against its Python version, and
+# tests/test_kernels.py whole reptiles run with kernels on and off.
+#
+# Compiled code is cached on disk (__pycache__); warm_up() at startup
+# compiles or loads it before the first frame so nothing stalls later.
+
+ENABLED = numba is not None and os.environ.get("REPTILE_KERNELS", "numba") != "python"
+
+
+def jit(fn):
+    if not ENABLED:
+        return fn
+    return numba.njit(cache=True)(fn)
+
+
+def array(view, dtype=np.float64):
+    # Buffer the kernels can write through: a NumPy array over the same memory when compiled
+    return np.frombuffer(view, dtype) if ENABLED else view
+
+
+def table(values, dtype=np.float64):
+    # Read-only per-body table (a Body column from species.py)
+    return np.array(values, dtype) if ENABLED else values
+
+
+def buffer(count):
+    # Scratch float64 output of `count` values
+    return np.zeros(count) if ENABLED else memoryview(bytearray(8 * count)).cast('d')
+
+
+def leg_tables(body):
+    # The body's leg columns, as leg_geometry() takes them after the angles
+    return (table(body.limb_segment, np.int64), table(body.limb_upper), table(body.limb_lower),
+            table(body.foot_bend), table(body.toe_angles), table(body.toe_length))
+
+
+def values(out):
+    # Plain floats for pygame.draw (one conversion per frame, not per read)
+    return out.tolist() if ENABLED else out
+
+
+@jit
+def follow_spine(seg_x, seg_y, head_x, head_y, spacing, speed):
+    # Each segment closes in on the one ahead of it (the head for the first);
+    # returns the box around the head and every segment
+    prev_x = head_x
+    prev_y = head_y
+    left = right = prev_x
+    top = bottom = prev_y
+    for i in range(len(seg_x)):
+        dx = prev_x - seg_x[i]
+        dy = prev_y - seg_y[i]
+        distance = math.sqrt(dx * dx + dy * dy)
+        if distance < 1:
+            distance = 1
+        if distance > spacing:
+            segment_speed = speed * (0.95 - (i * 0.01))  # Segments get slower toward tail
+            seg_x[i] += (dx / distance) * segment_speed
+            seg_y[i] += (dy / distance) * segment_speed
+        prev_x = seg_x[i]
+        prev_y = seg_y[i]
+        if prev_x < left:
+            left = prev_x
+        elif prev_x > right:
+            right = prev_x
+        if prev_y < top:
+            top = prev_y
+        elif prev_y > bottom:
+            bottom = prev_y
+    return left, top, right, bottom
+
+
+@jit
+def animate_legs(angles, speeds, moving):
+    for i in range(len(angles)):
+        if moving:
+            # Swing back and forth, neighbours in opposite directions
+            angles[i] += speeds[i] * (1 if i % 2 == 0 else -1)
+            if abs(angles[i]) > 0.8:
+                angles[i] = 0.8 if angles[i] > 0 else -0.8
+                speeds[i] *= -1
+        else:
+            # Return legs to neutral position when stationary
+            angles[i] *= 0.9
+
+
+@jit
+def leg_geometry(seg_x, seg_y, head_x, head_y, leg_segment, leg_angles, upper, lower, foot_bend,
+                 toe_angles, toe_length, out):
+    # Points of every leg into `out`: per pair, left then right, the hip,
+    # knee and foot followed by the toe tips, as x, y
+    toes = len(toe_angles[0]) if len(toe_angles) else 0
+    stride = 2 * (3 + toes)
+    half_pi = math.pi / 2
+    for k in range(len(leg_segment)):
+        i = leg_segment[k]
+        # Legs stand out square to the spine
+        if i > 0:
+            spine_angle = math.atan2(seg_y[i] - seg_y[i - 1], seg_x[i] - seg_x[i - 1])
+        else:
+            spine_angle = math.atan2(seg_y[i] - head_y, seg_x[i] - head_x)
+        hip_x = seg_x[i]
+        hip_y = seg_y[i]
+        for side in range(2):
+            if side == 0:
+                leg_angle = spine_angle + half_pi + leg_angles[k]
+                foot_angle = leg_angle + foot_bend[k]
+            else:
+                leg_angle = spine_angle - half_pi - leg_angles[k]
+                foot_angle = leg_angle - foot_bend[k]
+            knee_x = hip_x + math.cos(leg_angle) * upper[k]
+            knee_y = hip_y + math.sin(leg_angle) * upper[k]
+            foot_x = knee_x + math.cos(foot_angle) * lower[k]
+            foot_y = knee_y + math.sin(foot_angle) * lower[k]
+            o = (2 * k + side) * stride
+            out[o] = hip_x
+            out[o + 1] = hip_y
+            out[o + 2] = knee_x
+            out[o + 3] = knee_y
+            out[o + 4] = foot_x
+            out[o + 5] = foot_y
+            for t in range(toes):
+                # Toes fan out mirrored on the right
+                toe_angle = foot_angle + toe_angles[k][t] if side == 0 else foot_angle - toe_angles[k][t]
+                out[o + 6 + 2 * t] = foot_x + math.cos(toe_angle) * toe_length[k]
+                out[o + 7 + 2 * t] = foot_y + math.sin(toe_angle) * toe_length[k]
+
+
+def warm_up():
+    # Compile (or load from the disk cache) with the argument types the game uses
+    if not ENABLED:
+        return 0.0
+    start = time.perf_counter()
+    xs, ys = np.zeros(4), np.zeros(4)
+    follow_spine(xs, ys, 0.0, 0.0, 10.0, 3.0)
+    animate_legs(np.zeros(2), np.zeros(2), True)
+    leg_geometry(xs, ys, 0.0, 0.0, np.zeros(1, np.int64), np.zeros(1), np.zeros(1), np.zeros(1), np.zeros(1),
+                 np.zeros((1, 3)), np.zeros(1), np.zeros(12))
+    return time.perf_counter() - start
+
+
+def check(steps=2000, seed=3):
+    # Run each compiled kernel and its Python version side by side on the same
+    # inputs; every output has to match to the bit
+    rng = np.random.default_rng(seed)
+    segments, pairs, toes = 30, 10, 3
+    xa, ya = rng.uniform(0, 800, segments), rng.uniform(0, 600, segments)
+    xb, yb = xa.copy(), ya.copy()
+    angles_a, speeds_a = rng.uniform(-0.8, 0.8, pairs), rng.uniform(0.1, 0.2, pairs)
+    angles_b, speeds_b = angles_a.copy(), speeds_a.copy()
+    leg_segment = np.arange(1, 2 * pairs, 2, dtype=np.int64)
+    upper, lower = np.full(pairs, 12.0), np.full(pairs, 8.0)
+    bend = np.where(np.arange(pairs) % 2 == 0, 0.7, -0.3)
+    toe_angles = np.tile(np.array([-0.4, 0.0, 0.4]), (pairs, 1))
+    toe_length = np.full(pairs, 5.0)
+    out_a, out_b = np.zeros(pairs * 2 * 2 * (3 + toes)), np.zeros(pairs * 2 * 2 * (3 + toes))
+    mismatches = 0
+    for step in range(steps):
+        head_x = 400 + math.cos(step / 30) * 380
+        head_y = 300 + math.sin(step / 17) * 280
+        speed = float(rng.uniform(3, 8))
+        moving = step % 200 < 150
+        box_a = follow_spine(xa, ya, head_x, head_y, 10.0, speed)
+        box_b = follow_spine.py_func(xb, yb, head_x, head_y, 10.0, speed)
+        animate_legs(angles_a, speeds_a, moving)
+        animate_legs.py_func(angles_b, speeds_b, moving)
+        leg_geometry(xa, ya, head_x, head_y, leg_segment, angles_a, upper, lower, bend, toe_angles, toe_length, out_a)
+        leg_geometry.py_func(xb, yb, head_x, head_y, leg_segment, angles_b, upper, lower, bend, toe_angles,
+                             toe_length, out_b)
+        same = (box_a == box_b and xa.tobytes() == xb.tobytes() and ya.tobytes() == yb.tobytes()
+                and angles_a.tobytes() == angles_b.tobytes() and speeds_a.tobytes() == speeds_b.tobytes()
+                and out_a.tobytes() == out_b.tobytes())
+        mismatches += not same
+    return mismatches
+
+
+def bench(fn, args, repeat=2000):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(*args)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    if numba is None:
+        print("numba is not installed: the Python kernels are in use, nothing to compare")
+        return 0
+    if not ENABLED:
+        print("REPTILE_KERNELS=python: the Python kernels are in use, nothing to compare")
+        return 0
+    print(f"numba {numba.__version__}: warm-up {warm_up() * 1000:.0f}ms")
+    mismatches = check()
+    print("compiled vs Python: " + ("bit-identical" if not mismatches else f"{mismatches} steps DIFFER"))
+    xs, ys = np.random.default_rng(0).uniform(0, 800, (2, 30))
+    for name, fn in (("follow_spine", follow_spine), ("follow_spine (Python)", follow_spine.py_func)):
+        print(f"  {name:22s} {bench(fn, (xs, ys, 400.0, 300.0, 10.0, 5.0)) * 1e6:7.2f}us")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+import os
+import socket
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Metrics for monitoring a fleet of displays.
+#
+# Every frame records into a Metrics object: frame interval, update and
+# draw time go into fixed-bucket histograms (a bisect and an increment,
+# no allocation), dropped frames, touches and the reptile count are plain
+# counters. Nothing else happens on the frame path.
+#
+# An exporter thread renders them in the Prometheus text format every few
+# seconds and either writes a file (atomically, for node_exporter's
+# textfile collector) or serves the latest copy over local HTTP:
+#
+#   REPTILE_METRICS=/var/lib/node_exporter/reptile.prom   write this file
+#   REPTILE_METRICS=http://127.0.0.1:9464                 serve /metrics (localhost only)
+#   REPTILE_METRICS_INTERVAL=10                           seconds between flushes
+#   REPTILE_DISPLAY=lobby-2                               display label (default: host name)
+#
+# Percentiles come out both as histogram buckets (for histogram_quantile()
+# across the fleet) and as precomputed p50/p95/p99 gauges per display.
+
+FLUSH_INTERVAL = 10.0  # seconds
+FRAME_BUCKETS = (4, 8, 12, 16, 17, 20, 25, 33, 50, 100, 250)  # ms, upper bounds
+WORK_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 12, 16, 33, 100)       # ms
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last one is +Inf
+        self.sum = 0.0
+
+    def observe(self, ms):
+        self.counts[bisect_left(self.bounds, ms)] += 1
+        self.sum += ms
+
+    def quantile(self, q, counts):
+        # Upper bound of the bucket the q-th observation falls in
+        total = sum(counts)
+        if not total:
+            return 0.0
+        seen = 0
+        for i, count in enumerate(counts):
+            seen += count
+            if seen >= total * q:
+                return self.bounds[i] if i < len(self.bounds) else self.bounds[-1]
+        return self.bounds[-1]
+
+
+class Metrics:
+    def __init__(self, app, pacer, display=None):
+        self.labels = 'app="%s",display="%s"' % (app, display or os.environ.get("REPTILE_DISPLAY")
+                                                 or socket.gethostname())
+        # Same rule as FramePacer.missed: over 1.5 frame intervals, never when uncapped
+        capped = pacer.fps and pacer.mode != "uncapped"
+        self.drop_ms = 1500 / pacer.fps if capped else float("inf")
+        self.frame_ms = Histogram(FRAME_BUCKETS)
+        self.update_ms = Histogram(WORK_BUCKETS)
+        self.draw_ms = Histogram(WORK_BUCKETS)
+        self.frames = 0
+        self.dropped = 0
+        self.touches = 0
+        self.reptiles = 0
+        self.started = self.update_started = self.draw_started = self.draw_ended = time.perf_counter()
+        self.last_frames = 0
+        self.last_flush = self.started
+
+    # Frame path: call in this order once per frame
+    def begin_update(self):
+        self.update_started = time.perf_counter()
+
+    def begin_draw(self):
+        self.draw_started = time.perf_counter()
+
+    def end_draw(self):
+        self.draw_ended = time.perf_counter()
+
+    def frame_done(self, interval_ms):
+        # interval_ms: FramePacer.last_interval right after tick(). It is None
+        # for the first frame after pause() (the idle wait would otherwise
+        # count as one long dropped frame), pass None for unpaced frames too
+        self.frames += 1
+        self.update_ms.observe((self.draw_started - self.update_started) * 1000)
+        self.draw_ms.observe((self.draw_ended - self.draw_started) * 1000)
+        if interval_ms is not None:
+            self.frame_ms.observe(interval_ms)
+            if interval_ms > self.drop_ms:
+                self.dropped += 1
+
+    def render(self):
+        # Prometheus text format; runs on the exporter thread
+        now = time.perf_counter()
+        frames = self.frames
+        fps = (frames - self.last_frames) / max(1e-9, now - self.last_flush)
+        self.last_frames, self.last_flush = frames, now
+        labels = self.labels
+        lines = []
+
+        def metric(name, kind, help, value):
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name}{{{labels}}} {value}")
+
+        metric("reptile_frames_total", "counter", "Frames drawn.", frames)
+        metric("reptile_dropped_frames_total", "counter", "Frames that took over 1.5 frame intervals.",
+               self.dropped)
+        metric("reptile_touches_total", "counter", "Touch events (the head reaching the cursor, taps on the screen).", self.touches)
+        metric("reptile_fps", "gauge", "Frames per second since the previous flush.", f"{fps:.2f}")
+        metric("reptile_reptiles", "gauge", "Reptiles being simulated.", self.reptiles)
+        metric("reptile_uptime_seconds", "gauge", "Seconds since startup.", f"{now - self.started:.1f}")
+        for name, help, histogram in (("reptile_frame_seconds", "Time between frames.", self.frame_ms),
+                                      ("reptile_update_seconds", "Simulation time per frame.", self.update_ms),
+                                      ("reptile_draw_seconds", "Drawing time per frame.", self.draw_ms)):
+            counts = list(histogram.counts)  # one consistent copy; the frame path keeps adding
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} histogram")
+            seen = 0
+            for bound, count in zip(histogram.bounds, counts):
+                seen += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound / 1000:g}"}} {seen}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {sum(counts)}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.sum / 1000:.6f}")
+            lines.append(f"{name}_count{{{labels}}} {sum(counts)}")
+            lines.append(f"# HELP {name}_quantile {help} Percentiles, bucket upper bounds.")
+            lines.append(f"# TYPE {name}_quantile gauge")
+            for q in QUANTILES:
+                lines.append(f'{name}_quantile{{{labels},quantile="{q:g}"}} '
+                             f"{histogram.quantile(q, counts) / 1000:g}")
+        return "\n".join(lines) + "\n"
+
+
+class Exporter:
+    def __init__(self, metrics, target, interval=FLUSH_INTERVAL):
+        self.metrics = metrics
+        self.target = target
+        self.interval = interval
+        self.latest = metrics.render()
+        self.server = None
+        if target.startswith("http://"):
+            host, _, port = target[len("http://"):].rstrip("/").partition(":")
+            self.server = ThreadingHTTPServer((host or "127.0.0.1", int(port or 9464)), self.handler())
+            threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True).start()
+        else:
+            self.write()
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="metrics", daemon=True)
+        self.thread.start()
+        print(f"Exporting metrics to {target} every {interval:g}s")
+
+    def handler(self):
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = exporter.latest.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # scrapes every few seconds would flood the console
+
+        return Handler
+
+    def run(self):
+        while not self.done.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        self.latest = self.metrics.render()
+        if self.server is None:
+            self.write()
+
+    def write(self):
+        # Write next to it and rename, so a collector never reads half a file
+        temp = self.target + ".tmp"
+        try:
+            with open(temp, "w") as f:
+                f.write(self.latest)
+            os.replace(temp, self.target)
+        except OSError as e:
+            print(f"Could not write metrics to '{self.target}': {e}")
+
+    def close(self):
+        self.done.set()
+        self.thread.join()
+        self.flush()  # final numbers
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+def export_from_env(metrics, target=None):
+    # REPTILE_METRICS picks the target (see above); None when unset
+    target = target or os.environ.get("REPTILE_METRICS")
+    if not target:
+        return None
+    return Exporter(metrics, target, float(os.environ.get("REPTILE_METRICS_INTERVAL", FLUSH_INTERVAL)))
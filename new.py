@@ -2,28 +2,63 @@ import pygame
 import sys
 import math
 import os
+import palette
+from gait import Gait, two_bone_ik
 from pygame.locals import *
+from pacing import FramePacer, fps_from_env
+import profiler
+import alloc_audit
+import species
+from particles import ParticleSystem, DUST, SPARK
+from render_scale import RenderScale
+from sound_bank import SoundBank
+from assets import AssetLoader
+from metrics import Metrics, export_from_env
+from soak import soak_from_env
+
+# Soak test (REPTILE_SOAK=2d): headless and uncapped, with a scripted cursor.
+# Before pygame starts, so it comes up on the dummy video and audio drivers
+soak = soak_from_env()
 
 pygame.init()
 pygame.mixer.init()
 
-# Load sound (optional)
-try:
-    TOUCH_SOUND = pygame.mixer.Sound("touch.wav")
-except pygame.error:
-    TOUCH_SOUND = None
-    print("⚠️ Could not load 'touch.wav'. Please place it in the same folder.")
+# Touch/footstep variants, synthesized once (or loaded from sound_bank.npz) on
+# a loader thread while the game already runs; silent until they are in
+assets = AssetLoader()
+sounds = assets.load("sounds", SoundBank, SoundBank(load=False))
 
-screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
-WIDTH, HEIGHT = screen.get_size()
+# Internal render resolution (REPTILE_RENDER_SCALE), [ and ] change it at runtime
+pacer = FramePacer(fps=fps_from_env())  # REPTILE_PACING=sleep|busy|vsync|uncapped, REPTILE_FPS=60
+view = RenderScale(pacer=pacer)
+screen = view.open()
+WIDTH, HEIGHT = view.size
 pygame.display.set_caption("Skeletal Reptile")
 
+# Frame, touch and timing metrics, exported when REPTILE_METRICS is set
+metrics = Metrics("new", pacer)
+metrics.reptiles = 1
+exporter = export_from_env(metrics)
+
 COLORS = [(180, 180, 180), (0, 255, 0), (255, 100, 100), (100, 255, 255), (255, 255, 0)]
 color_index = 0
 BONE_COLOR = COLORS[color_index]
+SIDES = (-1, 1)  # a constant, so the draw loops don't build a list per bone
+BODY = species.compile_spec(species.LIZARD)  # body layout, see species.py
+
+# Indexed frame: geometry is drawn with palette indices, C only swaps the palette
+layers = palette.IndexedLayers(BONE_COLOR)
+frame = layers.new((WIDTH, HEIGHT))
+
+# Dust on footfalls, sparks on touch (pooled, drawn on top of the frame)
+effects = ParticleSystem(color=BONE_COLOR)
+
+def line_width(width, scale):
+    # Bone thickness at the render scale, in whole pixels and never thinner than one
+    return max(1, round(width * scale))
 
 class SkeletalReptile:
-    def __init__(self, x, y):
+    def __init__(self, x, y, scale=1.0):
         self.x = x
         self.y = y
         self.target_x = x
@@ -32,28 +67,74 @@ class SkeletalReptile:
         self.max_speed = 8
         self.movement_lag = 15
 
-        self.base_segment_size = 7
         self.head_base_size = 16
         self.head_grow = False
         self.sound_played = False
 
-        self.num_segments = 24
+        body = self.body = BODY
+        self.num_segments = body.segments
         self.segments = []
-        self.segment_spacing = 14
+        self.segment_spacing = body.spacing
 
         for i in range(self.num_segments):
             self.segments.append({
                 'x': x - i * self.segment_spacing,
                 'y': y,
-                'size': self.base_segment_size - min(2, i * 0.08)
+                'size': body.sizes[i]
             })
 
-        self.leg_length = 48
-        self.leg_phase = [0, 0, 0, 0]
-        self.leg_anim_speeds = [0.13, -0.13, 0.14, -0.14]
+        # (segment, side, upper length, lower length, bone width, bend, toe length,
+        # toe angles) per limb, left then right for each pair of the spec
+        self.limbs = [(body.limb_segment[k], side, body.limb_upper[k], body.limb_lower[k], body.limb_width[k],
+                       body.limb_bend[k], body.toe_length[k], body.toe_angles[k])
+                      for k in range(body.limb_count) for side in SIDES]
+        # The spec's phases: diagonal pairs step together
+        self.gait = Gait(offsets=[body.limb_phase[k][j] for k in range(body.limb_count) for j in range(len(SIDES))],
+                         reach=[(limb[2] + limb[3]) * 0.7 for limb in self.limbs],
+                         forward_bias=0.2)
+        self.hips = [(0.0, 0.0, 0.0, 0.0)] * len(self.limbs)
 
         self.tail_wave_phase = 0
 
+        # Canvas pixels per panel pixel. Spacing, sizes and speeds are kept in
+        # canvas pixels; the body's own tables are scaled where they are drawn
+        self.scale = 1.0
+        if scale != 1.0:
+            self.rescale(scale, x, y)
+
+    def rescale(self, k, cx=0.0, cy=0.0):
+        # Scale the whole reptile by k around (cx, cy): the canvas resolution
+        # changed, so it stays in place and the same size on the panel
+        self.x = cx + (self.x - cx) * k
+        self.y = cy + (self.y - cy) * k
+        self.target_x = cx + (self.target_x - cx) * k
+        self.target_y = cy + (self.target_y - cy) * k
+        for segment in self.segments:
+            segment['x'] = cx + (segment['x'] - cx) * k
+            segment['y'] = cy + (segment['y'] - cy) * k
+            segment['size'] *= k
+        self.segment_spacing *= k
+        self.head_base_size *= k
+        self.speed *= k
+        self.max_speed *= k
+        self.movement_lag *= k
+        self.scale *= k
+        self.gait.rescale(k)  # re-plants the feet around the new pose
+
+    def normal_at(self, idx):
+        if 1 < idx < len(self.segments) - 2:
+            x0, y0 = self.segments[idx-2]['x'], self.segments[idx-2]['y']
+            x1, y1 = self.segments[idx+2]['x'], self.segments[idx+2]['y']
+            dx, dy = x1 - x0, y1 - y0
+        elif idx > 0:
+            x0, y0 = self.segments[idx-1]['x'], self.segments[idx-1]['y']
+            x1, y1 = self.segments[idx]['x'], self.segments[idx]['y']
+            dx, dy = x1 - x0, y1 - y0
+        else:
+            dx, dy = 1, 0
+        length = max(1e-9, math.hypot(dx, dy))
+        return -dy/length, dx/length  # Unit normal
+
     def update(self, mouse_pos):
         dx = mouse_pos[0] - self.x
         dy = mouse_pos[1] - self.y
@@ -71,9 +152,11 @@ class SkeletalReptile:
         dy = self.target_y - self.y
         distance_to_target = max(1, math.hypot(dx, dy))
 
+        travelled = 0
         if distance_to_target > 1:
             self.x += (dx / distance_to_target) * current_speed
             self.y += (dy / distance_to_target) * current_speed
+            travelled = current_speed
 
         prev_x, prev_y = self.x, self.y
         for i, segment in enumerate(self.segments):
@@ -86,130 +169,98 @@ class SkeletalReptile:
                 segment['y'] += (dy / distance) * segment_speed
             # Tail sway
             if i >= self.num_segments - 5:
-                sway = math.sin(self.tail_wave_phase + i * 0.32) * 2
+                sway = math.sin(self.tail_wave_phase + i * 0.32) * 2 * self.scale
                 segment['y'] += sway
             prev_x, prev_y = segment['x'], segment['y']
 
-        self.tail_wave_phase += 0.09
-
-        # Leg walk cycle
-        is_moving = distance_to_target > 2
-        for i in range(4):
-            if is_moving:
-                self.leg_phase[i] += self.leg_anim_speeds[i]
+        self.tail_wave_phase = (self.tail_wave_phase + 0.09) % math.tau  # wrapped: full precision forever
+
+        # Gait: feet stay planted in world space and only re-plan when they lift off
+        for i, limb in enumerate(self.limbs):
+            idx, side = limb[0], limb[1]
+            nx, ny = self.normal_at(idx)
+            self.hips[i] = (self.segments[idx]['x'], self.segments[idx]['y'], nx * side, ny * side)
+        nx, ny = self.normal_at(self.body.limb_segment[0])
+        self.gait.update(self.hips, travelled, -ny, nx)
+        if self.gait.footfalls:
+            # Steps while walking, a quiet tick when a foot re-plants standing still
+            if travelled > 0:
+                sounds.value.play_step()
             else:
-                self.leg_phase[i] *= 0.8
+                sounds.value.play_click()
+        for i in self.gait.footfalls:
+            effects.emit(self.gait.foot_x[i], self.gait.foot_y[i], 8, DUST, speed=0.8 * self.scale, life=25)
 
         # Sound FX on touch
-        is_touching = math.hypot(mouse_pos[0] - self.x, mouse_pos[1] - self.y) < 40
+        is_touching = math.hypot(mouse_pos[0] - self.x, mouse_pos[1] - self.y) < 40 * self.scale
         self.head_grow = is_touching
-        if is_touching and not self.sound_played and TOUCH_SOUND:
-            TOUCH_SOUND.play()
+        if is_touching and not self.sound_played:
+            sounds.value.play_touch(travelled / self.max_speed)  # how far the head actually moved this frame
+            effects.emit(self.x, self.y, 120, SPARK, speed=6 * self.scale, life=40)
             self.sound_played = True
+            metrics.touches += 1
         elif not is_touching:
             self.sound_played = False
 
     def draw(self, screen, bone_color, mouse_pos):
+        s = self.scale
+        thin = line_width(2, s)
         # --- Spine ---
+        link_widths = self.body.link_widths
         for i, segment in enumerate(self.segments):
-            pos = (int(segment['x']), int(segment['y']))
+            pos = (segment['x'], segment['y'])
             pygame.draw.circle(screen, bone_color, pos, int(segment['size']))
             if i > 0:
                 prev = self.segments[i - 1]
-                pygame.draw.line(screen, bone_color, (int(prev['x']), int(prev['y'])), pos, 5 if i<4 else 3)
-        # --- Ribs (fan shape) ---
-        rib_count = 7
-        for i in range(4, 4 + rib_count):
+                pygame.draw.line(screen, bone_color, (prev['x'], prev['y']), pos, line_width(link_widths[i], s))
+        # --- Ribs (fan shape, end offsets from the spec) ---
+        for i, rib_x, rib_y in self.body.rib_offsets:
             seg = self.segments[i]
             base = (seg['x'], seg['y'])
-            frac = (i-4)/(rib_count-1) - 0.5
-            angle = math.pi/2 + frac*math.pi/2
-            length = 40 - abs(frac)*18
-            for s in [-1, 1]:
-                rib_ang = angle * s
-                rx = base[0] + math.cos(rib_ang) * length
-                ry = base[1] + math.sin(rib_ang) * length
-                pygame.draw.line(screen, bone_color, base, (rx, ry), 2)
-
-        # === LIMBS PROPERLY ATTACHED USING SPINE NORMALS ===
-
-        def normal_at(idx):
-            if 1 < idx < len(self.segments) - 2:
-                x0, y0 = self.segments[idx-2]['x'], self.segments[idx-2]['y']
-                x1, y1 = self.segments[idx+2]['x'], self.segments[idx+2]['y']
-                dx, dy = x1 - x0, y1 - y0
-            elif idx > 0:
-                x0, y0 = self.segments[idx-1]['x'], self.segments[idx-1]['y']
-                x1, y1 = self.segments[idx]['x'], self.segments[idx]['y']
-                dx, dy = x1 - x0, y1 - y0
-            else:
-                dx, dy = 1, 0
-            length = math.hypot(dx, dy)
-            return -dy/length, dx/length  # Unit normal
-
-        arm_idx = 6
-        leg_idx = 16
-
-        # ARMS
-        arm_x, arm_y = self.segments[arm_idx]['x'], self.segments[arm_idx]['y']
-        nx, ny = normal_at(arm_idx)
-        for i, side in enumerate([-1, 1]):
-            dir_x, dir_y = nx*side, ny*side
-            upper_len = self.leg_length * 0.8
-            lower_len = self.leg_length * 0.7
-            # Walk cycle "wiggle":
-            wiggle = math.sin(self.leg_phase[i]) * 0.5
-            limb_angle = math.atan2(dir_y, dir_x) + wiggle
-            mid_x = arm_x + math.cos(limb_angle) * upper_len
-            mid_y = arm_y + math.sin(limb_angle) * upper_len
-            elbow_angle = limb_angle + 0.5 * side
-            foot_x = mid_x + math.cos(elbow_angle) * lower_len
-            foot_y = mid_y + math.sin(elbow_angle) * lower_len
-            pygame.draw.line(screen, bone_color, (arm_x, arm_y), (mid_x, mid_y), 7)
-            pygame.draw.line(screen, bone_color, (mid_x, mid_y), (foot_x, foot_y), 6)
-            for t in range(-2, 3):
-                toe_ang = elbow_angle + t * 0.18
-                toe_x = foot_x + math.cos(toe_ang) * 13
-                toe_y = foot_y + math.sin(toe_ang) * 13
-                pygame.draw.line(screen, bone_color, (foot_x, foot_y), (toe_x, toe_y), 2)
-
-        # LEGS
-        leg_x, leg_y = self.segments[leg_idx]['x'], self.segments[leg_idx]['y']
-        nx, ny = normal_at(leg_idx)
-        for i, side in enumerate([-1, 1]):
-            dir_x, dir_y = nx*side, ny*side
-            upper_len = self.leg_length
-            lower_len = self.leg_length * 0.9
-            wiggle = math.sin(self.leg_phase[2+i]) * 0.5
-            limb_angle = math.atan2(dir_y, dir_x) + wiggle
-            mid_x = leg_x + math.cos(limb_angle) * upper_len
-            mid_y = leg_y + math.sin(limb_angle) * upper_len
-            knee_angle = limb_angle + 0.5 * side
-            foot_x = mid_x + math.cos(knee_angle) * lower_len
-            foot_y = mid_y + math.sin(knee_angle) * lower_len
-            pygame.draw.line(screen, bone_color, (leg_x, leg_y), (mid_x, mid_y), 8)
-            pygame.draw.line(screen, bone_color, (mid_x, mid_y), (foot_x, foot_y), 7)
-            for t in range(-2, 3):
-                toe_ang = knee_angle + t * 0.18
-                toe_x = foot_x + math.cos(toe_ang) * 14
-                toe_y = foot_y + math.sin(toe_ang) * 14
-                pygame.draw.line(screen, bone_color, (foot_x, foot_y), (toe_x, toe_y), 2)
+            pygame.draw.line(screen, bone_color, base, (base[0] + rib_x * s, base[1] + rib_y * s), thin)
+
+        # === LIMBS: two-bone IK onto the gait's planted feet ===
+        gait = self.gait
+        for i, (idx, side, upper_len, lower_len, width, bend, toe_len, toe_angles) in enumerate(self.limbs):
+            hip_x, hip_y = self.segments[idx]['x'], self.segments[idx]['y']
+            nx, ny = self.normal_at(idx)
+            # bend: elbows point back, knees forward
+            mid_x, mid_y, foot_x, foot_y = two_bone_ik(hip_x, hip_y, gait.foot_x[i], gait.foot_y[i],
+                                                       upper_len * s, lower_len * s, -ny * bend, nx * bend)
+            pygame.draw.line(screen, bone_color, (hip_x, hip_y), (mid_x, mid_y), line_width(width, s))
+            pygame.draw.line(screen, bone_color, (mid_x, mid_y), (foot_x, foot_y), line_width(width - 1, s))
+            foot_angle = math.atan2(foot_y - mid_y, foot_x - mid_x)
+            for toe_offset in toe_angles:
+                toe_ang = foot_angle + toe_offset
+                toe_x = foot_x + math.cos(toe_ang) * toe_len * s
+                toe_y = foot_y + math.sin(toe_ang) * toe_len * s
+                pygame.draw.line(screen, bone_color, (foot_x, foot_y), (toe_x, toe_y), thin)
 
         # --- Head (big oval) ---
         head_size = self.head_base_size * (1.5 if self.head_grow else 1)
         pygame.draw.ellipse(screen, bone_color, (int(self.x-head_size*1.3), int(self.y-head_size*1.1), int(head_size*2.6), int(head_size*2.1)))
         # Eyes
-        pygame.draw.ellipse(screen, (0, 0, 0), (int(self.x-head_size*0.7), int(self.y-head_size*0.3), int(head_size*0.7), int(head_size*0.9)), 2)
-        pygame.draw.ellipse(screen, (0, 0, 0), (int(self.x+head_size*0.2), int(self.y-head_size*0.3), int(head_size*0.7), int(head_size*0.9)), 2)
+        pygame.draw.ellipse(screen, (0, 0, 0), (int(self.x-head_size*0.7), int(self.y-head_size*0.3), int(head_size*0.7), int(head_size*0.9)), thin)
+        pygame.draw.ellipse(screen, (0, 0, 0), (int(self.x+head_size*0.2), int(self.y-head_size*0.3), int(head_size*0.7), int(head_size*0.9)), thin)
 
 # Game Loop
-reptile = SkeletalReptile(WIDTH // 2, HEIGHT // 2)
-clock = pygame.time.Clock()
+reptile = SkeletalReptile(WIDTH // 2, HEIGHT // 2, view.scale)  # sized for the panel, not the canvas
+capture = profiler.from_env()  # REPTILE_PROFILE=frames profiles the start, F12 any time
+hot_path = alloc_audit.hot_path_from_env()  # REPTILE_HOT_PATH=1
+audit = alloc_audit.from_env()  # REPTILE_ALLOC_AUDIT=frames, or F10
+if soak is not None:
+    soak.watch("tail_wave_phase", lambda: reptile.tail_wave_phase, math.tau)
+    # The tail sway adds into segment y every frame; the body must not come apart over time
+    soak.watch("body_length", lambda: sum(math.hypot(a['x'] - b['x'], a['y'] - b['y'])
+                                          for a, b in zip(reptile.segments, reptile.segments[1:])),
+               reptile.segment_spacing * reptile.num_segments * 4)
+    soak.watch("x", lambda: reptile.x, WIDTH * 2)
+    soak.watch("y", lambda: reptile.y, HEIGHT * 2)
 
 running = True
 while running:
-    screen.fill((0, 0, 0))
-    mouse_pos = pygame.mouse.get_pos()
+    profiler.tag("events")
+    mouse_pos = view.mouse_pos() if soak is None else soak.cursor(WIDTH, HEIGHT)
 
     for event in pygame.event.get():
         if event.type == QUIT or (event.type == KEYDOWN and event.key == K_ESCAPE):
@@ -218,17 +269,68 @@ while running:
             if event.key == K_c:
                 color_index = (color_index + 1) % len(COLORS)
                 BONE_COLOR = COLORS[color_index]
+                layers.set_color(BONE_COLOR)
+                effects.set_color(BONE_COLOR)
             if event.key == K_UP:
-                reptile.speed = min(10, reptile.speed + 0.5)
+                reptile.speed = min(10 * reptile.scale, reptile.speed + 0.5 * reptile.scale)
             if event.key == K_DOWN:
-                reptile.speed = max(1, reptile.speed - 0.5)
-
+                reptile.speed = max(1 * reptile.scale, reptile.speed - 0.5 * reptile.scale)
+            if event.key == K_p:
+                print(pacer.report())
+                pacer.reset()
+            if event.key == K_F12 and capture is None:
+                capture = profiler.Capture()
+            if event.key == K_F10 and audit is None:
+                audit = alloc_audit.AllocationAudit()
+            if event.key in (K_LEFTBRACKET, K_RIGHTBRACKET):
+                old_width = WIDTH
+                screen = view.step(1 if event.key == K_LEFTBRACKET else -1)
+                WIDTH, HEIGHT = view.size
+                reptile.rescale(WIDTH / old_width)
+                layers.release(frame)
+                frame = layers.new((WIDTH, HEIGHT))
+                effects.clear()
+
+    profiler.tag("update")
+    metrics.begin_update()
     reptile.update(mouse_pos)
-    reptile.draw(screen, BONE_COLOR, mouse_pos)
-
-    pygame.display.flip()
-    clock.tick(60)
-
+    metrics.begin_draw()
+    drawing = soak is None or soak.draws()  # a soak only draws now and then
+    if drawing:
+        profiler.tag("draw")
+        frame.fill(palette.BG)
+        reptile.draw(frame, palette.BONE, mouse_pos)
+        screen.blit(frame, (0, 0))
+    profiler.tag("particles")
+    effects.update()
+    if drawing:
+        effects.draw(screen)
+
+    metrics.end_draw()
+    if drawing:
+        profiler.tag("flip")
+        view.present()
+    assets.poll()  # switch in whatever finished loading, between frames
+    if capture is not None and capture.frame():
+        capture = None
+    if audit is not None and audit.frame():
+        audit = None
+    if hot_path is not None:
+        hot_path.frame()
+    if soak is not None and soak.frame():
+        running = False
+    profiler.tag("pacing")
+    pacer.tick()
+    metrics.frame_done(pacer.last_interval)
+
+if capture is not None:
+    capture.finish()
+if audit is not None:
+    audit.finish()
+print(pacer.report())
+assets.close()
+if exporter is not None:
+    exporter.close()
 pygame.quit()
-sys.exit()
+sys.exit(soak.finish() if soak is not None else None)
 
@@ -0,0 +1,182 @@
+import bisect
+import math
+
+# Obstacle layer backed by a uniform grid.
+#
+# Every obstacle is registered in each cell its bounds (grown by MARGIN)
+# touch, so any query within MARGIN of a point only has to look at the one
+# cell that point falls in. Steering and push-out therefore cost
+# O(obstacles in that cell), no matter how many obstacles are on screen.
+
+CELL_SIZE = 64
+MARGIN = 48        # largest probe radius a query may use (lookahead + body)
+LOOKAHEAD = 30     # how far ahead of the head steering looks
+CLEARANCE = 24     # steering starts pushing this far from an obstacle
+
+
+class Circle:
+    def __init__(self, x, y, radius, owner=None):
+        self.x = x
+        self.y = y
+        self.radius = radius
+        self.owner = owner  # e.g. the reptile this circle belongs to, so it ignores itself
+
+    def bounds(self):
+        return (self.x - self.radius, self.y - self.radius, self.x + self.radius, self.y + self.radius)
+
+    def center(self):
+        return self.x, self.y
+
+    def separation(self, px, py):
+        # (distance from the surface, unit normal pointing away)
+        dx = px - self.x
+        dy = py - self.y
+        d = math.sqrt(dx * dx + dy * dy)
+        if d < 1e-9:
+            return -self.radius, 1.0, 0.0
+        return d - self.radius, dx / d, dy / d
+
+
+class Rect:
+    # Axis-aligned box, e.g. a UI panel
+    owner = None
+
+    def __init__(self, x, y, w, h):
+        self.left = x
+        self.top = y
+        self.right = x + w
+        self.bottom = y + h
+
+    def bounds(self):
+        return (self.left, self.top, self.right, self.bottom)
+
+    def center(self):
+        return (self.left + self.right) / 2, (self.top + self.bottom) / 2
+
+    def separation(self, px, py):
+        qx = min(max(px, self.left), self.right)
+        qy = min(max(py, self.top), self.bottom)
+        dx = px - qx
+        dy = py - qy
+        if dx or dy:
+            d = math.sqrt(dx * dx + dy * dy)
+            return d, dx / d, dy / d
+        # Inside: leave through the closest edge
+        exits = ((px - self.left, -1.0, 0.0), (self.right - px, 1.0, 0.0),
+                 (py - self.top, 0.0, -1.0), (self.bottom - py, 0.0, 1.0))
+        depth, nx, ny = min(exits)
+        return -depth, nx, ny
+
+
+def add_order(obstacle):
+    return obstacle.order
+
+
+class ObstacleGrid:
+    def __init__(self, width, height, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.cols = max(1, int(math.ceil(width / cell_size)))
+        self.rows = max(1, int(math.ceil(height / cell_size)))
+        self.cells = [[] for _ in range(self.cols * self.rows)]
+        self.obstacles = []
+        self.version = 0  # bumped on every change, for anything caching the layout
+        self.added = 0    # add() count; cells stay in add order, whatever moved since
+
+    def _cell_range(self, bounds):
+        x0, y0, x1, y1 = bounds
+        c0 = max(0, int((x0 - MARGIN) // self.cell_size))
+        c1 = min(self.cols - 1, int((x1 + MARGIN) // self.cell_size))
+        r0 = max(0, int((y0 - MARGIN) // self.cell_size))
+        r1 = min(self.rows - 1, int((y1 + MARGIN) // self.cell_size))
+        return c0, c1, r0, r1
+
+    def add(self, obstacle):
+        obstacle.order = self.added
+        self.added += 1
+        c0, c1, r0, r1 = self._cell_range(obstacle.bounds())
+        for row in range(r0, r1 + 1):
+            for col in range(c0, c1 + 1):
+                self.cells[row * self.cols + col].append(obstacle)
+        self.obstacles.append(obstacle)
+        self.version += 1
+        return obstacle
+
+    def remove(self, obstacle):
+        c0, c1, r0, r1 = self._cell_range(obstacle.bounds())
+        for row in range(r0, r1 + 1):
+            for col in range(c0, c1 + 1):
+                self.cells[row * self.cols + col].remove(obstacle)
+        self.obstacles.remove(obstacle)
+        self.version += 1
+
+    def move(self, obstacle, x, y):
+        # For moving obstacles (other reptiles): re-register only if the cells change.
+        # Push-out and steering depend on the order within a cell, so a moved
+        # obstacle goes back to its add-order place rather than to the end.
+        old = self._cell_range(obstacle.bounds())
+        obstacle.x = x
+        obstacle.y = y
+        new = self._cell_range(obstacle.bounds())
+        if new != old:
+            c0, c1, r0, r1 = old
+            for row in range(r0, r1 + 1):
+                for col in range(c0, c1 + 1):
+                    self.cells[row * self.cols + col].remove(obstacle)
+            c0, c1, r0, r1 = new
+            for row in range(r0, r1 + 1):
+                for col in range(c0, c1 + 1):
+                    bisect.insort(self.cells[row * self.cols + col], obstacle, key=add_order)
+
+    def clear(self):
+        for cell in self.cells:
+            cell.clear()
+        self.obstacles.clear()
+        self.version += 1
+
+    def near(self, x, y):
+        col = int(x // self.cell_size)
+        row = int(y // self.cell_size)
+        if 0 <= col < self.cols and 0 <= row < self.rows:
+            return self.cells[row * self.cols + col]
+        return ()
+
+    def blocked(self, x, y, radius=0):
+        for obstacle in self.near(x, y):
+            if obstacle.separation(x, y)[0] < radius:
+                return True
+        return False
+
+    def push_out(self, x, y, radius, owner=None):
+        # Move a circle of `radius` at (x, y) out of anything it overlaps
+        for obstacle in self.near(x, y):
+            if owner is not None and obstacle.owner is owner:
+                continue
+            gap, nx, ny = obstacle.separation(x, y)
+            if gap < radius:
+                x += nx * (radius - gap)
+                y += ny * (radius - gap)
+        return x, y
+
+    def steer(self, x, y, dir_x, dir_y, owner=None):
+        # Bend a unit heading away from obstacles near the lookahead point
+        px = x + dir_x * LOOKAHEAD
+        py = y + dir_y * LOOKAHEAD
+        steer_x, steer_y = dir_x, dir_y
+        for obstacle in self.near(px, py):
+            if owner is not None and obstacle.owner is owner:
+                continue
+            gap, nx, ny = obstacle.separation(px, py)
+            if gap < CLEARANCE:
+                weight = (CLEARANCE - gap) / CLEARANCE
+                # Turn along the surface rather than straight back, on the side
+                # away from the obstacle's center so the choice doesn't flip-flop
+                tx, ty = -ny, nx
+                cx, cy = obstacle.center()
+                if tx * (x - cx) + ty * (y - cy) < 0:
+                    tx, ty = -tx, -ty
+                steer_x += (nx + tx) * weight
+                steer_y += (ny + ty) * weight
+        length = math.sqrt(steer_x * steer_x + steer_y * steer_y)
+        if length < 1e-9:
+            return dir_x, dir_y
+        return steer_x / length, steer_y / length
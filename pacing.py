@@ -0,0 +1,207 @@
+import os
+import sys
+import time
+import pygame
+
+# Frame pacing.
+#
+#   sleep     clock.tick(fps): cheap, but the OS sleep is only good to a few ms
+#   busy      clock.tick_busy_loop(fps): sleeps most of the gap, spins the rest
+#   vsync     let flip() block on the display's refresh (needs a renderer,
+#             i.e. pygame.SCALED); falls back to busy if there is none
+#   uncapped  no waiting at all, for benchmarks
+#
+#   REPTILE_PACING=busy    pick the mode (default: sleep)
+#   REPTILE_FPS=144        target frame rate (default 60; `display` uses the refresh rate)
+#   python pacing.py       run every mode for a few seconds and compare
+#
+# Every tick records the frame interval and the change from the previous
+# interval (jitter) into fixed-width histograms, so modes can be compared
+# on the machine that is actually running them.
+
+MODES = ("sleep", "busy", "vsync", "uncapped")
+BUCKET_MS = 0.5
+BUCKETS = 100      # last bucket also counts everything above 50ms
+VSYNC_PROBE = 30   # frames after which vsync must have shown up in the intervals
+VSYNC_FLOOR_MS = 2.0  # with the refresh rate unknown: a flip that doesn't wait comes back about this fast
+
+
+def refresh_rate(default=60):
+    # Not every pygame exposes this (pygame-ce does)
+    try:
+        rates = pygame.display.get_desktop_refresh_rates()
+        if rates and rates[0] > 0:
+            return rates[0]
+    except (AttributeError, pygame.error):
+        pass
+    return default
+
+
+def fps_from_env(default=60):
+    # REPTILE_FPS=144, or REPTILE_FPS=display for the display's refresh rate
+    value = os.environ.get("REPTILE_FPS")
+    if not value:
+        return default
+    if value == "display":
+        return refresh_rate(default)
+    return int(value)
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.total = 0
+        self.peak = 0.0
+
+    def add(self, ms):
+        self.counts[min(BUCKETS - 1, int(ms / BUCKET_MS))] += 1
+        self.total += 1
+        if ms > self.peak:
+            self.peak = ms
+
+    def percentile(self, p):
+        if not self.total:
+            return 0.0
+        wanted = self.total * p / 100
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= wanted:
+                return (i + 1) * BUCKET_MS
+        return BUCKETS * BUCKET_MS
+
+    def reset(self):
+        self.counts = [0] * BUCKETS
+        self.total = 0
+        self.peak = 0.0
+
+
+class FramePacer:
+    def __init__(self, mode=None, fps=60):
+        if mode is None:
+            mode = os.environ.get("REPTILE_PACING", "sleep")
+        if mode not in MODES:
+            print(f"Unknown pacing mode '{mode}', using sleep")
+            mode = "sleep"
+        self.mode = mode
+        self.fps = fps
+        self.vsync = False  # whether flip() really waits for the display
+        self.refresh = None  # display refresh rate, when pygame can tell
+        self.clock = pygame.time.Clock()
+        self.intervals = Histogram()
+        self.jitter = Histogram()
+        self.last = None
+        self.last_interval = None
+        self.missed = 0
+
+    def set_mode(self, size, flags=0):
+        # Use instead of pygame.display.set_mode so vsync mode can ask for a renderer
+        if self.mode == "vsync":
+            self.refresh = refresh_rate(None)
+            try:
+                screen = pygame.display.set_mode(size, flags | pygame.SCALED, vsync=1)
+                self.vsync = True
+                return screen
+            except pygame.error:
+                print("vsync not available here, pacing with busy loop instead")
+                self.vsync = False
+        return pygame.display.set_mode(size, flags)
+
+    def tick(self):
+        # Call once per frame, right after flip(). Returns ms since the previous frame.
+        mode = self.mode
+        if mode == "sleep":
+            dt = self.clock.tick(self.fps)
+        elif mode == "busy" or (mode == "vsync" and not self.vsync):
+            dt = self.clock.tick_busy_loop(self.fps)
+        else:
+            dt = self.clock.tick()
+
+        now = time.perf_counter()
+        if self.last is not None:
+            interval = (now - self.last) * 1000
+            self.intervals.add(interval)
+            if self.last_interval is not None:
+                self.jitter.add(abs(interval - self.last_interval))
+            if mode != "uncapped" and self.fps and interval > 1500 / self.fps:
+                self.missed += 1
+            self.last_interval = interval
+            if self.vsync and self.intervals.total == VSYNC_PROBE:
+                # A renderer without a real vsync flips immediately; catch that.
+                # Judged against the display's refresh, not the target fps: a
+                # 144 Hz panel flips every 6.9ms whatever fps asked for.
+                floor = 500 / self.refresh if self.refresh else VSYNC_FLOOR_MS
+                if self.intervals.percentile(50) < floor:
+                    print("flip() does not wait for vsync here, pacing with busy loop instead")
+                    self.vsync = False
+        self.last = now
+        return dt
+
+    def pause(self):
+        # Skip the next interval, e.g. after blocking in event.wait
+        self.last = None
+        self.last_interval = None
+
+    def reset(self):
+        self.intervals.reset()
+        self.jitter.reset()
+        self.missed = 0
+        self.pause()
+
+    def report(self):
+        frames = self.intervals
+        jitter = self.jitter
+        mode = self.mode if self.mode != "vsync" or self.vsync else "vsync->busy"
+        mean = sum((i + 0.5) * BUCKET_MS * c for i, c in enumerate(frames.counts)) / max(1, frames.total)
+        return (f"{mode:<11} target={self.fps}fps frames={frames.total} "
+                f"interval p50={frames.percentile(50):.1f}ms p99={frames.percentile(99):.1f}ms "
+                f"max={frames.peak:.1f}ms ~{1000 / max(mean, 1e-3):.0f}fps | "
+                f"jitter p50={jitter.percentile(50):.1f}ms p99={jitter.percentile(99):.1f}ms "
+                f"max={jitter.peak:.1f}ms | missed={self.missed}")
+
+    def histogram_lines(self, width=40):
+        # Text histogram of frame intervals, only the populated range
+        counts = self.intervals.counts
+        used = [i for i, c in enumerate(counts) if c]
+        if not used:
+            return []
+        top = max(counts)
+        lines = []
+        for i in range(used[0], used[-1] + 1):
+            bar = "#" * (counts[i] * width // top)
+            lines.append(f"{i * BUCKET_MS:5.1f}ms {counts[i]:6d} {bar}")
+        return lines
+
+
+def compare(seconds=3.0, fps=None):
+    # Draw a moving bar in a small window under every mode and print the results
+    pygame.init()
+    if fps is None:
+        fps = refresh_rate()
+    results = []
+    for mode in MODES:
+        pacer = FramePacer(mode, fps)
+        screen = pacer.set_mode((640, 360))
+        pygame.display.set_caption(f"pacing: {mode}")
+        start = time.perf_counter()
+        x = 0
+        while time.perf_counter() - start < seconds:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    pygame.quit()
+                    return
+            screen.fill((0, 0, 0))
+            x = (x + 4) % 640
+            pygame.draw.rect(screen, (200, 200, 200), (x, 0, 8, 360))
+            pygame.display.flip()
+            pacer.tick()
+        results.append(pacer)
+        pygame.display.quit()
+        pygame.display.init()
+    for pacer in results:
+        print(pacer.report())
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    compare(float(sys.argv[1]) if len(sys.argv) > 1 else 3.0)
@@ -0,0 +1,76 @@
+import pygame
+
+# Palette slots shared by every indexed (8-bit) surface.
+# Geometry is drawn with these indices instead of RGB colors, so changing
+# the color only rewrites the 256-entry palette and never touches pixels.
+BG = 0
+BONE = 1
+SHADE = 2
+GLOW_FIRST = 16
+GLOW_LEVELS = 256 - GLOW_FIRST
+
+
+def shade(color, amount=100):
+    return tuple(max(0, c - amount) for c in color)
+
+
+def build_palette(color):
+    colors = [(0, 0, 0)] * 256
+    colors[BONE] = tuple(color[:3])
+    colors[SHADE] = shade(color[:3])
+    # Glow ramp: black -> full bone color
+    for i in range(GLOW_LEVELS):
+        k = (i + 1) / GLOW_LEVELS
+        colors[GLOW_FIRST + i] = tuple(int(c * k) for c in color[:3])
+    return colors
+
+
+def glow_level(strength):
+    # strength 0..1 -> palette index on the glow ramp
+    strength = max(0.0, min(1.0, strength))
+    return GLOW_FIRST + int(strength * (GLOW_LEVELS - 1))
+
+
+class IndexedLayers:
+    def __init__(self, color):
+        self.color = tuple(color[:3])
+        self.colors = build_palette(self.color)
+        self.surfaces = []
+
+    def new(self, size, colorkey=None):
+        surface = pygame.Surface(size, depth=8)
+        surface.set_palette(self.colors)
+        if colorkey is not None:
+            surface.set_colorkey(colorkey)
+        self.surfaces.append(surface)
+        return surface
+
+    def adopt(self, surface):
+        # Take over an indexed surface drawn elsewhere (e.g. on a loader thread)
+        surface.set_palette(self.colors)
+        self.surfaces.append(surface)
+        return surface
+
+    def release(self, surface):
+        self.surfaces.remove(surface)
+
+    def glow_sprite(self, radius, strength=0.35):
+        # Radial gradient, brightest in the middle. Drawn once, recolored for free.
+        sprite = self.new((radius * 2, radius * 2), colorkey=BG)
+        sprite.fill(BG)
+        for r in range(radius, 0, -1):
+            falloff = 1 - r / radius
+            index = glow_level(falloff * falloff * strength)
+            if index > GLOW_FIRST:  # keep the faint rim transparent
+                pygame.draw.circle(sprite, index, (radius, radius), r)
+        return sprite
+
+    def set_color(self, color):
+        color = tuple(color[:3])
+        if color == self.color:
+            return
+        self.color = color
+        self.colors = build_palette(color)
+        # All layers must share the exact same palette so 8-bit -> 8-bit blits stay raw copies
+        for surface in self.surfaces:
+            surface.set_palette(self.colors)
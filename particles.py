@@ -0,0 +1,176 @@
+import math
+import sys
+import time
+from itertools import repeat
+import numpy as np
+import pygame
+
+# Pooled particle system.
+#
+# Every particle lives in preallocated NumPy arrays (position, velocity,
+# life, ...), so emitting and dying never allocate Python objects. Live
+# particles are kept packed in slots [0, count): emit() appends after the
+# last one and update() fills the holes dead ones leave with live ones from
+# the end (swap-remove), so integration and drawing only ever touch
+# [:count], whatever the capacity. Integration is a handful of array
+# operations, and drawing is one Surface.blits() call over sprites that
+# were rendered once per kind and fade level. Sprites are opaque and added
+# onto the frame (BLEND_RGB_ADD): black adds nothing, so no per-pixel alpha
+# is needed.
+#
+# Drawing is the limit, at about 1us per live particle, where update()
+# costs under 0.1us. Splatting every disc into one brightness image
+# (np.bincount, then a single blit) was measured at the same cost per
+# covered pixel, and np.add.at at twice that. So the default pool holds
+# MAX_PARTICLES = 3000, which draws in 2-3ms on the reference machine;
+# emit() drops what doesn't fit, and new.py's footfalls and touch bursts
+# stay well inside it. Bigger pools work, at that cost per particle.
+#
+#   python particles.py 30000    keep 30000 particles alive and time it
+
+MAX_PARTICLES = 3000
+FADE_LEVELS = 8
+
+# Kinds: (radius, brightness at full life 0..255, speed damping per frame)
+DUST = 0
+SPARK = 1
+KINDS = {
+    DUST: (3, 120, 0.90),
+    SPARK: (2, 255, 0.95),
+}
+
+
+class ParticleSystem:
+    def __init__(self, capacity=MAX_PARTICLES, color=(180, 180, 180)):
+        self.capacity = capacity
+        self.count = 0  # live particles, in slots [0, count)
+        self.pos = np.zeros((capacity, 2), np.float32)
+        self.vel = np.zeros((capacity, 2), np.float32)
+        self.damping = np.ones((capacity, 2), np.float32)  # per axis, so update() needs no broadcasting
+        self.life = np.zeros(capacity, np.float32)   # frames left
+        self.span = np.ones(capacity, np.float32)    # frames at birth, for fading
+        self.kind = np.zeros(capacity, np.int32)
+        # Scratch for update(), so stepping the pool allocates no arrays
+        self.step = np.zeros((capacity, 2), np.float32)
+        self.decay = np.zeros((capacity, 2), np.float32)
+        self.dead = np.zeros(capacity, bool)
+        self.radii = np.array([KINDS[k][0] for k in sorted(KINDS)], np.int32)
+        self.sprites = []
+        self.set_color(color)
+
+    def set_color(self, color):
+        # One sprite per (kind, fade level), indexed kind * FADE_LEVELS + level
+        self.sprites = []
+        for kind in sorted(KINDS):
+            radius, brightness, _ = KINDS[kind]
+            for level in range(FADE_LEVELS):
+                sprite = pygame.Surface((radius * 2, radius * 2))
+                a = brightness * (level + 1) // FADE_LEVELS
+                pygame.draw.circle(sprite, [c * a // 255 for c in color], (radius, radius), radius)
+                if pygame.display.get_surface() is not None:
+                    sprite = sprite.convert()  # match the frame's pixel format once, not per blit
+                self.sprites.append(sprite)
+
+    def emit(self, x, y, count, kind=DUST, speed=1.5, life=30, direction=None, spread=math.pi * 2):
+        # Spawn up to `count` particles at (x, y); with a direction they fan out
+        # `spread` radians around it. Returns how many were actually spawned.
+        count = min(count, self.capacity - self.count)
+        if count <= 0:
+            return 0
+        slots = slice(self.count, self.count + count)
+        self.count += count
+
+        if direction is None:
+            angles = np.random.uniform(0, math.pi * 2, count)
+        else:
+            angles = direction + np.random.uniform(-spread / 2, spread / 2, count)
+        speeds = speed * np.random.uniform(0.3, 1.0, count)
+        self.pos[slots, 0] = x
+        self.pos[slots, 1] = y
+        self.vel[slots, 0] = np.cos(angles) * speeds
+        self.vel[slots, 1] = np.sin(angles) * speeds
+        self.damping[slots] = KINDS[kind][2]
+        spans = life * np.random.uniform(0.6, 1.0, count)
+        self.life[slots] = spans
+        self.span[slots] = spans
+        self.kind[slots] = kind
+        return count
+
+    def update(self, dt=1.0):
+        # Advance the live range, then swap-remove the ones that died
+        n = self.count
+        if not n:
+            return
+        pos, vel, step, decay, dead = self.pos[:n], self.vel[:n], self.step[:n], self.decay[:n], self.dead[:n]
+        np.multiply(vel, dt, out=step)
+        pos += step
+        np.power(self.damping[:n], dt, out=decay)
+        vel *= decay
+        life = self.life[:n]
+        life -= dt
+        np.less_equal(life, 0, out=dead)
+        died = np.count_nonzero(dead)
+        if not died:
+            return
+        # Holes below the new end are filled from the live ones above it
+        keep = n - died
+        holes = np.flatnonzero(dead[:keep])
+        if len(holes):
+            movers = np.flatnonzero(~dead[keep:]) + keep
+            for array in (self.pos, self.vel, self.damping, self.life, self.span, self.kind):
+                array[holes] = array[movers]
+        self.count = keep
+
+    def draw(self, surface):
+        n = self.count
+        if not n:
+            return
+        kind = self.kind[:n]
+        level = (self.life[:n] * FADE_LEVELS / self.span[:n]).astype(np.int32)
+        np.clip(level, 0, FADE_LEVELS - 1, out=level)
+        keys = (kind * FADE_LEVELS + level).tolist()
+        # Sprites are centered on the particle; all kinds are small, offset by their radius
+        corner = self.pos[:n].astype(np.int32)
+        corner -= self.radii[kind][:, None]
+        # Built with zip/map so no Python code runs per particle
+        surface.blits(zip(map(self.sprites.__getitem__, keys), corner.tolist(),
+                          repeat(None), repeat(pygame.BLEND_RGB_ADD)), False)
+
+    def clear(self):
+        self.count = 0
+
+
+def benchmark(target=30000, frames=300):
+    pygame.init()
+    screen = pygame.display.set_mode((1280, 720))
+    system = ParticleSystem(max(MAX_PARTICLES, target))
+    update_ms = draw_ms = 0.0
+    measured = 0
+    for frame in range(frames):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                frames = frame
+        # Top up to the target, in bursts spread over the screen
+        while system.count < target:
+            system.emit(np.random.uniform(0, 1280), np.random.uniform(0, 720), 200,
+                        kind=frame % 2, speed=3, life=60)
+        screen.fill((0, 0, 0))
+        t0 = time.perf_counter()
+        system.update()
+        t1 = time.perf_counter()
+        system.draw(screen)
+        t2 = time.perf_counter()
+        pygame.display.flip()
+        if frame >= 30:  # skip warm-up
+            update_ms += (t1 - t0) * 1000
+            draw_ms += (t2 - t1) * 1000
+            measured += 1
+    measured = max(1, measured)
+    print(f"{system.count} live particles: update {update_ms / measured:.2f}ms, "
+          f"draw {draw_ms / measured:.2f}ms per frame "
+          f"({draw_ms / measured * 1000 / max(1, system.count):.2f}us per particle)")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 30000)
@@ -0,0 +1,145 @@
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+
+# On-demand profiling of the main loop.
+#
+# A Capture records the next N frames and then writes
+#
+#   <prefix>.pstats      open with `python -m pstats` or snakeviz
+#   <prefix>.collapsed   collapsed stacks for flamegraph.pl / speedscope
+#
+# The default "sample" mode runs a background thread that looks at the
+# main thread's stack every few milliseconds; the main thread itself does
+# nothing extra, so it is cheap enough to trigger on a live kiosk.
+# "cprofile" mode instruments every call instead: exact counts, much
+# more overhead, pstats output only.
+#
+# The game loop marks which subsystem it is in with tag("update") etc.
+# (one global assignment, free when nothing is capturing); every sample is
+# filed under the tag that was current, so the flamegraph's first level
+# is the subsystem.
+
+DEFAULT_FRAMES = 300
+SAMPLE_INTERVAL = 0.002  # seconds
+MODES = ("sample", "cprofile")
+
+current = "other"
+
+
+def tag(name):
+    global current
+    current = name
+
+
+class SampleStats:
+    # Samples shaped like a finished cProfile run, so pstats can load and dump them
+    def __init__(self, samples, interval):
+        self.samples = samples
+        self.interval = interval
+        self.stats = {}
+
+    def create_stats(self):
+        stats = {}
+        for (_, stack), count in self.samples.items():
+            seconds = count * self.interval
+            seen = set()
+            for depth, func in enumerate(stack):
+                cc, nc, tt, ct, callers = stats.get(func, (0, 0, 0.0, 0.0, {}))
+                if func not in seen:  # recursion counts once per sample
+                    ct += seconds
+                    nc += count
+                    cc += count
+                    seen.add(func)
+                if depth == len(stack) - 1:
+                    tt += seconds
+                if depth > 0:
+                    caller = stack[depth - 1]
+                    c = callers.get(caller, (0, 0, 0.0, 0.0))
+                    callers[caller] = (c[0] + count, c[1] + count, c[2], c[3] + seconds)
+                stats[func] = (cc, nc, tt, ct, callers)
+        self.stats = stats
+
+
+class Capture:
+    def __init__(self, frames=DEFAULT_FRAMES, mode=None, prefix=None, interval=SAMPLE_INTERVAL):
+        mode = mode or os.environ.get("REPTILE_PROFILE_MODE", "sample")
+        if mode not in MODES:
+            raise ValueError(f"unknown profile mode '{mode}'")
+        self.frames = frames
+        self.mode = mode
+        self.prefix = prefix or time.strftime("profile-%Y%m%d-%H%M%S")
+        self.interval = interval
+        self.samples = {}  # (tag, stack) -> count; stack is outermost first
+        self.tags = {}
+        self.count = 0
+        self.started = time.perf_counter()
+        self.done = threading.Event()
+        if mode == "sample":
+            self.main_id = threading.get_ident()
+            self.thread = threading.Thread(target=self.run, name="profiler", daemon=True)
+            self.thread.start()
+        else:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        print(f"Profiling {frames} frames ({mode})...")
+
+    def run(self):
+        main_id = self.main_id
+        samples = self.samples
+        tags = self.tags
+        code_keys = {}
+        while not self.done.wait(self.interval):
+            frame = sys._current_frames().get(main_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                key = code_keys.get(code)
+                if key is None:
+                    key = code_keys[code] = (code.co_filename, code.co_firstlineno, code.co_name)
+                stack.append(key)
+                frame = frame.f_back
+            stack.reverse()
+            sample = (current, tuple(stack))
+            samples[sample] = samples.get(sample, 0) + 1
+            tags[current] = tags.get(current, 0) + 1
+
+    def frame(self):
+        # Call once per frame; returns True when the capture has been written
+        self.count += 1
+        if self.count < self.frames:
+            return False
+        self.finish()
+        return True
+
+    def finish(self):
+        elapsed = time.perf_counter() - self.started
+        if self.mode == "sample":
+            self.done.set()
+            self.thread.join()
+            stats = pstats.Stats(SampleStats(self.samples, self.interval))
+            stats.dump_stats(self.prefix + ".pstats")
+            with open(self.prefix + ".collapsed", "w") as f:
+                for (name, stack), count in sorted(self.samples.items(), key=lambda item: -item[1]):
+                    names = [name] + [f"{func} ({os.path.basename(path)}:{line})" for path, line, func in stack]
+                    f.write(";".join(names) + f" {count}\n")
+            total = max(1, sum(self.tags.values()))
+            split = ", ".join(f"{name} {count * 100 / total:.0f}%"
+                              for name, count in sorted(self.tags.items(), key=lambda item: -item[1]))
+            print(f"Wrote {self.prefix}.pstats and {self.prefix}.collapsed: "
+                  f"{self.count} frames in {elapsed:.1f}s, {total} samples ({split})")
+        else:
+            self.profile.disable()
+            self.profile.dump_stats(self.prefix + ".pstats")
+            print(f"Wrote {self.prefix}.pstats: {self.count} frames in {elapsed:.1f}s")
+
+
+def from_env():
+    # REPTILE_PROFILE=300 captures the first 300 frames, REPTILE_PROFILE_MODE picks the mode
+    frames = os.environ.get("REPTILE_PROFILE")
+    if not frames:
+        return None
+    return Capture(int(frames))
@@ -0,0 +1,84 @@
+import os
+import pygame
+
+# Internal render resolution. The scene is drawn into a canvas that is
+# `scale` times the panel size and presented either through pygame.SCALED
+# (the GPU stretches it) or, where no renderer is available, with a single
+# scale blit. Fill-rate cost then follows the canvas, not the panel.
+#
+#   REPTILE_RENDER_SCALE=0.5   draw at half resolution
+#   REPTILE_SCALE_MODE=blit    force the software present path
+
+SCALE_STEPS = [1.0, 0.75, 0.5, 0.33, 0.25]
+
+
+class RenderScale:
+    def __init__(self, scale=None, hardware=None, pacer=None):
+        if scale is None:
+            scale = float(os.environ.get("REPTILE_RENDER_SCALE", "1.0"))
+        if hardware is None:
+            hardware = os.environ.get("REPTILE_SCALE_MODE", "scaled") != "blit"
+        info = pygame.display.Info()
+        self.native_size = (info.current_w, info.current_h)
+        self.scale = max(0.1, min(1.0, scale))
+        self.hardware = hardware
+        self.pacer = pacer  # FramePacer, so vsync pacing gets its renderer
+        self.screen = None
+        self.canvas = None
+
+    def _set_mode(self, size, flags):
+        if self.pacer is not None:
+            return self.pacer.set_mode(size, flags)
+        return pygame.display.set_mode(size, flags)
+
+    @property
+    def size(self):
+        return self.canvas.get_size()
+
+    def open(self):
+        w = max(1, int(self.native_size[0] * self.scale))
+        h = max(1, int(self.native_size[1] * self.scale))
+        if self.scale >= 1.0:
+            self.screen = self._set_mode((0, 0), pygame.FULLSCREEN)
+            self.canvas = self.screen
+            return self.canvas
+
+        if self.hardware:
+            try:
+                # pygame maps mouse coordinates into the canvas for us here
+                self.screen = self._set_mode((w, h), pygame.FULLSCREEN | pygame.SCALED)
+                self.canvas = self.screen
+                return self.canvas
+            except pygame.error:
+                self.hardware = False
+
+        self.screen = self._set_mode((0, 0), pygame.FULLSCREEN)
+        self.canvas = pygame.Surface((w, h)).convert()
+        return self.canvas
+
+    def set_scale(self, scale):
+        self.scale = max(0.1, min(1.0, scale))
+        return self.open()
+
+    def step(self, direction):
+        # Move to the next coarser (+1) or finer (-1) preset
+        steps = SCALE_STEPS
+        idx = min(range(len(steps)), key=lambda i: abs(steps[i] - self.scale))
+        idx = max(0, min(len(steps) - 1, idx + direction))
+        return self.set_scale(steps[idx])
+
+    def to_canvas(self, pos):
+        # Window (panel) coordinates -> canvas coordinates
+        if self.canvas is self.screen:
+            return pos
+        sw, sh = self.screen.get_size()
+        cw, ch = self.canvas.get_size()
+        return (pos[0] * cw // sw, pos[1] * ch // sh)
+
+    def mouse_pos(self):
+        return self.to_canvas(pygame.mouse.get_pos())
+
+    def present(self):
+        if self.canvas is not self.screen:
+            pygame.transform.scale(self.canvas, self.screen.get_size(), self.screen)
+        pygame.display.flip()
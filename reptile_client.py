@@ -0,0 +1,180 @@
+import argparse
+import asyncio
+import math
+import time
+
+from reptile_server import DEFAULT_PORT, INPUT, QUANT, TICK_HZ, KEYFRAME_INTERVAL, decode_snapshot, serve
+
+# Clients for reptile_server.py
+#
+#   python reptile_client.py steer           steer a reptile with the mouse and watch everyone
+#   python reptile_client.py load --local    load generator over loopback (starts its own server)
+
+
+class Sender(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.transport = None
+        self.seq = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def send(self, x, y):
+        self.seq += 1
+        self.transport.sendto(INPUT.pack(b'I', self.seq, x, y, time.perf_counter()))
+
+    def close(self):
+        self.transport.sendto(b'B')
+        self.transport.close()
+
+
+class Viewer(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.transport = None
+        self.states = {}
+        self.last_echo = {}
+        self.latencies = []
+        self.packets = 0
+        self.updates = 0
+        self.bytes_in = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+        transport.sendto(b'V')
+
+    def datagram_received(self, data, addr):
+        if data[:1] != b'S':
+            return
+        now = time.perf_counter()
+        tick, updated = decode_snapshot(data, self.states)
+        self.packets += 1
+        self.bytes_in += len(data)
+        self.updates += len(updated)
+        for reptile_id in updated:
+            echo = self.states[reptile_id][1]
+            # Only the first snapshot carrying a given input counts for latency
+            if echo and self.last_echo.get(reptile_id) != echo:
+                self.last_echo[reptile_id] = echo
+                self.latencies.append(now - echo)
+        # Forget reptiles whose removal notice we may have missed
+        for reptile_id in [i for i, s in self.states.items() if tick - s[0] > KEYFRAME_INTERVAL * 2]:
+            del self.states[reptile_id]
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+async def run_load(args):
+    loop = asyncio.get_running_loop()
+    server_task = None
+    if args.local:
+        started = loop.create_future()
+        server_task = asyncio.create_task(serve(args.host, args.port, args.tick, report=0, started=started))
+        await started
+
+    addr = (args.host, args.port)
+    senders = []
+    for _ in range(args.clients):
+        _, sender = await loop.create_datagram_endpoint(Sender, remote_addr=addr)
+        senders.append(sender)
+    viewer_transport, viewer = await loop.create_datagram_endpoint(Viewer, remote_addr=addr)
+
+    # Every synthetic client draws its own circle around the screen
+    period = 1.0 / args.rate
+    start = loop.time()
+    next_send = start
+    sent = 0
+    report_at = start + args.report
+    window_start = start
+    window_sent = 0
+    while loop.time() - start < args.duration:
+        t = loop.time() - start
+        for i, sender in enumerate(senders):
+            a = t * 1.5 + i * 2 * math.pi / len(senders)
+            sender.send(400 + math.cos(a) * (150 + i % 7 * 20), 300 + math.sin(a * 1.3) * 200)
+        sent += len(senders)
+        window_sent += len(senders)
+        next_send += period
+        now = loop.time()
+        if now >= report_at:
+            elapsed = now - window_start
+            print(f"  {t:5.1f}s  inputs/s={window_sent / elapsed:.0f}  "
+                  f"snapshot updates/s={viewer.updates / elapsed:.0f}  "
+                  f"in={viewer.bytes_in / elapsed / 1024:.1f} KiB/s  "
+                  f"latency p50={percentile(viewer.latencies, 50) * 1000:.2f}ms "
+                  f"p99={percentile(viewer.latencies, 99) * 1000:.2f}ms")
+            window_start, window_sent = now, 0
+            viewer.updates = viewer.bytes_in = 0
+            viewer.transport.sendto(b'V')  # re-register in case the first one was lost
+            report_at += args.report
+        await asyncio.sleep(max(0.0, next_send - loop.time()))
+
+    elapsed = loop.time() - start
+    latencies = viewer.latencies
+    print(f"clients={args.clients} rate={args.rate}Hz duration={elapsed:.1f}s")
+    print(f"inputs sent: {sent} ({sent / elapsed:.0f}/s), reptiles tracked by viewer: {len(viewer.states)}")
+    print(f"latency input->snapshot: mean={sum(latencies) / max(1, len(latencies)) * 1000:.2f}ms "
+          f"p50={percentile(latencies, 50) * 1000:.2f}ms p99={percentile(latencies, 99) * 1000:.2f}ms "
+          f"max={max(latencies, default=0) * 1000:.2f}ms (n={len(latencies)})")
+
+    for sender in senders:
+        sender.close()
+    viewer_transport.sendto(b'B')
+    viewer_transport.close()
+    if server_task is not None:
+        server_task.cancel()
+
+
+async def run_steer(args):
+    import pygame
+    from reptile_cursor import WIDTH, HEIGHT, BONE_COLOR, BLACK
+
+    loop = asyncio.get_running_loop()
+    addr = (args.host, args.port)
+    _, sender = await loop.create_datagram_endpoint(Sender, remote_addr=addr)
+    viewer_transport, viewer = await loop.create_datagram_endpoint(Viewer, remote_addr=addr)
+
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Skeletal Reptile - shared display")
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                running = False
+        sender.send(*pygame.mouse.get_pos())
+
+        screen.fill(BLACK)
+        for _, _, points in viewer.states.values():
+            pts = [(points[i] // QUANT, points[i + 1] // QUANT) for i in range(0, len(points), 2)]
+            pygame.draw.lines(screen, BONE_COLOR, False, pts, 2)
+            pygame.draw.circle(screen, BONE_COLOR, pts[0], 8)
+        pygame.display.flip()
+        await asyncio.sleep(1 / 60)
+
+    sender.close()
+    viewer_transport.sendto(b'B')
+    viewer_transport.close()
+    pygame.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reptile server clients")
+    parser.add_argument('mode', choices=['steer', 'load'])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--clients', type=int, default=20, help="load: number of simulated clients")
+    parser.add_argument('--rate', type=float, default=60, help="load: inputs per second per client")
+    parser.add_argument('--duration', type=float, default=10, help="load: seconds to run")
+    parser.add_argument('--report', type=float, default=2, help="load: seconds between progress lines")
+    parser.add_argument('--local', action='store_true', help="load: start a server in this process")
+    parser.add_argument('--tick', type=int, default=TICK_HZ, help="tick rate for --local")
+    args = parser.parse_args()
+    asyncio.run(run_load(args) if args.mode == 'load' else run_steer(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,48 @@
 import pygame
 import sys
 import math
+import random
+import argparse
+import snapshot
+import kernels
+import species
+import obstacles
+import profiler
+import alloc_audit
+from culling import Viewport, CullGrid
+from flowfield import FlowField
+from pacing import FramePacer, MODES, fps_from_env
+from shm_output import SharedFrameOutput, DEFAULT_NAME
+from text_cache import TextPanel
+from metrics import Metrics, export_from_env
+from soak import soak_from_env
 from pygame.locals import *
 
 # Initialize pygame
 pygame.init()
 
-# Set up the display
+# Display size (the window itself is opened in main() so the reptile
+# can also be imported and simulated without a display)
 WIDTH, HEIGHT = 800, 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Skeletal Reptile Cursor")
+
+# Rolling history for rewind (hold R), about 10 seconds at 60 FPS
+HISTORY_FRAMES = 600
+SAVE_FILE = "reptile_state.bin"
 
 # Colors
 BLACK = (0, 0, 0)
 BONE_COLOR = (180, 180, 180)
 WHITE = (255, 255, 255)
+OBSTACLE_COLOR = (70, 70, 90)
+
+# Walls drawn with the right mouse button are chains of circles this big
+WALL_RADIUS = 10
+
+# Body layout, compiled once and shared by every reptile (see species.py)
+BODY = species.compile_spec(species.CENTIPEDE)
 
 class SkeletalReptile:
-    def __init__(self, x, y):
+    def __init__(self, x, y, buffer=None, body=BODY):
         self.x = x
         self.y = y
         self.target_x = x
@@ -26,38 +51,95 @@ class SkeletalReptile:
         self.max_speed = 8
         self.movement_lag = 15
         
-        # Spine segments
-        self.num_segments = 30
-        self.segments = []
-        self.segment_spacing = 10
-        self.segment_size = 5
+        # Spine segments and leg pairs
+        self.body = body
+        self.num_segments = body.segments
+        self.segment_spacing = body.spacing
+        self.leg_count = body.limb_count
+        
+        # All numeric state lives in one flat buffer (see snapshot.py); the
+        # per-segment and per-leg arrays are float64 views onto it
+        size = snapshot.state_size(self.num_segments, self.leg_count)
+        self.state = bytearray(size) if buffer is None else buffer
+        snapshot.init_header(self.state, self.num_segments, self.leg_count)
+        (self.seg_x, self.seg_y, self.seg_size,
+         self.leg_angles, self.leg_animation_speeds) = snapshot.state_views(self.state, self.num_segments, self.leg_count)
+        self.wrap_kernel_state()
+        
+        # Leg layout and a scratch buffer for the leg points draw() computes (see kernels.py)
+        self.leg_tables = kernels.leg_tables(body)
+        self.leg_stride = 2 * (3 + len(body.toe_angles[0])) if body.limb_count else 0
+        self.leg_points = kernels.buffer(2 * self.leg_count * self.leg_stride)
         
         # Initialize spine segments
         for i in range(self.num_segments):
-            self.segments.append({
-                'x': x - i * self.segment_spacing,
-                'y': y,
-                'size': self.segment_size - min(2, i * 0.08)  # Segments get smaller toward tail
-            })
-        
-        # Leg properties
-        self.leg_count = 10
-        self.leg_length = 20
-        self.leg_angles = []
-        self.leg_animation_speeds = []
+            self.seg_x[i] = x - i * self.segment_spacing
+            self.seg_y[i] = y
+            self.seg_size[i] = body.sizes[i]  # Segments get smaller toward tail
         
         # Initialize leg animation values
         for i in range(self.leg_count):
             # Alternate initial angles for walking effect
-            angle = 0.6 if i % 2 == 0 else -0.6
-            self.leg_angles.append(angle)
+            self.leg_angles[i] = 0.6 if i % 2 == 0 else -0.6
             # Vary animation speed slightly for each leg
-            self.leg_animation_speeds.append(0.12 + (i * 0.005))
+            self.leg_animation_speeds[i] = 0.12 + (i * 0.005)
         
         # Head properties
         self.head_size = 8
         self.eye_size = 2
         
+        # Optional ObstacleGrid to steer around and stay out of
+        self.obstacles = None
+        # Optional shared FlowField to follow around obstacles (swarms)
+        self.flow = None
+        
+        # Screen-space box around everything draw() touches (see culling.py);
+        # legs and the skull stick out this far past the spine points
+        self.draw_reach = max(body.limb_reach + 5, self.head_size * 2)
+        self.measure_bounds()
+    
+    def measure_bounds(self):
+        left = min(self.x, min(self.seg_x))
+        right = max(self.x, max(self.seg_x))
+        top = min(self.y, min(self.seg_y))
+        bottom = max(self.y, max(self.seg_y))
+        pad = self.draw_reach
+        self.bounds = (left - pad, top - pad, right + pad, bottom + pad)
+    
+    def snapshot(self):
+        # Versioned binary copy of the full state
+        snapshot.store_scalars(self)
+        return bytes(self.state)
+    
+    def restore(self, blob):
+        # Copies straight into the existing buffer, the array views stay valid
+        snapshot.check(blob, self.num_segments, self.leg_count)
+        self.state[:] = blob
+        snapshot.load_scalars(self)
+        self.measure_bounds()
+    
+    @classmethod
+    def from_snapshot(cls, blob):
+        reptile = cls(0, 0)
+        reptile.restore(blob)
+        return reptile
+    
+    def attach(self, buffer):
+        # Take over state that already lives in `buffer` (e.g. shared memory)
+        # instead of the reptile's own
+        snapshot.check(buffer, self.num_segments, self.leg_count)
+        self.state = buffer
+        (self.seg_x, self.seg_y, self.seg_size,
+         self.leg_angles, self.leg_animation_speeds) = snapshot.state_views(self.state, self.num_segments, self.leg_count)
+        self.wrap_kernel_state()
+        snapshot.load_scalars(self)
+        self.measure_bounds()
+    
+    def wrap_kernel_state(self):
+        # seg_x, seg_y, leg_angles, leg_animation_speeds as the kernels take them
+        self.kernel_state = (kernels.array(self.seg_x), kernels.array(self.seg_y),
+                             kernels.array(self.leg_angles), kernels.array(self.leg_animation_speeds))
+        
     def update(self, mouse_pos):
         # Calculate direction to mouse
         dx = mouse_pos[0] - self.x
@@ -80,132 +162,122 @@ class SkeletalReptile:
         distance_to_target = max(1, math.sqrt(dx * dx + dy * dy))
         
         if distance_to_target > 1:
-            self.x += (dx / distance_to_target) * current_speed
-            self.y += (dy / distance_to_target) * current_speed
+            dir_x = dx / distance_to_target
+            dir_y = dy / distance_to_target
+            if self.flow is not None:
+                # Follow the field where it disagrees with the straight line
+                # (i.e. something is in the way), otherwise keep the smooth heading
+                flow_dir = self.flow.direction(self.x, self.y)
+                if flow_dir is not None and flow_dir[0] * dir_x + flow_dir[1] * dir_y < 0.7:
+                    dir_x, dir_y = flow_dir
+            if self.obstacles is not None:
+                dir_x, dir_y = self.obstacles.steer(self.x, self.y, dir_x, dir_y, self)
+            self.x += dir_x * current_speed
+            self.y += dir_y * current_speed
+        
+        grid = self.obstacles
+        if grid is not None:
+            self.x, self.y = grid.push_out(self.x, self.y, self.head_size, self)
             
-        # Update spine segments
+        # Update spine segments, growing the bounds as they go
+        kernel_x, kernel_y, kernel_angles, kernel_speeds = self.kernel_state
+        if grid is None:
+            # Nothing to push out of: the whole pass is one kernel call (see kernels.py)
+            left, top, right, bottom = kernels.follow_spine(kernel_x, kernel_y, float(self.x), float(self.y),
+                                                            float(self.segment_spacing), float(current_speed))
+        else:
+            left, top, right, bottom = self.follow_spine(grid, current_speed)
+        
+        pad = self.draw_reach
+        self.bounds = (left - pad, top - pad, right + pad, bottom + pad)
+            
+        # Update leg animations
+        kernels.animate_legs(kernel_angles, kernel_speeds, distance_to_target > 2)
+    
+    def follow_spine(self, grid, current_speed):
+        # kernels.follow_spine, plus keeping every segment out of obstacles
+        seg_x, seg_y, seg_size = self.seg_x, self.seg_y, self.seg_size
         prev_x, prev_y = self.x, self.y
-        for i, segment in enumerate(self.segments):
+        left = right = prev_x
+        top = bottom = prev_y
+        for i in range(self.num_segments):
             # Calculate direction to previous segment
-            dx = prev_x - segment['x']
-            dy = prev_y - segment['y']
-            distance = max(1, math.sqrt(dx * dx + dy * dy))
+            dx = prev_x - seg_x[i]
+            dy = prev_y - seg_y[i]
+            distance = math.sqrt(dx * dx + dy * dy)
+            if distance < 1:  # not max(): this runs per segment per frame
+                distance = 1
             
             # Move segment if it's too far from the previous one
             if distance > self.segment_spacing:
                 segment_speed = current_speed * (0.95 - (i * 0.01))  # Segments get slower toward tail
-                segment['x'] += (dx / distance) * segment_speed
-                segment['y'] += (dy / distance) * segment_speed
-                
-            prev_x, prev_y = segment['x'], segment['y']
+                seg_x[i] += (dx / distance) * segment_speed
+                seg_y[i] += (dy / distance) * segment_speed
             
-        # Update leg animations
-        is_moving = distance_to_target > 2
-        for i in range(self.leg_count):
-            if is_moving:
-                # Animate legs when moving
-                self.leg_angles[i] += self.leg_animation_speeds[i] * (1 if i % 2 == 0 else -1)
-                if abs(self.leg_angles[i]) > 0.8:
-                    self.leg_angles[i] = 0.8 if self.leg_angles[i] > 0 else -0.8
-                    self.leg_animation_speeds[i] *= -1
-            else:
-                # Return legs to neutral position when stationary
-                self.leg_angles[i] *= 0.9
+            # Keep the body out of obstacles
+            seg_x[i], seg_y[i] = grid.push_out(seg_x[i], seg_y[i], seg_size[i], self)
+                
+            prev_x, prev_y = seg_x[i], seg_y[i]
+            if prev_x < left:
+                left = prev_x
+            elif prev_x > right:
+                right = prev_x
+            if prev_y < top:
+                top = prev_y
+            elif prev_y > bottom:
+                bottom = prev_y
+        return left, top, right, bottom
     
-    def draw(self, screen):
+    def draw(self, screen, view=None):
+        # With a Viewport, skip the reptile or any part of it that is off screen
+        if view is not None and not view.sees(self.bounds):
+            return
+        
         # Draw the spine segments
-        for i, segment in enumerate(self.segments):
+        seg_x, seg_y, seg_size = self.seg_x, self.seg_y, self.seg_size
+        reach = self.draw_reach
+        limb_at = self.body.limb_at
+        # Every leg's points in one go (see kernels.py)
+        kernel_x, kernel_y, kernel_angles, _ = self.kernel_state
+        leg_segment, upper, lower, foot_bend, toe_angles, toe_length = self.leg_tables
+        kernels.leg_geometry(kernel_x, kernel_y, float(self.x), float(self.y), leg_segment, kernel_angles,
+                             upper, lower, foot_bend, toe_angles, toe_length, self.leg_points)
+        points = kernels.values(self.leg_points)
+        stride = self.leg_stride
+        for i in range(self.num_segments):
+            # The segment and its legs lie within reach of it, the link forward
+            # within its own length (which grows when the body stretches)
+            if view is not None:
+                link = abs(seg_x[i] - seg_x[i - 1]) + abs(seg_y[i] - seg_y[i - 1]) if i else 0
+                if not view.sees_point(seg_x[i], seg_y[i], link if link > reach else reach):
+                    continue
+            
             # Draw spine segment
-            pygame.draw.circle(screen, BONE_COLOR, (int(segment['x']), int(segment['y'])), int(segment['size']))
+            pygame.draw.circle(screen, BONE_COLOR, (seg_x[i], seg_y[i]), int(seg_size[i]))
             
             # Draw connections between spine segments
             if i > 0:
-                prev_segment = self.segments[i-1]
                 pygame.draw.line(screen, BONE_COLOR, 
-                                (int(prev_segment['x']), int(prev_segment['y'])),
-                                (int(segment['x']), int(segment['y'])), 2)
+                                (seg_x[i-1], seg_y[i-1]),
+                                (seg_x[i], seg_y[i]), 2)
             
             # Draw legs at specific spine segments
-            leg_spacing = self.num_segments // (self.leg_count + 1)
-            if (i + 1) % leg_spacing == 0 and (i + 1) // leg_spacing <= self.leg_count:
-                leg_idx = (i + 1) // leg_spacing - 1
-                
-                # Calculate leg angles based on spine direction
-                if i > 0:
-                    prev_segment = self.segments[i-1]
-                    dx = segment['x'] - prev_segment['x']
-                    dy = segment['y'] - prev_segment['y']
-                    spine_angle = math.atan2(dy, dx)
-                else:
-                    dx = segment['x'] - self.x
-                    dy = segment['y'] - self.y
-                    spine_angle = math.atan2(dy, dx)
-                
-                # Left leg
-                left_leg_angle = spine_angle + (math.pi/2) + self.leg_angles[leg_idx]
-                left_leg_x1 = segment['x']
-                left_leg_y1 = segment['y']
-                
-                # Upper segment of leg
-                left_upper_x = left_leg_x1 + math.cos(left_leg_angle) * (self.leg_length * 0.6)
-                left_upper_y = left_leg_y1 + math.sin(left_leg_angle) * (self.leg_length * 0.6)
-                
-                # Lower segment (foot)
-                left_foot_angle = left_leg_angle + (0.7 if leg_idx % 2 == 0 else -0.3)
-                left_foot_x = left_upper_x + math.cos(left_foot_angle) * (self.leg_length * 0.4)
-                left_foot_y = left_upper_y + math.sin(left_foot_angle) * (self.leg_length * 0.4)
-                
-                # Draw left leg bones
-                pygame.draw.line(screen, BONE_COLOR, 
-                                (int(left_leg_x1), int(left_leg_y1)),
-                                (int(left_upper_x), int(left_upper_y)), 2)
-                pygame.draw.line(screen, BONE_COLOR,
-                                (int(left_upper_x), int(left_upper_y)),
-                                (int(left_foot_x), int(left_foot_y)), 2)
-                
-                # Draw foot with small lines
-                toes_angle_spread = 0.8
-                toe_length = 5
-                for toe in range(3):
-                    toe_angle = left_foot_angle + ((toe - 1) * toes_angle_spread/2)
-                    toe_x = left_foot_x + math.cos(toe_angle) * toe_length
-                    toe_y = left_foot_y + math.sin(toe_angle) * toe_length
-                    pygame.draw.line(screen, BONE_COLOR,
-                                    (int(left_foot_x), int(left_foot_y)),
-                                    (int(toe_x), int(toe_y)), 1)
-                
-                # Right leg
-                right_leg_angle = spine_angle - (math.pi/2) - self.leg_angles[leg_idx]
-                right_leg_x1 = segment['x']
-                right_leg_y1 = segment['y'] 
-                
-                # Upper segment of leg
-                right_upper_x = right_leg_x1 + math.cos(right_leg_angle) * (self.leg_length * 0.6)
-                right_upper_y = right_leg_y1 + math.sin(right_leg_angle) * (self.leg_length * 0.6)
-                
-                # Lower segment (foot)
-                right_foot_angle = right_leg_angle - (0.7 if leg_idx % 2 == 0 else -0.3)
-                right_foot_x = right_upper_x + math.cos(right_foot_angle) * (self.leg_length * 0.4)
-                right_foot_y = right_upper_y + math.sin(right_foot_angle) * (self.leg_length * 0.4)
-                
-                # Draw right leg bones
-                pygame.draw.line(screen, BONE_COLOR, 
-                                (int(right_leg_x1), int(right_leg_y1)),
-                                (int(right_upper_x), int(right_upper_y)), 2)
-                pygame.draw.line(screen, BONE_COLOR,
-                                (int(right_upper_x), int(right_upper_y)),
-                                (int(right_foot_x), int(right_foot_y)), 2)
-                
-                # Draw toes
-                for toe in range(3):
-                    toe_angle = right_foot_angle - ((toe - 1) * toes_angle_spread/2)
-                    toe_x = right_foot_x + math.cos(toe_angle) * toe_length
-                    toe_y = right_foot_y + math.sin(toe_angle) * toe_length
-                    pygame.draw.line(screen, BONE_COLOR,
-                                    (int(right_foot_x), int(right_foot_y)),
-                                    (int(toe_x), int(toe_y)), 1)
+            leg_idx = limb_at[i]
+            if leg_idx >= 0:
+                # Left leg, then right: hip, knee, foot, then the toe tips
+                for o in range(2 * leg_idx * stride, (2 * leg_idx + 2) * stride, stride):
+                    hip = (points[o], points[o + 1])
+                    knee = (points[o + 2], points[o + 3])
+                    foot = (points[o + 4], points[o + 5])
+                    pygame.draw.line(screen, BONE_COLOR, hip, knee, 2)
+                    pygame.draw.line(screen, BONE_COLOR, knee, foot, 2)
+                    for t in range(o + 6, o + stride, 2):
+                        pygame.draw.line(screen, BONE_COLOR, foot, (points[t], points[t + 1]), 1)
         
         # Draw head (skull)
+        if view is not None and not view.sees_point(self.x, self.y, self.head_size * 2):
+            return
+        
         # Calculate direction for head orientation
         dx = self.target_x - self.x
         dy = self.target_y - self.y
@@ -226,11 +298,11 @@ class SkeletalReptile:
         skull_right_y = self.y + math.sin(head_angle - math.pi/2) * (skull_width/2)
         
         # Draw skull
-        pygame.draw.circle(screen, BONE_COLOR, (int(self.x), int(self.y)), self.head_size)
+        pygame.draw.circle(screen, BONE_COLOR, (self.x, self.y), self.head_size)
         pygame.draw.polygon(screen, BONE_COLOR, [
-            (int(skull_front_x), int(skull_front_y)),
-            (int(skull_left_x), int(skull_left_y)),
-            (int(skull_right_x), int(skull_right_y))
+            (skull_front_x, skull_front_y),
+            (skull_left_x, skull_left_y),
+            (skull_right_x, skull_right_y)
         ])
         
         # Draw eye sockets
@@ -241,46 +313,293 @@ class SkeletalReptile:
         eye_right_x = self.x + math.cos(head_angle - math.pi/4) * eye_offset
         eye_right_y = self.y + math.sin(head_angle - math.pi/4) * eye_offset
         
-        pygame.draw.circle(screen, BLACK, (int(eye_left_x), int(eye_left_y)), self.eye_size)
-        pygame.draw.circle(screen, BLACK, (int(eye_right_x), int(eye_right_y)), self.eye_size)
+        pygame.draw.circle(screen, BLACK, (eye_left_x, eye_left_y), self.eye_size)
+        pygame.draw.circle(screen, BLACK, (eye_right_x, eye_right_y), self.eye_size)
+
+def draw_flow(screen, flow):
+    size = flow.cell_size
+    for cell in range(flow.cols * flow.rows):
+        row, col = divmod(cell, flow.cols)
+        cx = (col + 0.5) * size
+        cy = (row + 0.5) * size
+        if flow.blocked[cell]:
+            continue
+        end = (cx + flow.dir_x[cell] * size * 0.4, cy + flow.dir_y[cell] * size * 0.4)
+        pygame.draw.line(screen, OBSTACLE_COLOR, (cx, cy), end, 1)
+
+def wander(t):
+    # Stand-in cursor for headless output: a slow figure-eight around the screen
+    return (WIDTH / 2 + math.sin(t * 0.7) * WIDTH * 0.35,
+            HEIGHT / 2 + math.sin(t * 1.4) * HEIGHT * 0.3)
 
 def main():
-    clock = pygame.time.Clock()
+    parser = argparse.ArgumentParser(description="Skeletal reptile cursor")
+    parser.add_argument("--swarm", type=int, default=1, help="number of reptiles chasing the cursor")
+    parser.add_argument("--pacing", choices=MODES, default=None, help="frame pacing mode (default: $REPTILE_PACING or sleep)")
+    parser.add_argument("--fps", type=int, default=None, help="target frame rate (default: $REPTILE_FPS or 60)")
+    parser.add_argument("--shm", nargs="?", const=DEFAULT_NAME, default=None,
+                        help="headless: render into shared memory for another process (see shm_reader.py)")
+    parser.add_argument("--shm-force", action="store_true",
+                        help="headless: take over a shared memory block of that name left behind by a crashed writer")
+    parser.add_argument("--frames", type=int, default=0, help="headless: stop after this many frames")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="simulate the swarm in this many processes over shared memory")
+    parser.add_argument("--profile", type=int, default=0, metavar="N",
+                        help="profile the first N frames (F12 profiles the next %d any time)" % profiler.DEFAULT_FRAMES)
+    parser.add_argument("--profile-mode", choices=profiler.MODES, default=None,
+                        help="sample (cheap, default) or cprofile (exact, slow)")
+    parser.add_argument("--alloc-audit", type=int, default=0, metavar="N",
+                        help="report allocations per frame by source line over N frames (F10 any time)")
+    parser.add_argument("--hot-path", action="store_true",
+                        help="freeze startup objects and run garbage collection only between frames")
+    parser.add_argument("--metrics", default=None, metavar="TARGET",
+                        help="export metrics to a Prometheus text file or http://host:port "
+                             "(default: $REPTILE_METRICS, off)")
+    parser.add_argument("--soak", default=None, metavar="DURATION",
+                        help="soak test: simulate e.g. 2d of frames headless and uncapped with a scripted cursor, "
+                             "exit 1 on memory, object or frame-time growth (default: $REPTILE_SOAK, off)")
+    args = parser.parse_args()
+    if args.fps is None:
+        args.fps = fps_from_env()
     
-    # Create the reptile at the center of the screen
-    reptile = SkeletalReptile(WIDTH // 2, HEIGHT // 2)
+    # Soak test: switches to headless drivers, so before anything opens
+    soak = soak_from_env(args.soak)
     
-    # Keep actual mouse cursor visible
-    pygame.mouse.set_visible(True)
+    # Set up the display, or the shared memory frames in headless mode
+    pacer = FramePacer("uncapped" if soak is not None else args.pacing, args.fps)
+    output = None
+    if args.shm:
+        try:
+            output = SharedFrameOutput((WIDTH, HEIGHT), args.shm, args.shm_force)
+        except FileExistsError as e:
+            parser.error(f"{e} (--shm-force takes it over if none is)")
+        screen = output.back()
+        print(f"Writing {WIDTH}x{HEIGHT} frames to shared memory '{output.name}' (Ctrl+C stops)")
+    else:
+        screen = pacer.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption("Skeletal Reptile Cursor")
+        # Keep actual mouse cursor visible
+        pygame.mouse.set_visible(True)
+    
+    # Create the reptiles around the center of the screen
+    positions = [(WIDTH // 2, HEIGHT // 2)]
+    for _ in range(args.swarm - 1):
+        positions.append((random.randint(50, WIDTH - 50), random.randint(50, HEIGHT - 50)))
+    swarm = None
+    if args.workers:
+        # Imported here: swarm_parallel imports this module
+        from swarm_parallel import ParallelSwarm
+        swarm = ParallelSwarm(positions, args.workers)
+        reptiles = swarm.reptiles
+    else:
+        reptiles = [SkeletalReptile(x, y) for x, y in positions]
+    
+    history_frames = max(60, HISTORY_FRAMES // len(reptiles))
+    histories = [snapshot.History(len(reptile.state), history_frames) for reptile in reptiles]
+    
+    # Obstacles: right mouse drag draws walls, O toggles a UI panel, X clears.
+    # Every reptile's head is a moving obstacle for the others.
+    grid = obstacles.ObstacleGrid(WIDTH, HEIGHT)
+    bodies = []
+    for reptile in reptiles:
+        if swarm is None:
+            reptile.obstacles = grid
+        bodies.append(grid.add(obstacles.Circle(reptile.x, reptile.y, reptile.head_size, owner=reptile)))
+    panel = None
+    last_wall = None
+    
+    # One flow field towards the cursor, shared by the whole swarm (F shows it)
+    flow = FlowField(WIDTH, HEIGHT, grid)
+    show_flow = False
+    
+    # I toggles a HUD with the frame rate and how many reptiles are drawn
+    hud = TextPanel(pygame.font.Font(None, 22), (10, 10), 2, 20, WHITE)
+    show_hud = False
+    if len(reptiles) > 1 and swarm is None:
+        for reptile in reptiles:
+            reptile.flow = flow
+    
+    # Culling: only reptiles (and parts) overlapping the screen get drawn
+    viewport = Viewport(WIDTH, HEIGHT)
+    culler = CullGrid()
+    for reptile in reptiles:
+        culler.move(reptile)
+    
+    # Compile the kernels (or load them from numba's disk cache) before the first frame
+    if kernels.ENABLED:
+        print(f"Kernels ready in {kernels.warm_up():.2f}s (numba)")
+    
+    capture = profiler.Capture(args.profile, args.profile_mode) if args.profile else None
+    hot_path = alloc_audit.HotPathGC() if args.hot_path else None
+    audit = alloc_audit.AllocationAudit(args.alloc_audit) if args.alloc_audit else None
+    metrics = Metrics("reptile_cursor", pacer)
+    metrics.reptiles = len(reptiles)
+    exporter = export_from_env(metrics, args.metrics)
+    if soak is not None:
+        soak.watch("x", lambda: reptiles[0].x, WIDTH * 2)
+        soak.watch("y", lambda: reptiles[0].y, HEIGHT * 2)
     
     # Main game loop
     running = True
-    while running:
-        for event in pygame.event.get():
-            if event.type == QUIT:
-                running = False
-            elif event.type == KEYDOWN:
-                if event.key == K_ESCAPE:
+    frame = 0
+    try:
+        while running:
+            profiler.tag("events")
+            events = pygame.event.get() if output is None else []
+            for event in events:
+                if event.type == QUIT:
                     running = False
-        
-        # Get mouse position
-        mouse_pos = pygame.mouse.get_pos()
-        
-        # Update reptile
-        reptile.update(mouse_pos)
-        
-        # Draw everything
-        screen.fill(BLACK)
-        reptile.draw(screen)
-        
-        # Update the display
-        pygame.display.flip()
-        
-        # Cap the frame rate
-        clock.tick(60)
+                elif event.type in (MOUSEBUTTONDOWN, FINGERDOWN):
+                    metrics.touches += 1
+                elif event.type == KEYDOWN:
+                    if event.key == K_ESCAPE:
+                        running = False
+                    elif event.key == K_o:
+                        if panel is None:
+                            panel = grid.add(obstacles.Rect(WIDTH - 260, 40, 220, 140))
+                        else:
+                            grid.remove(panel)
+                            panel = None
+                    elif event.key == K_x:
+                        for obstacle in [o for o in grid.obstacles if o.owner is None]:
+                            grid.remove(obstacle)
+                        panel = None
+                    elif event.key == K_f:
+                        show_flow = not show_flow
+                    elif event.key == K_i:
+                        show_hud = not show_hud
+                    elif event.key == K_p:
+                        # Frame pacing stats since the last P
+                        print(pacer.report())
+                        print("\n".join(pacer.histogram_lines()))
+                        pacer.reset()
+                    elif event.key == K_F12 and capture is None:
+                        capture = profiler.Capture(mode=args.profile_mode)
+                    elif event.key == K_F10 and audit is None:
+                        audit = alloc_audit.AllocationAudit()
+                    elif event.key == K_F5:
+                        # Checkpoint to disk
+                        with open(SAVE_FILE, "wb") as f:
+                            for reptile in reptiles:
+                                f.write(reptile.snapshot())
+                    elif event.key == K_F9:
+                        try:
+                            with open(SAVE_FILE, "rb") as f:
+                                data = f.read()
+                            size = len(reptiles[0].state)
+                            for i, reptile in enumerate(reptiles[:len(data) // size]):
+                                reptile.restore(data[i * size:(i + 1) * size])
+                        except (OSError, snapshot.SnapshotError) as e:
+                            print(f"Could not load '{SAVE_FILE}': {e}")
+            
+            # Get mouse position (headless: follow a scripted path)
+            if soak is not None:
+                mouse_pos = soak.cursor(WIDTH, HEIGHT)
+                drawing = rewind = False
+            elif output is None:
+                mouse_pos = pygame.mouse.get_pos()
+                drawing = pygame.mouse.get_pressed()[2]
+                rewind = pygame.key.get_pressed()[K_r]
+            else:
+                mouse_pos = wander(frame / args.fps)
+                drawing = rewind = False
+            
+            # Draw walls while the right button is held
+            if drawing:
+                if last_wall is None or math.dist(last_wall, mouse_pos) >= WALL_RADIUS:
+                    grid.add(obstacles.Circle(mouse_pos[0], mouse_pos[1], WALL_RADIUS))
+                    last_wall = mouse_pos
+            else:
+                last_wall = None
+            
+            # Advance the shared flow field (bounded amount of work per frame)
+            profiler.tag("flow")
+            flow.set_goal(*mouse_pos)
+            flow.step()
+            
+            # Update reptiles, or step back through history while R is held
+            profiler.tag("update")
+            metrics.begin_update()
+            if swarm is not None and not rewind:
+                swarm.update(mouse_pos, grid)  # the worker processes advance every reptile
+            for reptile, history in zip(reptiles, histories):
+                if rewind and history.count:
+                    reptile.restore(history.pop())
+                else:
+                    if swarm is None:
+                        reptile.update(mouse_pos)
+                    history.push(reptile)
+                culler.move(reptile)
+            # Heads move only once everyone has updated, so every reptile avoids the
+            # others where they stood at the start of the tick, as --workers does
+            for reptile, body in zip(reptiles, bodies):
+                grid.move(body, reptile.x, reptile.y)
+            
+            # Draw everything (a soak only draws now and then)
+            profiler.tag("draw")
+            metrics.begin_draw()
+            drawing = soak is None or soak.draws()
+            if drawing:
+                screen.fill(BLACK)
+                for obstacle in grid.obstacles:
+                    if isinstance(obstacle, obstacles.Rect):
+                        pygame.draw.rect(screen, OBSTACLE_COLOR, (obstacle.left, obstacle.top,
+                                                                  obstacle.right - obstacle.left, obstacle.bottom - obstacle.top))
+                    elif obstacle.owner is None:
+                        pygame.draw.circle(screen, OBSTACLE_COLOR, (obstacle.x, obstacle.y), obstacle.radius)
+                if show_flow:
+                    draw_flow(screen, flow)
+                visible = culler.visible(viewport)
+                for reptile in visible:
+                    reptile.draw(screen, viewport)
+                if show_hud:
+                    hud.set(0, f"FPS: {pacer.clock.get_fps():.0f}")
+                    hud.set(1, f"Reptiles: {len(visible)} of {len(reptiles)} on screen")
+                    hud.draw(screen)
+            
+            # Update the display, or hand the frame to the reader and draw into the other buffer
+            metrics.end_draw()
+            profiler.tag("flip")
+            if not drawing:
+                pass
+            elif output is None:
+                pygame.display.flip()
+            else:
+                screen = output.publish()
+                if args.frames and frame + 1 >= args.frames:
+                    running = False
+            frame += 1
+            if capture is not None and capture.frame():
+                capture = None
+            if audit is not None and audit.frame():
+                audit = None
+            if hot_path is not None:
+                hot_path.frame()
+            if soak is not None and soak.frame():
+                running = False
+            
+            # Pace the frame rate
+            profiler.tag("pacing")
+            pacer.tick()
+            metrics.frame_done(pacer.last_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if capture is not None:
+            capture.finish()
+        if audit is not None:
+            audit.finish()
+        if output is not None:
+            screen = None  # the surface lives in the shared block
+            output.close()
+        if swarm is not None:
+            swarm.close()
+        if exporter is not None:
+            exporter.close()
     
+    print(pacer.report())
     pygame.quit()
-    sys.exit()
+    sys.exit(soak.finish() if soak is not None else None)
 
 if __name__ == "__main__":
     main()
@@ -3,29 +3,55 @@ import sys
 import math
 import os
 from pygame.locals import *
+from bloom import Bloom
+from pacing import FramePacer, fps_from_env
+import profiler
+import alloc_audit
+import species
+from render_scale import RenderScale
+from sound_bank import SoundBank
+from assets import AssetLoader
+from metrics import Metrics, export_from_env
+from soak import soak_from_env
+
+# Soak test (REPTILE_SOAK=2d): headless and uncapped, with a scripted cursor.
+# Before pygame starts, so it comes up on the dummy video and audio drivers
+soak = soak_from_env()
 
 pygame.init()
 pygame.mixer.init()
 
-# Load sound
-try:
-    TOUCH_SOUND = pygame.mixer.Sound("touch.wav")
-except pygame.error:
-    TOUCH_SOUND = None
-    print("⚠️ Could not load 'touch.wav'. Please place it in the same folder.")
+# Touch/footstep variants, synthesized once (or loaded from sound_bank.npz) on
+# a loader thread while the game already runs; silent until they are in
+assets = AssetLoader()
+sounds = assets.load("sounds", SoundBank, SoundBank(load=False))
 
 # Display setup
-screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
-WIDTH, HEIGHT = screen.get_size()
+# Internal render resolution (REPTILE_RENDER_SCALE), [ and ] change it at runtime
+pacer = FramePacer(fps=fps_from_env())  # REPTILE_PACING=sleep|busy|vsync|uncapped, REPTILE_FPS=60
+view = RenderScale(pacer=pacer)
+screen = view.open()
+WIDTH, HEIGHT = view.size
 pygame.display.set_caption("Skeletal Reptile")
 
+# Frame, touch and timing metrics, exported when REPTILE_METRICS is set
+metrics = Metrics("reptile_cursor_upgrade", pacer)
+metrics.reptiles = 1
+exporter = export_from_env(metrics)
+
 # Colors
 COLORS = [(180, 180, 180), (0, 255, 0), (255, 100, 100), (100, 255, 255), (255, 255, 0)]
 color_index = 0
 BONE_COLOR = COLORS[color_index]
+SIDES = (-1, 1)  # a constant, so the draw loops don't build a list per bone
+BODY = species.compile_spec(species.CENTIPEDE)  # body layout, see species.py
+
+def line_width(width, scale):
+    # Bone thickness at the render scale, in whole pixels and never thinner than one
+    return max(1, round(width * scale))
 
 class SkeletalReptile:
-    def __init__(self, x, y):
+    def __init__(self, x, y, scale=1.0):
         self.x = x
         self.y = y
         self.target_x = x
@@ -34,24 +60,23 @@ class SkeletalReptile:
         self.max_speed = 8
         self.movement_lag = 15
 
-        self.base_segment_size = 5
         self.head_base_size = 8
         self.head_grow = False
         self.sound_played = False
 
-        self.num_segments = 30
+        self.body = BODY
+        self.num_segments = BODY.segments
         self.segments = []
-        self.segment_spacing = 10
+        self.segment_spacing = BODY.spacing
 
         for i in range(self.num_segments):
             self.segments.append({
                 'x': x - i * self.segment_spacing,
                 'y': y,
-                'size': self.base_segment_size - min(2, i * 0.08)
+                'size': BODY.sizes[i]
             })
 
-        self.leg_count = 10
-        self.leg_length = 20
+        self.leg_count = BODY.limb_count
         self.leg_angles = []
         self.leg_animation_speeds = []
         for i in range(self.leg_count):
@@ -62,6 +87,30 @@ class SkeletalReptile:
         # --- NEW FEATURE: Tail sway phase for animation ---
         self.tail_wave_phase = 0
 
+        # Canvas pixels per panel pixel. Spacing, sizes and speeds are kept in
+        # canvas pixels; the body's own tables are scaled where they are drawn
+        self.scale = 1.0
+        if scale != 1.0:
+            self.rescale(scale, x, y)
+
+    def rescale(self, k, cx=0.0, cy=0.0):
+        # Scale the whole reptile by k around (cx, cy): the canvas resolution
+        # changed, so it stays in place and the same size on the panel
+        self.x = cx + (self.x - cx) * k
+        self.y = cy + (self.y - cy) * k
+        self.target_x = cx + (self.target_x - cx) * k
+        self.target_y = cy + (self.target_y - cy) * k
+        for segment in self.segments:
+            segment['x'] = cx + (segment['x'] - cx) * k
+            segment['y'] = cy + (segment['y'] - cy) * k
+            segment['size'] *= k
+        self.segment_spacing *= k
+        self.head_base_size *= k
+        self.speed *= k
+        self.max_speed *= k
+        self.movement_lag *= k
+        self.scale *= k
+
     def update(self, mouse_pos):
         dx = mouse_pos[0] - self.x
         dy = mouse_pos[1] - self.y
@@ -79,15 +128,19 @@ class SkeletalReptile:
         dy = self.target_y - self.y
         distance_to_target = max(1, math.hypot(dx, dy))
 
+        travelled = 0
         if distance_to_target > 1:
             self.x += (dx / distance_to_target) * current_speed
             self.y += (dy / distance_to_target) * current_speed
+            travelled = current_speed
 
         prev_x, prev_y = self.x, self.y
         for i, segment in enumerate(self.segments):
             dx = prev_x - segment['x']
             dy = prev_y - segment['y']
-            distance = max(1, math.hypot(dx, dy))
+            distance = math.hypot(dx, dy)
+            if distance < 1:  # not max(): this runs per segment per frame
+                distance = 1
             if distance > self.segment_spacing:
                 segment_speed = current_speed * (0.95 - (i * 0.01))
                 segment['x'] += (dx / distance) * segment_speed
@@ -95,12 +148,12 @@ class SkeletalReptile:
 
             # --- NEW FEATURE: Tail animation using sine wave ---
             if i >= 20:
-                sway = math.sin(self.tail_wave_phase + i * 0.3) * 2
+                sway = math.sin(self.tail_wave_phase + i * 0.3) * 2 * self.scale
                 segment['y'] += sway
 
             prev_x, prev_y = segment['x'], segment['y']
 
-        self.tail_wave_phase += 0.12
+        self.tail_wave_phase = (self.tail_wave_phase + 0.12) % math.tau  # wrapped: full precision forever
 
         # Leg animation
         is_moving = distance_to_target > 2
@@ -114,75 +167,95 @@ class SkeletalReptile:
                 self.leg_angles[i] *= 0.9
 
         # --- NEW FEATURE: Sound FX on touch ---
-        is_touching = math.hypot(mouse_pos[0] - self.x, mouse_pos[1] - self.y) < 30
+        is_touching = math.hypot(mouse_pos[0] - self.x, mouse_pos[1] - self.y) < 30 * self.scale
         self.head_grow = is_touching
-        if is_touching and not self.sound_played and TOUCH_SOUND:
-            TOUCH_SOUND.play()
+        if is_touching and not self.sound_played:
+            sounds.value.play_touch(travelled / self.max_speed)  # how far the head actually moved this frame
             self.sound_played = True
+            metrics.touches += 1
         elif not is_touching:
             self.sound_played = False
 
     def draw(self, screen, bone_color, mouse_pos):
+        s = self.scale
         head_size = self.head_base_size * (1.5 if self.head_grow else 1)
+        bone = line_width(2, s)
+        glow = 12 * s
 
-        # --- NEW FEATURE: Glow effect ---
-        glow_color = (*bone_color, 40)  # RGBA for transparent glow
-        glow_surface = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+        # --- NEW FEATURE: Glow effect (bloom pass at reduced resolution) ---
+        profiler.tag("glow")
+        bloom.begin()
 
         for i, segment in enumerate(self.segments):
-            pos = (int(segment['x']), int(segment['y']))
+            pos = (segment['x'], segment['y'])
             pygame.draw.circle(screen, bone_color, pos, int(segment['size']))
             if i > 0:
                 prev = self.segments[i - 1]
-                pygame.draw.line(screen, bone_color, (int(prev['x']), int(prev['y'])),
-                                 pos, 2)
+                pygame.draw.line(screen, bone_color, (prev['x'], prev['y']),
+                                 pos, bone)
+                bloom.line(bone_color, (prev['x'], prev['y']), pos, glow)
             # Glow aura
-            pygame.draw.circle(glow_surface, glow_color, pos, 20)
+            bloom.circle(bone_color, pos, glow)
 
-        # Draw the glow layer
-        screen.blit(glow_surface, (0, 0))
+        # Blur and add the glow layer
+        bloom.apply(screen)
 
         # Legs
-        leg_spacing = self.num_segments // (self.leg_count + 1)
-        for i, segment in enumerate(self.segments):
-            if (i + 1) % leg_spacing == 0 and (i + 1) // leg_spacing <= self.leg_count:
-                leg_idx = (i + 1) // leg_spacing - 1
-                if i > 0:
-                    prev = self.segments[i - 1]
-                    dx = segment['x'] - prev['x']
-                    dy = segment['y'] - prev['y']
-                    spine_angle = math.atan2(dy, dx)
-                else:
-                    spine_angle = 0
-                for side in [-1, 1]:
-                    leg_angle = spine_angle + (math.pi/2 * side) + side * self.leg_angles[leg_idx]
-                    x1, y1 = segment['x'], segment['y']
-                    upper_x = x1 + math.cos(leg_angle) * self.leg_length * 0.6
-                    upper_y = y1 + math.sin(leg_angle) * self.leg_length * 0.6
-                    foot_angle = leg_angle + (0.7 if leg_idx % 2 == 0 else -0.3) * side
-                    foot_x = upper_x + math.cos(foot_angle) * self.leg_length * 0.4
-                    foot_y = upper_y + math.sin(foot_angle) * self.leg_length * 0.4
-                    pygame.draw.line(screen, bone_color, (int(x1), int(y1)), (int(upper_x), int(upper_y)), 2)
-                    pygame.draw.line(screen, bone_color, (int(upper_x), int(upper_y)), (int(foot_x), int(foot_y)), 2)
-                    for toe in range(3):
-                        toe_angle = foot_angle + (toe - 1) * 0.4 * side
-                        toe_x = foot_x + math.cos(toe_angle) * 5
-                        toe_y = foot_y + math.sin(toe_angle) * 5
-                        pygame.draw.line(screen, bone_color, (int(foot_x), int(foot_y)), (int(toe_x), int(toe_y)), 1)
+        profiler.tag("limbs")
+        body = self.body
+        for leg_idx, i in enumerate(body.limb_segment):
+            segment = self.segments[i]
+            upper, lower = body.limb_upper[leg_idx] * s, body.limb_lower[leg_idx] * s
+            toe_length = body.toe_length[leg_idx] * s
+            if i > 0:
+                prev = self.segments[i - 1]
+                dx = segment['x'] - prev['x']
+                dy = segment['y'] - prev['y']
+                spine_angle = math.atan2(dy, dx)
+            else:
+                spine_angle = 0
+            for side in SIDES:
+                leg_angle = spine_angle + (math.pi/2 * side) + side * self.leg_angles[leg_idx]
+                x1, y1 = segment['x'], segment['y']
+                upper_x = x1 + math.cos(leg_angle) * upper
+                upper_y = y1 + math.sin(leg_angle) * upper
+                foot_angle = leg_angle + body.foot_bend[leg_idx] * side
+                foot_x = upper_x + math.cos(foot_angle) * lower
+                foot_y = upper_y + math.sin(foot_angle) * lower
+                pygame.draw.line(screen, bone_color, (x1, y1), (upper_x, upper_y), bone)
+                pygame.draw.line(screen, bone_color, (upper_x, upper_y), (foot_x, foot_y), bone)
+                for toe_offset in body.toe_angles[leg_idx]:
+                    toe_angle = foot_angle + toe_offset * side
+                    toe_x = foot_x + math.cos(toe_angle) * toe_length
+                    toe_y = foot_y + math.sin(toe_angle) * toe_length
+                    pygame.draw.line(screen, bone_color, (foot_x, foot_y), (toe_x, toe_y), line_width(1, s))
 
         # Head
-        pygame.draw.circle(screen, bone_color, (int(self.x), int(self.y)), int(head_size))
-        pygame.draw.circle(screen, (0, 0, 0), (int(self.x - 3), int(self.y - 2)), 2)
-        pygame.draw.circle(screen, (0, 0, 0), (int(self.x + 3), int(self.y - 2)), 2)
+        profiler.tag("body")
+        pygame.draw.circle(screen, bone_color, (self.x, self.y), int(head_size))
+        eye = max(1, round(2 * s))
+        pygame.draw.circle(screen, (0, 0, 0), (self.x - 3 * s, self.y - 2 * s), eye)
+        pygame.draw.circle(screen, (0, 0, 0), (self.x + 3 * s, self.y - 2 * s), eye)
 
 # Game Loop
-reptile = SkeletalReptile(WIDTH // 2, HEIGHT // 2)
-clock = pygame.time.Clock()
+reptile = SkeletalReptile(WIDTH // 2, HEIGHT // 2, view.scale)  # sized for the panel, not the canvas
+bloom = Bloom((WIDTH, HEIGHT), downscale=4)
+capture = profiler.from_env()  # REPTILE_PROFILE=frames profiles the start, F12 any time
+hot_path = alloc_audit.hot_path_from_env()  # REPTILE_HOT_PATH=1
+audit = alloc_audit.from_env()  # REPTILE_ALLOC_AUDIT=frames, or F10
+if soak is not None:
+    soak.watch("tail_wave_phase", lambda: reptile.tail_wave_phase, math.tau)
+    # The tail sway adds into segment y every frame; the body must not come apart over time
+    soak.watch("body_length", lambda: sum(math.hypot(a['x'] - b['x'], a['y'] - b['y'])
+                                          for a, b in zip(reptile.segments, reptile.segments[1:])),
+               reptile.segment_spacing * reptile.num_segments * 4)
+    soak.watch("x", lambda: reptile.x, WIDTH * 2)
+    soak.watch("y", lambda: reptile.y, HEIGHT * 2)
 
 running = True
 while running:
-    screen.fill((0, 0, 0))
-    mouse_pos = pygame.mouse.get_pos()
+    profiler.tag("events")
+    mouse_pos = view.mouse_pos() if soak is None else soak.cursor(WIDTH, HEIGHT)
 
     for event in pygame.event.get():
         if event.type == QUIT or (event.type == KEYDOWN and event.key == K_ESCAPE):
@@ -192,16 +265,58 @@ while running:
                 color_index = (color_index + 1) % len(COLORS)
                 BONE_COLOR = COLORS[color_index]
             if event.key == K_UP:
-                reptile.speed = min(10, reptile.speed + 0.5)
+                reptile.speed = min(10 * reptile.scale, reptile.speed + 0.5 * reptile.scale)
             if event.key == K_DOWN:
-                reptile.speed = max(1, reptile.speed - 0.5)
-
+                reptile.speed = max(1 * reptile.scale, reptile.speed - 0.5 * reptile.scale)
+            if event.key == K_p:
+                print(pacer.report())
+                pacer.reset()
+            if event.key == K_F12 and capture is None:
+                capture = profiler.Capture()
+            if event.key == K_F10 and audit is None:
+                audit = alloc_audit.AllocationAudit()
+            if event.key in (K_LEFTBRACKET, K_RIGHTBRACKET):
+                old_width = WIDTH
+                screen = view.step(1 if event.key == K_LEFTBRACKET else -1)
+                WIDTH, HEIGHT = view.size
+                reptile.rescale(WIDTH / old_width)
+                bloom = Bloom((WIDTH, HEIGHT), downscale=4)
+
+    profiler.tag("update")
+    metrics.begin_update()
     reptile.update(mouse_pos)
-    reptile.draw(screen, BONE_COLOR, mouse_pos)
-
-    pygame.display.flip()
-    clock.tick(60)
-
+    metrics.begin_draw()
+    drawing = soak is None or soak.draws()  # a soak only draws now and then
+    if drawing:
+        profiler.tag("body")
+        screen.fill((0, 0, 0))
+        reptile.draw(screen, BONE_COLOR, mouse_pos)
+
+    metrics.end_draw()
+    if drawing:
+        profiler.tag("flip")
+        view.present()
+    assets.poll()  # switch in whatever finished loading, between frames
+    if capture is not None and capture.frame():
+        capture = None
+    if audit is not None and audit.frame():
+        audit = None
+    if hot_path is not None:
+        hot_path.frame()
+    if soak is not None and soak.frame():
+        running = False
+    profiler.tag("pacing")
+    pacer.tick()
+    metrics.frame_done(pacer.last_interval)
+
+if capture is not None:
+    capture.finish()
+if audit is not None:
+    audit.finish()
+print(pacer.report())
+assets.close()
+if exporter is not None:
+    exporter.close()
 pygame.quit()
-sys.exit()
+sys.exit(soak.finish() if soak is not None else None)
 
@@ -3,14 +3,21 @@ import math
 import sys
 import random
 import time
+import alloc_audit
+import palette
+import profiler
+import species
+from culling import Viewport
+from pacing import FramePacer, fps_from_env
+from text_cache import TextPanel
+from assets import AssetLoader
+from metrics import Metrics, export_from_env
+from soak import soak_from_env
 
-# Initialize Pygame
-pygame.init()
-
-# Get screen dimensions for fullscreen
-info = pygame.display.Info()
-SCREEN_WIDTH = info.current_w
-SCREEN_HEIGHT = info.current_h
+# Screen dimensions for fullscreen: main() asks the display once pygame is up
+# (after a soak has switched to the dummy driver); a window-sized default until then
+SCREEN_WIDTH = 1200
+SCREEN_HEIGHT = 800
 
 # Constants
 BLACK = (0, 0, 0)
@@ -26,19 +33,48 @@ ORANGE = (255, 165, 0)
 COLORS = [WHITE, GREEN, RED, BLUE, YELLOW, PURPLE, CYAN, ORANGE]
 COLOR_NAMES = ["White", "Green", "Red", "Blue", "Yellow", "Purple", "Cyan", "Orange"]
 
-FPS = 60
+FPS = fps_from_env()  # REPTILE_FPS, default 60
+
+# Idle mode: once the reptile has settled the loop sleeps in pygame.event.wait
+# and only wakes IDLE_FPS times a second to keep breathing/blinking going
+IDLE_FPS = 10
+SETTLE_VELOCITY = 0.05  # head movement, px per frame
+SETTLE_RESIDUAL = 0.5   # how far any segment was pulled this frame, px
+SETTLE_BOB = 0.05       # leftover walk bob, px
+
+# Phases wrap around so they keep full precision however long it runs;
+# idle_timer drives sin(t * 0.02) and sin(t * 0.1), which both repeat over this
+IDLE_PERIOD = 100 * math.pi
+
+# Body layout (limb attachments, toe fans, ribs), compiled once; see species.py
+BODY = species.compile_spec(species.SKELETON)
+SIDES = (-1, 1)
+
+def skull_outline(head_size):
+    offsets = []
+    for angle in range(0, 360, 15):
+        rad = math.radians(angle)
+        if angle < 90 or angle > 270:  # Front part (snout)
+            radius_x = head_size * 1.2
+            radius_y = head_size * 0.6
+        else:  # Back part (wider skull)
+            radius_x = head_size * 0.8
+            radius_y = head_size * 0.8
+        offsets.append((radius_x * math.cos(rad), radius_y * math.sin(rad)))
+    return offsets
 
 class ReptileSkeleton:
-    def __init__(self, x, y):
+    def __init__(self, x, y, assets=None):
         self.x = x
         self.y = y
         self.target_x = x
         self.target_y = y
         self.ground_y = SCREEN_HEIGHT - 100  # Ground level
-        self.spine_segments = 20
-        self.tail_segments = 15
-        self.spine_length = 15
-        self.tail_length = 12
+        self.body = BODY
+        self.spine_segments = BODY.segments
+        self.tail_segments = BODY.tail_segments
+        self.spine_length = BODY.spacing
+        self.tail_length = BODY.tail_spacing
         
         # Movement properties
         self.speed = 0.08
@@ -46,22 +82,39 @@ class ReptileSkeleton:
         self.step_height = 8
         self.body_bob = 0
         
-        # Store positions for smooth movement
-        self.spine_positions = [(x, y) for _ in range(self.spine_segments)]
-        self.tail_positions = [(x, y) for _ in range(self.tail_segments)]
+        # Store positions for smooth movement ([x, y] pairs, updated in place)
+        self.spine_positions = [[x, y] for _ in range(self.spine_segments)]
+        self.tail_positions = [[x, y] for _ in range(self.tail_segments)]
         
         # Head properties
         self.head_size = 30
         self.eye_size = 8
-        
-        # Limb properties
-        self.limb_length = 40
-        self.foot_size = 20
+        # Skull outline relative to the head, and the points it is drawn from
+        self.skull_offsets = skull_outline(self.head_size)
+        self.skull_points = [[x, y] for _ in self.skull_offsets]
         
         # Color
         self.color_index = 0
         self.current_color = COLORS[self.color_index]
         
+        # Indexed render layers: everything is drawn with palette indices,
+        # so a color change is just a palette swap
+        self.layers = palette.IndexedLayers(self.current_color)
+        self.frame_layer = self.layers.new((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.ground_layer = self.layers.new((SCREEN_WIDTH, SCREEN_HEIGHT))
+        # Head glow: pre-rendered on the asset loader's thread (into layers of
+        # its own, nothing shared) when there is one; no glow until it's in
+        glow_radius = self.head_size * 2
+        if assets is None:
+            self.head_glow = self.layers.glow_sprite(glow_radius)
+        else:
+            self.head_glow = None
+            color = self.current_color
+            assets.load("head glow", lambda: palette.IndexedLayers(color).glow_sprite(glow_radius),
+                        on_ready=self.adopt_glow)
+        self.color_animation = False
+        self.render_ground(self.ground_layer)
+        
         # Walking animation
         self.is_moving = False
         self.last_x = x
@@ -71,6 +124,23 @@ class ReptileSkeleton:
         self.idle_timer = 0
         self.idle_head_sway = 0
         self.breathing_cycle = 0
+        self.hue = 0  # color animation, degrees
+        
+        # Settle detection
+        self.head_velocity = 0
+        self.segment_residual = 0
+        self.tail_pulled = False  # any tail segment moved in the last update
+        
+        # Screen-space box around everything draw() touches (see culling.py).
+        # Limbs with toes reach furthest past the spine; the glow is next.
+        self.limb_reach = BODY.limb_reach + 14 + self.step_height + 2  # + toes, line width
+        self.head_reach = max(glow_radius, self.head_size * 1.2)
+        self.draw_reach = max(self.limb_reach, self.head_reach)
+        self.bounds = (x - self.draw_reach, y - self.draw_reach, x + self.draw_reach, y + self.draw_reach)
+        
+    def adopt_glow(self, sprite):
+        # Switched in between frames, on the main thread
+        self.head_glow = self.layers.adopt(sprite)
         
     def update_speed(self, delta):
         self.speed = max(0.02, min(0.3, self.speed + delta))
@@ -78,9 +148,32 @@ class ReptileSkeleton:
     def change_color(self):
         self.color_index = (self.color_index + 1) % len(COLORS)
         self.current_color = COLORS[self.color_index]
+        self.layers.set_color(self.current_color)
         return COLOR_NAMES[self.color_index]
     
-    def update(self, target_x, target_y):
+    def toggle_color_animation(self):
+        self.color_animation = not self.color_animation
+        if not self.color_animation:
+            self.current_color = COLORS[self.color_index]
+            self.layers.set_color(self.current_color)
+    
+    def animate_color(self):
+        # Slow hue drift; only the palette changes, nothing is re-rendered
+        color = pygame.Color(0)
+        color.hsva = (self.hue, 100, 100, 100)
+        self.current_color = (color.r, color.g, color.b)
+        self.layers.set_color(self.current_color)
+    
+    def is_settled(self):
+        return (not self.is_moving
+                and not self.color_animation
+                and self.head_velocity < SETTLE_VELOCITY
+                and self.segment_residual < SETTLE_RESIDUAL
+                and abs(self.body_bob) < SETTLE_BOB)
+    
+    def update(self, target_x, target_y, steps=1):
+        # steps > 1 advances the idle/breathing phases by that many frames at once
+        # (used by the low-rate idle loop)
         self.target_x = target_x
         self.target_y = target_y
         
@@ -92,66 +185,126 @@ class ReptileSkeleton:
         # Check if moving
         distance_moved = math.sqrt((self.x - old_x)**2 + (self.y - old_y)**2)
         self.is_moving = distance_moved > 0.5
+        self.head_velocity = distance_moved
+        self.segment_residual = 0
+        self.tail_pulled = False
         
         if self.is_moving:
-            self.walk_cycle += 0.3
+            self.walk_cycle = (self.walk_cycle + 0.3) % math.tau
             self.idle_timer = 0
             # Add body bobbing while walking
             self.body_bob = math.sin(self.walk_cycle) * 3
         else:
-            self.idle_timer += 1
-            self.body_bob *= 0.95  # Gradually stop bobbing
+            self.idle_timer = (self.idle_timer + steps) % IDLE_PERIOD
+            self.body_bob *= 0.95 ** steps  # Gradually stop bobbing
             # Add subtle idle animations
             self.idle_head_sway = math.sin(self.idle_timer * 0.02) * 2
             
         # Breathing animation
-        self.breathing_cycle += 0.05
+        self.breathing_cycle = (self.breathing_cycle + 0.05 * steps) % math.tau
+        self.hue = (self.hue + steps) % 360  # a degree per frame
         breathing_offset = math.sin(self.breathing_cycle) * 1
         
         # Apply body movement
         final_y = self.y + self.body_bob + breathing_offset
         
-        # Update spine positions (follow the head)
-        self.spine_positions[0] = (self.x + self.idle_head_sway, final_y)
-        
-        for i in range(1, len(self.spine_positions)):
-            prev_x, prev_y = self.spine_positions[i-1]
-            curr_x, curr_y = self.spine_positions[i]
+        # Update spine positions (follow the head), growing the bounds as they go
+        spine = self.spine_positions
+        head = spine[0]
+        head[0] = self.x + self.idle_head_sway
+        head[1] = final_y
+        left = right = head[0]
+        top = bottom = final_y
+        
+        for i in range(1, len(spine)):
+            prev_x, prev_y = spine[i-1]
+            point = spine[i]
             
             # Calculate direction and distance
-            dx = prev_x - curr_x
-            dy = prev_y - curr_y
+            dx = prev_x - point[0]
+            dy = prev_y - point[1]
             distance = math.sqrt(dx*dx + dy*dy)
             
             if distance > self.spine_length:
+                if distance - self.spine_length > self.segment_residual:
+                    self.segment_residual = distance - self.spine_length
                 # Normalize and set to correct distance
                 dx = dx / distance * self.spine_length
                 dy = dy / distance * self.spine_length
-                self.spine_positions[i] = (prev_x - dx, prev_y - dy)
+                point[0] = prev_x - dx
+                point[1] = prev_y - dy
+            
+            x, y = point
+            if x < left:
+                left = x
+            elif x > right:
+                right = x
+            if y < top:
+                top = y
+            elif y > bottom:
+                bottom = y
         
         # Update tail positions (follow the last spine segment)
-        if self.spine_positions:
-            last_spine_x, last_spine_y = self.spine_positions[-1]
-            self.tail_positions[0] = (last_spine_x, last_spine_y)
+        if spine:
+            tail = self.tail_positions
+            tail[0][0], tail[0][1] = spine[-1]
             
-            for i in range(1, len(self.tail_positions)):
-                prev_x, prev_y = self.tail_positions[i-1]
-                curr_x, curr_y = self.tail_positions[i]
+            for i in range(1, len(tail)):
+                prev_x, prev_y = tail[i-1]
+                point = tail[i]
                 
-                dx = prev_x - curr_x
-                dy = prev_y - curr_y
+                dx = prev_x - point[0]
+                dy = prev_y - point[1]
                 distance = math.sqrt(dx*dx + dy*dy)
                 
                 if distance > self.tail_length:
+                    self.tail_pulled = True
+                    if distance - self.tail_length > self.segment_residual:
+                        self.segment_residual = distance - self.tail_length
                     dx = dx / distance * self.tail_length
                     dy = dy / distance * self.tail_length
                     # Tail can lift slightly but should generally stay low
-                    new_y = prev_y - dy
-                    self.tail_positions[i] = (prev_x - dx, new_y)
+                    point[0] = prev_x - dx
+                    point[1] = prev_y - dy
+                
+                x, y = point
+                if x < left:
+                    left = x
+                elif x > right:
+                    right = x
+                if y < top:
+                    top = y
+                elif y > bottom:
+                    bottom = y
+        
+        pad = self.draw_reach
+        self.bounds = (left - pad, top - pad, right + pad, bottom + pad)
+    
+    def idle_area(self):
+        # Screen box the idle animation touches: the head, and the ribs and limbs
+        # hanging off the spine (breathing, and segments the swaying head pulls).
+        # A settled tail stays put unless tail_pulled says otherwise.
+        spine = self.spine_positions
+        left = right = spine[0][0]
+        top = bottom = spine[0][1]
+        for x, y in spine:
+            if x < left:
+                left = x
+            elif x > right:
+                right = x
+            if y < top:
+                top = y
+            elif y > bottom:
+                bottom = y
+        pad = self.draw_reach + 2  # + the head's breathing bob in draw_head
+        return pygame.Rect(int(left - pad), int(top - pad), int(right - left + 2 * pad) + 1, int(bottom - top + 2 * pad) + 1)
     
-    def draw_ground(self, screen):
+    def render_ground(self, surface):
+        # Ground is static, so it is rendered once into its own indexed layer
+        surface.fill(palette.BG)
+        
         # Draw ground line
-        pygame.draw.line(screen, self.current_color, (0, self.ground_y), (SCREEN_WIDTH, self.ground_y), 2)
+        pygame.draw.line(surface, palette.BONE, (0, self.ground_y), (SCREEN_WIDTH, self.ground_y), 2)
         
         # Draw some ground texture
         for i in range(0, SCREEN_WIDTH, 50):
@@ -160,8 +313,7 @@ class ReptileSkeleton:
                 rock_size = random.randint(2, 4)
                 rock_x = i + random.randint(-10, 10)
                 rock_y = self.ground_y + random.randint(0, 5)
-                color = tuple(max(0, c - 100) for c in self.current_color)
-                pygame.draw.circle(screen, color, (rock_x, rock_y), rock_size)
+                pygame.draw.circle(surface, palette.SHADE, (rock_x, rock_y), rock_size)
     
     def draw_head(self, screen):
         # Draw skull outline
@@ -170,22 +322,12 @@ class ReptileSkeleton:
         # Add slight head movement based on breathing
         head_y += math.sin(self.breathing_cycle) * 0.5
         
-        # Main skull shape (elongated oval)
-        skull_points = []
-        for angle in range(0, 360, 15):
-            rad = math.radians(angle)
-            if angle < 90 or angle > 270:  # Front part (snout)
-                radius_x = self.head_size * 1.2
-                radius_y = self.head_size * 0.6
-            else:  # Back part (wider skull)
-                radius_x = self.head_size * 0.8
-                radius_y = self.head_size * 0.8
-            
-            x = head_x + radius_x * math.cos(rad)
-            y = head_y + radius_y * math.sin(rad)
-            skull_points.append((x, y))
+        # Main skull shape (elongated oval), moved into place in the reused point list
+        for point, (ox, oy) in zip(self.skull_points, self.skull_offsets):
+            point[0] = head_x + ox
+            point[1] = head_y + oy
         
-        pygame.draw.polygon(screen, self.current_color, skull_points, 2)
+        pygame.draw.polygon(screen, palette.BONE, self.skull_points, 2)
         
         # Draw eye sockets with blinking
         blink = math.sin(self.idle_timer * 0.1) < -0.9 if not self.is_moving else False
@@ -196,144 +338,179 @@ class ReptileSkeleton:
         eye2_x = head_x - self.head_size * 0.3
         eye2_y = head_y + self.head_size * 0.2
         
-        pygame.draw.circle(screen, self.current_color, (int(eye1_x), int(eye1_y)), eye_size, 2)
-        pygame.draw.circle(screen, self.current_color, (int(eye2_x), int(eye2_y)), eye_size, 2)
+        pygame.draw.circle(screen, palette.BONE, (eye1_x, eye1_y), eye_size, 2)
+        pygame.draw.circle(screen, palette.BONE, (eye2_x, eye2_y), eye_size, 2)
         
         # Draw nasal cavity
         nose_x = head_x + self.head_size * 0.8
         nose_y = head_y
-        pygame.draw.circle(screen, self.current_color, (int(nose_x), int(nose_y)), 4, 2)
+        pygame.draw.circle(screen, palette.BONE, (nose_x, nose_y), 4, 2)
     
-    def draw_spine_and_ribs(self, screen):
+    def draw_spine_and_ribs(self, screen, view=None):
         # Draw spine
         if len(self.spine_positions) > 1:
-            pygame.draw.lines(screen, self.current_color, False, self.spine_positions, 3)
-        
-        # Draw ribs
-        for i, (x, y) in enumerate(self.spine_positions[2:], 2):
-            if i < len(self.spine_positions) - 3:  # Don't draw ribs too close to tail
-                rib_length = 25 - (i * 1.5)  # Ribs get smaller towards tail
-                if rib_length > 5:
-                    # Add breathing movement to ribs
-                    breath_expand = math.sin(self.breathing_cycle) * 2
-                    
-                    # Left rib
-                    rib1_end = (x - rib_length - breath_expand, y + rib_length * 0.8)
-                    pygame.draw.line(screen, self.current_color, (x, y), rib1_end, 2)
-                    
-                    # Right rib
-                    rib2_end = (x + rib_length + breath_expand, y + rib_length * 0.8)
-                    pygame.draw.line(screen, self.current_color, (x, y), rib2_end, 2)
+            pygame.draw.lines(screen, palette.BONE, False, self.spine_positions, 3)
+        
+        # Draw ribs (segments and lengths from the spec: shorter towards the tail, none near it)
+        for i, rib_length in self.body.ribs:
+            x, y = self.spine_positions[i]
+            if view is not None and not view.sees_point(x, y, rib_length + 4):
+                continue
+            # Add breathing movement to ribs
+            breath_expand = math.sin(self.breathing_cycle) * 2
+            
+            # Left rib
+            rib1_end = (x - rib_length - breath_expand, y + rib_length * 0.8)
+            pygame.draw.line(screen, palette.BONE, (x, y), rib1_end, 2)
+            
+            # Right rib
+            rib2_end = (x + rib_length + breath_expand, y + rib_length * 0.8)
+            pygame.draw.line(screen, palette.BONE, (x, y), rib2_end, 2)
     
-    def draw_tail(self, screen):
+    def draw_tail(self, screen, view=None):
         if len(self.tail_positions) > 1:
             # Draw tail spine
-            pygame.draw.lines(screen, self.current_color, False, self.tail_positions, 2)
+            pygame.draw.lines(screen, palette.BONE, False, self.tail_positions, 2)
             
-            # Draw tail vertebrae marks
-            for i, (x, y) in enumerate(self.tail_positions[::2]):
+            # Draw tail vertebrae marks (every other tail point)
+            for i in range((len(self.tail_positions) + 1) // 2):
+                x, y = self.tail_positions[2 * i]
                 size = max(1, 4 - i // 2)
-                pygame.draw.circle(screen, self.current_color, (int(x), int(y)), size, 1)
+                if view is not None and not view.sees_point(x, y, size):
+                    continue
+                pygame.draw.circle(screen, palette.BONE, (x, y), size, 1)
     
-    def draw_limbs(self, screen):
-        if len(self.spine_positions) >= 6:
-            # Walking animation for limbs
-            front_lift_left = math.sin(self.walk_cycle) * self.step_height if self.is_moving else 0
-            front_lift_right = math.sin(self.walk_cycle + math.pi) * self.step_height if self.is_moving else 0
-            
-            # Front limbs (attached to 3rd spine segment)
-            front_x, front_y = self.spine_positions[3]
-            
-            # Left front limb
-            upper_arm_end = (front_x - 25, front_y + 15 - front_lift_left * 0.3)
-            forearm_end = (front_x - 40, front_y + 35 - front_lift_left)
-            pygame.draw.line(screen, self.current_color, (front_x, front_y), upper_arm_end, 2)
-            pygame.draw.line(screen, self.current_color, upper_arm_end, forearm_end, 2)
-            
-            # Left front foot
-            self.draw_foot(screen, forearm_end[0], forearm_end[1], -1)
-            
-            # Right front limb
-            upper_arm_end = (front_x + 25, front_y + 15 - front_lift_right * 0.3)
-            forearm_end = (front_x + 40, front_y + 35 - front_lift_right)
-            pygame.draw.line(screen, self.current_color, (front_x, front_y), upper_arm_end, 2)
-            pygame.draw.line(screen, self.current_color, upper_arm_end, forearm_end, 2)
-            
-            # Right front foot
-            self.draw_foot(screen, forearm_end[0], forearm_end[1], 1)
-        
-        if len(self.spine_positions) >= 12:
-            # Back limbs with opposite walking cycle
-            back_lift_left = math.sin(self.walk_cycle + math.pi) * self.step_height if self.is_moving else 0
-            back_lift_right = math.sin(self.walk_cycle) * self.step_height if self.is_moving else 0
-            
-            # Back limbs (attached to spine segment further back)
-            back_x, back_y = self.spine_positions[11]
-            
-            # Left back limb
-            upper_leg_end = (back_x - 30, back_y + 20 - back_lift_left * 0.3)
-            lower_leg_end = (back_x - 45, back_y + 45 - back_lift_left)
-            pygame.draw.line(screen, self.current_color, (back_x, back_y), upper_leg_end, 2)
-            pygame.draw.line(screen, self.current_color, upper_leg_end, lower_leg_end, 2)
-            
-            # Left back foot
-            self.draw_foot(screen, lower_leg_end[0], lower_leg_end[1], -1)
-            
-            # Right back limb
-            upper_leg_end = (back_x + 30, back_y + 20 - back_lift_right * 0.3)
-            lower_leg_end = (back_x + 45, back_y + 45 - back_lift_right)
-            pygame.draw.line(screen, self.current_color, (back_x, back_y), upper_leg_end, 2)
-            pygame.draw.line(screen, self.current_color, upper_leg_end, lower_leg_end, 2)
-            
-            # Right back foot
-            self.draw_foot(screen, lower_leg_end[0], lower_leg_end[1], 1)
+    def draw_limbs(self, screen, view=None):
+        reach = self.limb_reach
+        body = self.body
+        for k in range(body.limb_count):
+            # Each pair hangs from its spine segment; knee and foot are fixed
+            # offsets from it, lifted while walking (pairs out of phase)
+            shoulder_x, shoulder_y = self.spine_positions[body.limb_segment[k]]
+            if view is not None and not view.sees_point(shoulder_x, shoulder_y, reach):
+                continue
+            knee_x, knee_y = body.limb_knee[k]
+            foot_x, foot_y = body.limb_foot[k]
+            for j, side in enumerate(SIDES):
+                lift = math.sin(self.walk_cycle + body.limb_phase[k][j]) * self.step_height if self.is_moving else 0
+                knee = (shoulder_x + side * knee_x, shoulder_y + knee_y - lift * 0.3)
+                foot = (shoulder_x + side * foot_x, shoulder_y + foot_y - lift)
+                pygame.draw.line(screen, palette.BONE, (shoulder_x, shoulder_y), knee, 2)
+                pygame.draw.line(screen, palette.BONE, knee, foot, 2)
+                self.draw_foot(screen, foot[0], foot[1], body.toe_offsets[k][j])
     
-    def draw_foot(self, screen, x, y, direction):
+    def draw_foot(self, screen, x, y, toes):
         # Draw toes
-        for i in range(5):
-            toe_angle = math.radians(-30 + i * 15) if direction == -1 else math.radians(210 + i * 15)
-            toe_length = 8 + i * 2 if i < 3 else 10 - (i - 2) * 2
-            toe_end_x = x + toe_length * math.cos(toe_angle)
-            toe_end_y = y + toe_length * math.sin(toe_angle)
-            pygame.draw.line(screen, self.current_color, (x, y), (toe_end_x, toe_end_y), 1)
+        for dx, dy in toes:
+            pygame.draw.line(screen, palette.BONE, (x, y), (x + dx, y + dy), 1)
     
-    def draw(self, screen):
-        self.draw_ground(screen)
-        self.draw_spine_and_ribs(screen)
-        self.draw_tail(screen)
-        self.draw_limbs(screen)
-        self.draw_head(screen)
+    def draw(self, screen, view=None, area=None):
+        # With a Viewport, parts (or the whole reptile) off screen are skipped.
+        # With `area` (a Rect) only that part of the frame is rebuilt and copied
+        # to the screen; the rest of both stays as the last full frame left it.
+        if self.color_animation:
+            self.animate_color()
+        
+        # Build the frame in the indexed layer, then convert to the display in one blit
+        profiler.tag("layers")
+        layer = self.frame_layer
+        layer.set_clip(area)
+        layer.blit(self.ground_layer, (0, 0))
+        if view is None or view.sees(self.bounds):
+            head_x, head_y = self.spine_positions[0]
+            head_visible = view is None or view.sees_point(head_x, head_y, self.head_reach)
+            if head_visible and self.head_glow is not None:
+                profiler.tag("glow")
+                glow_radius = self.head_glow.get_width() // 2
+                layer.blit(self.head_glow, (int(head_x) - glow_radius, int(head_y) - glow_radius))
+            profiler.tag("body")
+            self.draw_spine_and_ribs(layer, view)
+            self.draw_tail(layer, view)
+            profiler.tag("limbs")
+            self.draw_limbs(layer, view)
+            if head_visible:
+                profiler.tag("body")
+                self.draw_head(layer)
+        profiler.tag("layers")
+        layer.set_clip(None)
+        if area is None:
+            screen.blit(layer, (0, 0))
+        else:
+            screen.blit(layer, area, area)
 
-def draw_ui(screen, reptile, font):
-    # Draw UI information
-    ui_texts = [
-        f"Speed: {reptile.speed:.2f} (↑/↓ to adjust)",
-        f"Color: {COLOR_NAMES[reptile.color_index]} (C to change)",
-        "ESC to exit, F11 to toggle fullscreen",
-        f"Status: {'Walking' if reptile.is_moving else 'Idle'}"
-    ]
-    
-    for i, text in enumerate(ui_texts):
-        text_surface = font.render(text, True, reptile.current_color)
-        screen.blit(text_surface, (10, 10 + i * 25))
+def draw_ui(screen, reptile, panel, fps):
+    # Draw UI information; the panel only renders lines whose text changed
+    panel.set(0, f"Speed: {reptile.speed:.2f} (↑/↓ to adjust)")
+    panel.set(1, f"Color: {COLOR_NAMES[reptile.color_index]} (C to change)")
+    panel.set(2, "ESC to exit, F11 to toggle fullscreen, H to animate color")
+    panel.set(3, f"Status: {'Walking' if reptile.is_moving else 'Idle'}")
+    panel.set(4, f"FPS: {fps:.0f}" if fps else "FPS: idle")
+    panel.set_color(reptile.current_color)
+    panel.draw(screen)
 
 def main():
+    global SCREEN_WIDTH, SCREEN_HEIGHT
+    
+    # Soak test (REPTILE_SOAK=2d): headless and uncapped, with a scripted cursor.
+    # Before pygame starts, so it comes up on the dummy video and audio drivers
+    soak = soak_from_env()
+    
+    # Initialize Pygame and get the screen dimensions
+    pygame.init()
+    info = pygame.display.Info()
+    SCREEN_WIDTH = info.current_w
+    SCREEN_HEIGHT = info.current_h
+    
+    # Fonts and sprites load in the background; the first frames go without them
+    assets = AssetLoader()
+    
     # Create fullscreen display
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.FULLSCREEN)
+    pacer = FramePacer(fps=FPS)  # REPTILE_PACING=sleep|busy|vsync|uncapped
+    screen = pacer.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.FULLSCREEN)
     pygame.display.set_caption("Advanced Reptile Skeleton - Realistic Walking Simulation")
-    clock = pygame.time.Clock()
-    font = pygame.font.Font(None, 24)
+    hud = assets.load("HUD font", lambda: TextPanel(pygame.font.Font(None, 24), (10, 10), 5, 25))
+    
+    # Frame, touch and timing metrics, exported when REPTILE_METRICS is set
+    metrics = Metrics("reptile_new", pacer)
+    metrics.reptiles = 1
+    exporter = export_from_env(metrics)
     
     # Create reptile at center of screen
-    reptile = ReptileSkeleton(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+    reptile = ReptileSkeleton(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2, assets)
+    viewport = Viewport(*screen.get_size())
+    capture = profiler.from_env()  # REPTILE_PROFILE=frames profiles the start, F12 any time
+    hot_path = alloc_audit.hot_path_from_env()  # REPTILE_HOT_PATH=1
+    audit = alloc_audit.from_env()  # REPTILE_ALLOC_AUDIT=frames, or F10
+    if soak is not None:
+        soak.watch("walk_cycle", lambda: reptile.walk_cycle, math.tau)
+        soak.watch("breathing_cycle", lambda: reptile.breathing_cycle, math.tau)
+        soak.watch("idle_timer", lambda: reptile.idle_timer, IDLE_PERIOD)
+        soak.watch("x", lambda: reptile.x, SCREEN_WIDTH)
+        soak.watch("y", lambda: reptile.y, SCREEN_HEIGHT)
     
     fullscreen = True
     running = True
+    idle = False
+    loading = True
+    stale = False  # the last frame wasn't drawn (soak), so the screen is out of date
     
     while running:
-        for event in pygame.event.get():
+        profiler.tag("events")
+        if idle:
+            # Settled: block until input arrives, waking at IDLE_FPS for the idle animation
+            event = pygame.event.wait(1000 // IDLE_FPS) if soak is None else pygame.event.poll()
+            events = pygame.event.get()
+            if event.type != pygame.NOEVENT:
+                events.insert(0, event)
+                idle = False
+        else:
+            events = pygame.event.get()
+        
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False
+            elif event.type in (pygame.MOUSEBUTTONDOWN, pygame.FINGERDOWN):
+                metrics.touches += 1
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     running = False
@@ -341,9 +518,10 @@ def main():
                     # Toggle fullscreen
                     fullscreen = not fullscreen
                     if fullscreen:
-                        screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.FULLSCREEN)
+                        screen = pacer.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.FULLSCREEN)
                     else:
-                        screen = pygame.display.set_mode((1200, 800))
+                        screen = pacer.set_mode((1200, 800))
+                    viewport.resize(*screen.get_size())
                 elif event.key == pygame.K_UP:
                     reptile.update_speed(0.02)
                 elif event.key == pygame.K_DOWN:
@@ -351,30 +529,93 @@ def main():
                 elif event.key == pygame.K_c:
                     color_name = reptile.change_color()
                     print(f"Color changed to: {color_name}")
+                elif event.key == pygame.K_h:
+                    reptile.toggle_color_animation()
+                elif event.key == pygame.K_p:
+                    print(pacer.report())
+                    pacer.reset()
+                elif event.key == pygame.K_F12 and capture is None:
+                    capture = profiler.Capture()
+                elif event.key == pygame.K_F10 and audit is None:
+                    audit = alloc_audit.AllocationAudit()
         
         # Get cursor position
-        mouse_x, mouse_y = pygame.mouse.get_pos()
+        if soak is None:
+            mouse_x, mouse_y = pygame.mouse.get_pos()
+        else:
+            mouse_x, mouse_y = soak.cursor(SCREEN_WIDTH, SCREEN_HEIGHT)
         
         # Update reptile position to follow cursor
-        reptile.update(mouse_x, mouse_y)
-        
-        # Clear screen
-        screen.fill(BLACK)
-        
-        # Draw reptile
-        reptile.draw(screen)
-        
-        # Draw cursor position indicator
-        pygame.draw.circle(screen, reptile.current_color, (mouse_x, mouse_y), 5, 2)
-        
-        # Draw UI
-        draw_ui(screen, reptile, font)
-        
-        pygame.display.flip()
-        clock.tick(FPS)
+        profiler.tag("update")
+        metrics.begin_update()
+        steps = FPS // IDLE_FPS if idle else 1
+        if idle:
+            reptile.update(mouse_x, mouse_y, steps=steps)
+        else:
+            reptile.update(mouse_x, mouse_y)
+            idle = reptile.is_settled()
+        
+        # Idle ticks keep the last full frame (the settled one) and only rebuild and
+        # present the head and breathing region, unless the tail moved or an asset
+        # may have landed since. A soak only draws now and then.
+        drawing = soak is None or soak.draws()
+        area = None
+        if idle and not loading and not stale and not reptile.tail_pulled:
+            area = reptile.idle_area().clip(screen.get_rect())
+        
+        metrics.begin_draw()
+        if drawing:
+            # Draw reptile (the indexed frame covers the whole screen, no clear needed)
+            reptile.draw(screen, viewport, area)
+            
+            # Draw cursor position indicator
+            profiler.tag("ui")
+            screen.set_clip(area)
+            pygame.draw.circle(screen, reptile.current_color, (mouse_x, mouse_y), 5, 2)
+            
+            # Draw UI (once its font is loaded)
+            if hud.value is not None:
+                draw_ui(screen, reptile, hud.value, 0 if idle else pacer.clock.get_fps())
+            screen.set_clip(None)
+        
+        metrics.end_draw()
+        profiler.tag("flip")
+        if not drawing:
+            pass
+        elif area is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(area)
+        stale = not drawing
+        loading = bool(assets.pending)
+        assets.poll()  # switch in whatever finished loading, between frames
+        if capture is not None and capture.frame():
+            capture = None
+        if audit is not None and audit.frame():
+            audit = None
+        if hot_path is not None:
+            hot_path.frame()
+        if soak is not None and soak.frame(steps):
+            running = False
+        profiler.tag("pacing")
+        if idle:
+            # Idle frames are paced by event.wait, keep them out of the stats
+            pacer.pause()
+            metrics.frame_done(None)
+        else:
+            pacer.tick()
+            metrics.frame_done(pacer.last_interval)  # None on the first frame after idling
     
+    if capture is not None:
+        capture.finish()
+    if audit is not None:
+        audit.finish()
+    print(pacer.report())
+    assets.close()
+    if exporter is not None:
+        exporter.close()
     pygame.quit()
-    sys.exit()
+    sys.exit(soak.finish() if soak is not None else None)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,252 @@
+import argparse
+import asyncio
+import struct
+import time
+from array import array
+
+from reptile_cursor import SkeletalReptile, WIDTH, HEIGHT
+
+# Local multi-client mode: every client streams its cursor over UDP and steers
+# its own reptile; the server simulates all of them and broadcasts compact,
+# delta-compressed snapshots to every viewer.
+#
+# Client -> server packets
+#   b'I' seq:u32 x:f32 y:f32 sent:f64     cursor input (sent is echoed back)
+#   b'V'                                  register as viewer
+#   b'B'                                  leave (drops reptile and viewer)
+#
+# Server -> viewer packets
+#   b'S' tick:u32 count:u16 removed:u16 [id:u16]*removed [entry]*count
+#   entry = id:u16 kind:u8 base:u32 echo:f64 npoints:u8 payload
+#     kind FULL  -> npoints * (x:i16, y:i16) in 1/QUANT pixels
+#     kind DELTA -> change mask, then (dx:i8, dy:i8) for each changed point,
+#                   relative to the snapshot sent at tick `base`
+
+DEFAULT_PORT = 47800
+TICK_HZ = 60
+QUANT = 4
+KEYFRAME_INTERVAL = 30
+CLIENT_TIMEOUT = 5.0
+MAX_PACKET = 1200
+
+FULL = 0
+DELTA = 1
+
+INPUT = struct.Struct('<cIffd')
+SNAPSHOT_HEADER = struct.Struct('<cIHH')
+ENTRY_HEADER = struct.Struct('<HBIdB')
+
+
+def q(value):
+    return max(-32768, min(32767, int(value * QUANT)))
+
+
+def quantize(reptile):
+    # Head followed by every spine segment, as flat int16 x/y pairs
+    points = array('h', (q(reptile.x), q(reptile.y)))
+    for i in range(reptile.num_segments):
+        points.append(q(reptile.seg_x[i]))
+        points.append(q(reptile.seg_y[i]))
+    return points
+
+
+def encode_entry(reptile_id, tick, echo, points, previous):
+    npoints = len(points) // 2
+    if previous is not None and len(previous) == len(points):
+        mask = bytearray((npoints + 7) // 8)
+        deltas = array('b')
+        try:
+            for i in range(npoints):
+                dx = points[2 * i] - previous[2 * i]
+                dy = points[2 * i + 1] - previous[2 * i + 1]
+                if dx or dy:
+                    mask[i >> 3] |= 1 << (i & 7)
+                    deltas.append(dx)
+                    deltas.append(dy)
+        except OverflowError:
+            # Jumped too far for an int8 delta, fall back to a full entry
+            pass
+        else:
+            return ENTRY_HEADER.pack(reptile_id, DELTA, tick - 1, echo, npoints) + bytes(mask) + deltas.tobytes()
+    return ENTRY_HEADER.pack(reptile_id, FULL, tick, echo, npoints) + points.tobytes()
+
+
+def decode_snapshot(data, states):
+    # Applies a snapshot packet to `states` ({id: [tick, echo, points]}).
+    # Returns (tick, updated ids); deltas whose base we never saw are skipped
+    # and picked up again at the next keyframe.
+    _, tick, count, removed = SNAPSHOT_HEADER.unpack_from(data, 0)
+    offset = SNAPSHOT_HEADER.size
+    for reptile_id in struct.unpack_from('<%dH' % removed, data, offset):
+        states.pop(reptile_id, None)
+    offset += 2 * removed
+
+    updated = []
+    for _ in range(count):
+        reptile_id, kind, base, echo, npoints = ENTRY_HEADER.unpack_from(data, offset)
+        offset += ENTRY_HEADER.size
+        if kind == FULL:
+            points = array('h')
+            points.frombytes(data[offset:offset + npoints * 4])
+            offset += npoints * 4
+            states[reptile_id] = [tick, echo, points]
+            updated.append(reptile_id)
+            continue
+
+        mask = data[offset:offset + (npoints + 7) // 8]
+        offset += len(mask)
+        changed = sum(bin(b).count('1') for b in mask)
+        deltas = array('b')
+        deltas.frombytes(data[offset:offset + changed * 2])
+        offset += changed * 2
+        state = states.get(reptile_id)
+        if state is None or state[0] != base:
+            continue
+        points = state[2]
+        j = 0
+        for i in range(npoints):
+            if mask[i >> 3] & (1 << (i & 7)):
+                points[2 * i] += deltas[j]
+                points[2 * i + 1] += deltas[j + 1]
+                j += 2
+        state[0] = tick
+        state[1] = echo
+        updated.append(reptile_id)
+    return tick, updated
+
+
+class Client:
+    def __init__(self, reptile_id, addr):
+        self.id = reptile_id
+        self.addr = addr
+        self.reptile = SkeletalReptile(WIDTH // 2, HEIGHT // 2)
+        self.cursor = (WIDTH // 2, HEIGHT // 2)
+        self.seq = -1
+        self.echo = 0.0
+        self.last_seen = time.monotonic()
+        self.sent = None
+
+
+class ReptileServer(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.transport = None
+        self.clients = {}
+        self.viewers = set()
+        self.removed = []
+        self.next_id = 1
+        self.tick_count = 0
+        self.inputs = 0
+        self.bytes_out = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        kind = data[:1]
+        if kind == b'I' and len(data) == INPUT.size:
+            _, seq, x, y, sent = INPUT.unpack(data)
+            client = self.clients.get(addr)
+            if client is None:
+                client = Client(self.next_id, addr)
+                self.next_id = self.next_id % 0xFFFF + 1
+                self.clients[addr] = client
+            client.last_seen = time.monotonic()
+            if seq > client.seq:  # ignore reordered packets
+                client.seq = seq
+                client.cursor = (x, y)
+                client.echo = sent
+            self.inputs += 1
+        elif kind == b'V':
+            self.viewers.add(addr)
+        elif kind == b'B':
+            self.viewers.discard(addr)
+            self.drop(addr)
+
+    def drop(self, addr):
+        client = self.clients.pop(addr, None)
+        if client is not None:
+            self.removed.append(client.id)
+
+    def tick(self):
+        self.tick_count += 1
+        tick = self.tick_count
+        now = time.monotonic()
+        for addr in [a for a, c in self.clients.items() if now - c.last_seen > CLIENT_TIMEOUT]:
+            self.drop(addr)
+
+        keyframe = tick % KEYFRAME_INTERVAL == 0
+        entries = []
+        for client in self.clients.values():
+            client.reptile.update(client.cursor)
+            points = quantize(client.reptile)
+            entries.append(encode_entry(client.id, tick, client.echo, points, None if keyframe else client.sent))
+            client.sent = points
+
+        if self.viewers:
+            self.broadcast(tick, entries)
+        self.removed = []
+
+    def broadcast(self, tick, entries):
+        # Split into datagrams that stay under MAX_PACKET; each one is self-contained
+        removed = struct.pack('<%dH' % len(self.removed), *self.removed)
+        packets = []
+        chunk = []
+        size = SNAPSHOT_HEADER.size + len(removed)
+        for entry in entries:
+            if chunk and size + len(entry) > MAX_PACKET:
+                packets.append((chunk, removed))
+                chunk, size, removed = [], SNAPSHOT_HEADER.size, b''
+            chunk.append(entry)
+            size += len(entry)
+        if chunk or removed:
+            packets.append((chunk, removed))
+
+        for chunk, removed in packets:
+            data = SNAPSHOT_HEADER.pack(b'S', tick, len(chunk), len(removed) // 2) + removed + b''.join(chunk)
+            for viewer in self.viewers:
+                self.transport.sendto(data, viewer)
+                self.bytes_out += len(data)
+
+
+async def serve(host='127.0.0.1', port=DEFAULT_PORT, tick_hz=TICK_HZ, report=5.0, started=None):
+    loop = asyncio.get_running_loop()
+    transport, server = await loop.create_datagram_endpoint(ReptileServer, local_addr=(host, port))
+    if started is not None:
+        started.set_result(server)
+    period = 1.0 / tick_hz
+    next_tick = loop.time()
+    last_report = loop.time()
+    try:
+        while True:
+            server.tick()
+            next_tick += period
+            now = loop.time()
+            if report and now - last_report >= report:
+                elapsed = now - last_report
+                print(f"clients={len(server.clients)} viewers={len(server.viewers)} "
+                      f"inputs/s={server.inputs / elapsed:.0f} "
+                      f"updates/s={len(server.clients) * tick_hz} "
+                      f"out={server.bytes_out / elapsed / 1024:.1f} KiB/s")
+                server.inputs = 0
+                server.bytes_out = 0
+                last_report = now
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+    finally:
+        transport.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-client reptile server (UDP)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--tick', type=int, default=TICK_HZ, help="simulation/broadcast rate in Hz")
+    args = parser.parse_args()
+    print(f"Reptile server on udp://{args.host}:{args.port} at {args.tick} Hz")
+    try:
+        asyncio.run(serve(args.host, args.port, args.tick))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import struct
+from multiprocessing import shared_memory, resource_tracker
+import pygame
+
+# Frame output into shared memory, for compositing the reptile in another process.
+#
+# One shared memory block holds a small header and two frame buffers:
+#
+#   header   magic:4s version:u32 width:u32 height:u32 pitch:u32 seq:u64
+#   frame 0  height * pitch bytes, 32-bit BGRA
+#   frame 1  same
+#
+# The writer draws straight into the back buffer through a pygame Surface
+# made with pygame.image.frombuffer (no copy, no encoding) and publish()
+# bumps `seq`. The front buffer is always frame[seq % 2]; right after the
+# next publish the writer starts drawing into it again, so a reader has one
+# frame's time to use it and can tell afterwards whether it made it: seq
+# must not have moved. See shm_reader.py for a consumer.
+
+MAGIC = b'RPFB'
+VERSION = 1
+HEADER = struct.Struct('<4sIIIIQ')
+SEQ_OFFSET = HEADER.size - 8
+FRAMES_OFFSET = 64  # keeps the frames cache-line aligned
+FORMAT = 'BGRA'
+DEFAULT_NAME = "reptile_frames"
+
+
+def frame_offset(index, height, pitch):
+    return FRAMES_OFFSET + index * height * pitch
+
+
+class SharedFrameOutput:
+    def __init__(self, size, name=DEFAULT_NAME, force=False):
+        width, height = size
+        self.size = size
+        self.pitch = width * 4
+        total = frame_offset(2, height, self.pitch)
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=total)
+        except FileExistsError:
+            # Another writer may be using it; only take it over when told to
+            # (left over from a writer that didn't shut down cleanly)
+            if not force:
+                raise FileExistsError(f"shared memory '{name}' already exists; another writer may be running") from None
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=total)
+        self.name = self.shm.name
+        self.seq = 0
+        HEADER.pack_into(self.shm.buf, 0, MAGIC, VERSION, width, height, self.pitch, self.seq)
+        self.frames = []
+        for index in range(2):
+            start = frame_offset(index, height, self.pitch)
+            self.frames.append(self.shm.buf[start:start + height * self.pitch])
+        self.surfaces = [pygame.image.frombuffer(frame, size, FORMAT) for frame in self.frames]
+
+    def back(self):
+        # The surface to draw the next frame into
+        return self.surfaces[(self.seq + 1) % 2]
+
+    def publish(self):
+        self.seq += 1
+        struct.pack_into('<Q', self.shm.buf, SEQ_OFFSET, self.seq)
+        return self.back()
+
+    def close(self):
+        # Surfaces hold exports of the buffer; drop them before closing
+        self.surfaces = []
+        for frame in self.frames:
+            frame.release()
+        self.frames = []
+        self.shm.close()
+        self.shm.unlink()
+
+
+def attach(name):
+    # Open an existing block without taking ownership of it
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 every attach is tracked and would be unlinked on exit
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class SharedFrameReader:
+    def __init__(self, name=DEFAULT_NAME):
+        self.shm = attach(name)
+        magic, version, width, height, pitch, _ = HEADER.unpack_from(self.shm.buf, 0)
+        if magic != MAGIC or version != VERSION:
+            self.shm.close()
+            raise ValueError(f"'{name}' is not a reptile frame buffer")
+        self.size = (width, height)
+        self.pitch = pitch
+        self.frames = []
+        for index in range(2):
+            start = frame_offset(index, height, pitch)
+            self.frames.append(self.shm.buf[start:start + height * pitch])
+        self.surfaces = [pygame.image.frombuffer(frame, self.size, FORMAT) for frame in self.frames]
+        self.last_seq = 0
+
+    def seq(self):
+        return struct.unpack_from('<Q', self.shm.buf, SEQ_OFFSET)[0]
+
+    def latest(self):
+        # (seq, surface) of the newest published frame, or None if nothing new.
+        # Use the surface, then ask intact(seq) whether the writer got to it meanwhile.
+        seq = self.seq()
+        if seq == self.last_seq or seq == 0:
+            return None
+        self.last_seq = seq
+        return seq, self.surfaces[seq % 2]
+
+    def intact(self, seq):
+        return self.seq() == seq
+
+    def close(self):
+        self.surfaces = []
+        for frame in self.frames:
+            frame.release()
+        self.frames = []
+        self.shm.close()
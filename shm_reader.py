@@ -0,0 +1,118 @@
+import argparse
+import multiprocessing
+import time
+import pygame
+
+from shm_output import SharedFrameOutput, SharedFrameReader, DEFAULT_NAME
+
+# Consumers for shared memory frames (shm_output.py)
+#
+#   python reptile_cursor.py --shm &       headless reptile writing frames
+#   python shm_reader.py view              show them in a window, like a compositor would
+#   python shm_reader.py bench             writer process + reader, frames/s and torn frames
+
+
+def run_view(args):
+    pygame.init()
+    reader = SharedFrameReader(args.name)
+    screen = pygame.display.set_mode(reader.size)
+    pygame.display.set_caption(f"shared memory: {args.name}")
+    clock = pygame.time.Clock()
+    frames = torn = 0
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                running = False
+        got = reader.latest()
+        if got is not None:
+            seq, surface = got
+            # The one copy a compositor can't avoid: into its own output
+            screen.blit(surface, (0, 0))
+            if reader.intact(seq):
+                frames += 1
+                pygame.display.flip()
+            else:
+                torn += 1
+        clock.tick(240)
+    print(f"shown {frames} frames, dropped {torn} torn ones")
+    screen = surface = got = None
+    reader.close()
+    pygame.quit()
+
+
+def synthetic_writer(name, size, seconds, fps, ready, force):
+    # Redraws a moving bar at `fps`, or as fast as it can with fps=0 (worst case for a reader)
+    output = SharedFrameOutput(size, name, force)
+    ready.set()
+    surface = output.back()
+    clock = pygame.time.Clock()
+    start = time.perf_counter()
+    frames = 0
+    while time.perf_counter() - start < seconds:
+        if fps:
+            clock.tick_busy_loop(fps)
+        surface.fill((0, 0, 0))
+        x = frames * 7 % size[0]
+        pygame.draw.rect(surface, (200, 200, 200), (x, 0, 16, size[1]))
+        surface = output.publish()
+        frames += 1
+    elapsed = time.perf_counter() - start
+    print(f"writer: {frames} frames in {elapsed:.1f}s = {frames / elapsed:.0f} fps")
+    time.sleep(0.5)  # let the reader notice the end before the block goes away
+    surface = None
+    output.close()
+
+
+def run_bench(args):
+    size = tuple(int(v) for v in args.size.split("x"))
+    ready = multiprocessing.Event()
+    writer = multiprocessing.Process(target=synthetic_writer,
+                                     args=(args.name, size, args.seconds, args.fps, ready, args.force))
+    writer.start()
+    while not ready.wait(0.1):
+        if not writer.is_alive():
+            raise SystemExit("writer failed to start (see above)")
+    reader = SharedFrameReader(args.name)
+    local = bytearray(reader.pitch * reader.size[1])
+    frames = torn = 0
+    start = time.perf_counter()
+    idle_since = start
+    while time.perf_counter() - idle_since < 0.25:
+        got = reader.latest()
+        if got is None:
+            continue
+        seq, surface = got
+        local[:] = reader.frames[seq % 2]  # consume: one memcpy, like a texture upload
+        if reader.intact(seq):
+            frames += 1
+        else:
+            torn += 1
+        idle_since = time.perf_counter()
+    elapsed = idle_since - start
+    writer.join()
+    frame_bytes = reader.size[0] * reader.size[1] * 4
+    print(f"reader: {frames} frames in {elapsed:.1f}s = {frames / elapsed:.0f} fps, "
+          f"{frames * frame_bytes / elapsed / 2 ** 30:.2f} GiB/s consumed, {torn} torn (discarded)")
+    surface = got = None
+    reader.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared memory frame reader")
+    parser.add_argument('mode', choices=['view', 'bench'])
+    parser.add_argument('--name', default=DEFAULT_NAME, help="shared memory block name")
+    parser.add_argument('--size', default="1920x1080", help="bench: frame size")
+    parser.add_argument('--seconds', type=float, default=5, help="bench: how long the writer runs")
+    parser.add_argument('--fps', type=int, default=0, help="bench: writer frame rate, 0 = as fast as possible")
+    parser.add_argument('--force', action='store_true',
+                        help="bench: take over a block of that name left behind by a crashed writer")
+    args = parser.parse_args()
+    if args.mode == 'view':
+        run_view(args)
+    else:
+        run_bench(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import struct
+import sys
+from array import array
+from operator import attrgetter
+
+# Versioned binary reptile state.
+#
+# A SkeletalReptile keeps all of its numeric state in one flat buffer:
+#
+#   header   magic:4s version:u16 kind:u16 num_segments:u16 leg_count:u16 reserved:u32
+#   scalars  SCALARS as float64
+#   arrays   seg_x, seg_y, seg_size (num_segments each), leg_angles, leg_speeds (leg_count each)
+#
+# The arrays are memoryviews cast straight onto that buffer, so a snapshot is
+# a single bytes() copy and a restore is a single slice assignment. The same
+# layout can live in shared memory or be sent between processes as-is.
+#
+# Everything is little-endian. The arrays are native memoryview casts, so
+# on a big-endian machine they would silently disagree with the header;
+# the module refuses to load there instead.
+
+if sys.byteorder != 'little':
+    raise ImportError("reptile snapshots are little-endian and the state arrays are native views")
+
+MAGIC = b'RPTL'
+VERSION = 1
+HEADER = struct.Struct('<4sHHHHI')
+
+KIND_SKELETAL = 1
+KIND_SKELETON = 2
+
+SCALARS = ('x', 'y', 'target_x', 'target_y', 'speed', 'max_speed', 'movement_lag', 'segment_spacing')
+get_scalars = attrgetter(*SCALARS)  # one tuple per call, no list
+SCALAR_BLOCK = struct.Struct('<%dd' % len(SCALARS))
+ARRAYS_OFFSET = HEADER.size + SCALAR_BLOCK.size
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def state_size(num_segments, leg_count):
+    return ARRAYS_OFFSET + 8 * (3 * num_segments + 2 * leg_count)
+
+
+def init_header(buf, num_segments, leg_count):
+    HEADER.pack_into(buf, 0, MAGIC, VERSION, KIND_SKELETAL, num_segments, leg_count, 0)
+
+
+def state_views(buf, num_segments, leg_count):
+    # (seg_x, seg_y, seg_size, leg_angles, leg_speeds) as float64 views onto buf
+    mv = memoryview(buf)
+    views = []
+    offset = ARRAYS_OFFSET
+    for count in (num_segments, num_segments, num_segments, leg_count, leg_count):
+        views.append(mv[offset:offset + 8 * count].cast('d'))
+        offset += 8 * count
+    return views
+
+
+def read_header(blob):
+    if len(blob) < HEADER.size:
+        raise SnapshotError("snapshot too short")
+    magic, version, kind, num_segments, leg_count, _ = HEADER.unpack_from(blob, 0)
+    if magic != MAGIC:
+        raise SnapshotError("not a reptile snapshot")
+    if version != VERSION:
+        raise SnapshotError(f"unsupported snapshot version {version}")
+    return kind, num_segments, leg_count
+
+
+def check(blob, num_segments, leg_count):
+    kind, n, legs = read_header(blob)
+    if kind != KIND_SKELETAL or n != num_segments or legs != leg_count:
+        raise SnapshotError(f"snapshot layout {kind}/{n}/{legs} does not match {KIND_SKELETAL}/{num_segments}/{leg_count}")
+    if len(blob) != state_size(n, legs):
+        raise SnapshotError("snapshot size does not match its header")
+
+
+def store_scalars(reptile):
+    SCALAR_BLOCK.pack_into(reptile.state, HEADER.size, *get_scalars(reptile))
+
+
+def load_scalars(reptile):
+    for name, value in zip(SCALARS, SCALAR_BLOCK.unpack_from(reptile.state, HEADER.size)):
+        setattr(reptile, name, value)
+
+
+# --- ReptileSkeleton (reptile_new.py) ---
+# Its positions are lists of tuples that pygame draws directly, so it is
+# packed by copy rather than backed by the buffer.
+
+SKELETON_SCALARS = ('x', 'y', 'target_x', 'target_y', 'speed', 'walk_cycle', 'body_bob',
+                    'idle_timer', 'idle_head_sway', 'breathing_cycle')
+SKELETON_BLOCK = struct.Struct('<%ddB7x' % len(SKELETON_SCALARS))  # padded to keep coords 8-byte aligned
+
+
+def skeleton_size(spine, tail):
+    return HEADER.size + SKELETON_BLOCK.size + 16 * (spine + tail)
+
+
+def pack_skeleton(reptile):
+    coords = array('d')
+    for positions in (reptile.spine_positions, reptile.tail_positions):
+        for x, y in positions:
+            coords.append(x)
+            coords.append(y)
+    header = HEADER.pack(MAGIC, VERSION, KIND_SKELETON, len(reptile.spine_positions), len(reptile.tail_positions), 0)
+    block = SKELETON_BLOCK.pack(*[getattr(reptile, name) for name in SKELETON_SCALARS], reptile.is_moving)
+    return header + block + coords.tobytes()
+
+
+def unpack_skeleton(reptile, blob):
+    kind, spine, tail = read_header(blob)
+    if kind != KIND_SKELETON or spine != len(reptile.spine_positions) or tail != len(reptile.tail_positions):
+        raise SnapshotError("snapshot does not match this skeleton")
+    if len(blob) != skeleton_size(spine, tail):
+        raise SnapshotError("snapshot size does not match its header")
+    values = SKELETON_BLOCK.unpack_from(blob, HEADER.size)
+    for name, value in zip(SKELETON_SCALARS, values):
+        setattr(reptile, name, value)
+    reptile.is_moving = bool(values[-1])
+    coords = memoryview(blob)[HEADER.size + SKELETON_BLOCK.size:].cast('d')
+    # Written into the existing [x, y] pairs, which the skeleton updates in place
+    for i, point in enumerate(reptile.spine_positions):
+        point[0] = coords[2 * i]
+        point[1] = coords[2 * i + 1]
+    base = 2 * spine
+    for i, point in enumerate(reptile.tail_positions):
+        point[0] = coords[base + 2 * i]
+        point[1] = coords[base + 2 * i + 1]
+
+
+class History:
+    # Fixed-size ring of snapshots for rewind. Slots are preallocated, so
+    # recording a frame is one memcpy and allocates nothing.
+    def __init__(self, size, frames):
+        self.slots = [bytearray(size) for _ in range(frames)]
+        self.head = 0
+        self.count = 0
+
+    def push(self, reptile):
+        store_scalars(reptile)
+        self.slots[self.head][:] = reptile.state
+        self.head = (self.head + 1) % len(self.slots)
+        self.count = min(self.count + 1, len(self.slots))
+
+    def pop(self):
+        if self.count == 0:
+            return None
+        self.head = (self.head - 1) % len(self.slots)
+        self.count -= 1
+        return self.slots[self.head]
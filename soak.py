@@ -0,0 +1,325 @@
+import gc
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter
+from statistics import median
+
+import pygame
+
+# Soak test: does a game stay flat over weeks of running?
+#
+# Kiosks run for weeks, so a slow leak (surfaces, lists that keep growing)
+# or numeric drift (a phase that keeps counting up) matters even when an
+# hour looks fine. With REPTILE_SOAK set a game runs headless and uncapped,
+# follows a scripted cursor instead of the mouse and simulates days of
+# 60 fps frames as fast as the machine goes:
+#
+#   REPTILE_SOAK=2d                  simulated time (s, m, h, d; a bare number is frames)
+#   REPTILE_SOAK_CURSOR=cursor.txt   replay a recorded cursor, looped (python soak.py record cursor.txt)
+#   REPTILE_SOAK_LIMITS=rss=32,objects=2000,surfaces=300,cost=1.5
+#   REPTILE_SOAK_DRAW=60             draw and present one frame in this many (1 draws all)
+#
+# Drawing and presenting cost far more than the simulation, so by default a
+# game only draws one frame per simulated second (draws()): the run goes at
+# simulation speed, and the draw path, its caches and surfaces still run
+# thousands of times over a long soak.
+#
+# The synthetic cursor loops through two minutes of wandering, resting (so
+# the idle animations run), darting between points and circling one spot
+# (the head keeps touching it).
+#
+# About 50 times over the run it samples resident memory, live objects and
+# surfaces (after a full collection), the mean cost per frame, and whatever
+# values the game asked to watch (phase accumulators, positions). The sample
+# a tenth of the way in, once caches and pools have filled, is the baseline.
+# The run fails, with exit status 1, when by the end
+#
+#   rss       resident memory grew more than this many MB
+#   objects   live objects grew by more than this
+#   surfaces  live surfaces grew by more than this
+#   cost      time per frame grew more than this many times
+#
+# or a watched value went past its bound or stopped being a number.
+
+FPS = 60
+SAMPLES = 50
+COST_SAMPLES = 5  # frame cost compares medians over this many samples
+CYCLE = 120 * FPS  # synthetic cursor loop, frames
+DRAW_EVERY = FPS   # frames per drawn frame
+# surfaces leaves room for the HUD's text cache (text_cache.py) to fill up:
+# uncapped, the FPS line shows a lot more distinct values than at 60 fps
+LIMITS = {"rss": 32.0, "objects": 2000, "surfaces": 300, "cost": 1.5}
+UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_duration(text):
+    # Frames: "2d", "12h", "90m", "30s", or a plain frame count
+    text = text.strip().lower()
+    if text[-1:] in UNITS:
+        return int(float(text[:-1]) * UNITS[text[-1]] * FPS)
+    return int(text)
+
+
+def parse_limits(text):
+    limits = dict(LIMITS)
+    for item in filter(None, (text or "").split(",")):
+        name, _, value = item.partition("=")
+        if name.strip() not in limits:
+            raise ValueError(f"unknown soak limit '{name}' (have {', '.join(limits)})")
+        limits[name.strip()] = float(value)
+    return limits
+
+
+def simulated(frames):
+    # "1d 02:30" of 60 fps frames
+    minutes = frames // (FPS * 60)
+    days, minutes = divmod(minutes, 24 * 60)
+    return f"{days}d {minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def resident_mb():
+    # Current RSS on Linux; elsewhere the peak is the closest thing there is
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def census():
+    # Live objects by type after a full collection. Surfaces aren't tracked
+    # by the collector, so they're counted through whatever refers to them.
+    gc.collect()
+    objects = gc.get_objects()
+    types = Counter(type(obj).__name__ for obj in objects)
+    surfaces = set()
+    for obj in objects:
+        for ref in gc.get_referents(obj):
+            if isinstance(ref, pygame.Surface):
+                surfaces.add(id(ref))
+    return len(objects), len(surfaces), types
+
+
+def load_cursor(path):
+    # One "x y" per line, as fractions of the screen
+    with open(path) as f:
+        points = [tuple(map(float, line.split())) for line in f if line.strip()]
+    if not points:
+        raise ValueError(f"no cursor positions in '{path}'")
+    return points
+
+
+class Soak:
+    def __init__(self, frames, limits=None, recorded=None, draw_every=DRAW_EVERY):
+        self.frames = frames
+        self.limits = dict(LIMITS) if limits is None else limits
+        self.recorded = recorded
+        self.draw_every = max(1, draw_every)
+        self.next_draw = 0
+        self.every = max(1, frames // SAMPLES)
+        self.warm_up = max(self.every, frames // 10)
+        self.frame_count = 0
+        self.next_sample = self.every
+        self.watched = []  # (name, getter, bound)
+        self.samples = []  # (frame, rss, objects, surfaces, ms per frame, watched values)
+        self.baseline = None
+        self.baseline_types = None
+        self.failures = []
+        self.cycle = -1
+        self.position = None
+        self.started = self.last = time.perf_counter()
+        self.window = 0.0
+        self.window_frames = 0
+        print(f"Soak: simulating {simulated(frames)} ({frames} frames), "
+              f"cursor {'recorded' if recorded else 'synthetic'}, sample every {self.every} frames, "
+              f"draw every {self.draw_every}")
+
+    def watch(self, name, getter, bound):
+        # getter() has to stay a number within +-bound for the whole run
+        self.watched.append((name, getter, bound))
+
+    def cursor(self, width, height):
+        # Where the mouse is this frame; moving it posts a MOUSEMOTION like a
+        # real mouse would (that's what wakes an idling loop)
+        position = self.scripted(width, height)
+        if position != self.position:
+            if self.position is not None:
+                rel = (position[0] - self.position[0], position[1] - self.position[1])
+                pygame.event.post(pygame.event.Event(pygame.MOUSEMOTION, pos=position, rel=rel, buttons=(0, 0, 0)))
+            self.position = position
+        return position
+
+    def draws(self):
+        # Whether to draw and present this frame (the simulation runs every frame)
+        if self.frame_count >= self.next_draw:
+            self.next_draw = self.frame_count + self.draw_every
+            return True
+        return False
+
+    def scripted(self, width, height):
+        frame = self.frame_count
+        if self.recorded is not None:
+            fx, fy = self.recorded[frame % len(self.recorded)]
+            return int(fx * width), int(fy * height)
+        cycle, t = divmod(frame, CYCLE)
+        if cycle != self.cycle:
+            # New spots each loop, the same ones every run
+            rng = random.Random(cycle)
+            self.cycle = cycle
+            self.spots = [(rng.uniform(0.1, 0.9) * width, rng.uniform(0.1, 0.9) * height) for _ in range(40)]
+            self.turn = rng.uniform(0, math.tau)
+        if t < CYCLE * 0.4:
+            # Wander over the whole screen
+            s = t / FPS
+            x = width / 2 + math.cos(s * 0.9 + self.turn) * width * 0.4
+            y = height / 2 + math.sin(s * 1.3) * height * 0.4
+        elif t < CYCLE * 0.6:
+            # Rest: the reptile settles and idles
+            x, y = self.spots[0]
+        elif t < CYCLE * 0.8:
+            # Dart to a new spot every 3/4 s
+            x, y = self.spots[1 + (t // 45) % (len(self.spots) - 1)]
+        else:
+            # Circle one spot, close enough that the head keeps touching it
+            x, y = self.spots[0]
+            x += math.cos(t * 0.05) * 30
+            y += math.sin(t * 0.05) * 30
+        return int(x), int(y)
+
+    def frame(self, steps=1):
+        # Call once per frame, at the end; True once the run is done.
+        # steps: frames of simulated time this one stood for (low-rate idle frames)
+        now = time.perf_counter()
+        self.window += now - self.last
+        self.window_frames += 1
+        self.frame_count += steps
+        if self.frame_count >= self.next_sample or self.frame_count >= self.frames:
+            self.next_sample += self.every
+            self.sample()
+            self.last = time.perf_counter()  # the census isn't frame cost
+        else:
+            self.last = now
+        return self.frame_count >= self.frames
+
+    def sample(self):
+        objects, surfaces, types = census()
+        cost = self.window / max(1, self.window_frames) * 1000
+        self.window = 0.0
+        self.window_frames = 0
+        values = []
+        for name, getter, bound in self.watched:
+            value = getter()
+            values.append(value)
+            reported = any(f.startswith(name + " ") for f in self.failures)
+            if not (math.isfinite(value) and abs(value) <= bound) and not reported:
+                self.failures.append(f"{name} = {value!r} at {simulated(self.frame_count)}, bound {bound:g}")
+        # All numbers, so the collector stops tracking the row and it doesn't count itself
+        row = (self.frame_count, resident_mb(), objects, surfaces, cost, tuple(values))
+        self.samples.append(row)
+        if self.baseline is None and self.frame_count >= self.warm_up:
+            self.baseline = row
+            self.baseline_types = types
+        watched = "".join(f"  {name} {value:.3g}" for (name, _, _), value in zip(self.watched, values))
+        rss = f"{row[1]:.1f}MB" if row[1] is not None else "-"
+        print(f"  {simulated(self.frame_count)}  rss {rss}  objects {objects}  surfaces {surfaces}  "
+              f"{cost:.2f}ms/frame{watched}")
+
+    def finish(self):
+        # Prints the verdict; returns the exit status (0 pass, 1 fail)
+        elapsed = time.perf_counter() - self.started
+        speedup = self.frame_count / FPS / max(elapsed, 1e-9)
+        print(f"Soak: {simulated(self.frame_count)} simulated in {elapsed / 60:.1f} min ({speedup:.0f}x real time)")
+        failures = list(self.failures)
+        if self.baseline is None or self.samples[-1] is self.baseline:
+            failures.append("too short to compare against the baseline")
+        else:
+            limits = self.limits
+            frame, rss, objects, surfaces, _, _ = self.baseline
+            end = self.samples[-1]
+            if rss is not None and end[1] - rss > limits["rss"]:
+                failures.append(f"RSS grew {end[1] - rss:.1f}MB ({rss:.1f} -> {end[1]:.1f}), limit {limits['rss']:g}")
+            if end[2] - objects > limits["objects"]:
+                grown = (census()[2] - self.baseline_types).most_common(5)
+                failures.append(f"{end[2] - objects} more live objects, limit {limits['objects']:g} "
+                                f"(most grown: {', '.join(f'{name} +{count}' for name, count in grown)})")
+            if end[3] - surfaces > limits["surfaces"]:
+                failures.append(f"{end[3] - surfaces} more live surfaces ({surfaces} -> {end[3]}), "
+                                f"limit {limits['surfaces']:g}")
+            # Frame cost is noisy: the median of a few samples at either end
+            later = self.samples[self.samples.index(self.baseline):]
+            before = median(row[4] for row in later[:COST_SAMPLES])
+            after = median(row[4] for row in later[-COST_SAMPLES:])
+            if after > before * limits["cost"]:
+                failures.append(f"frame cost grew {after / before:.2f}x ({before:.2f} -> {after:.2f}ms), "
+                                f"limit {limits['cost']:g}x")
+            print(f"  baseline at {simulated(frame)}, compared against {simulated(end[0])}")
+        for failure in failures:
+            print("  FAIL: " + failure)
+        print("Soak: " + ("FAIL" if failures else "PASS"))
+        return 1 if failures else 0
+
+
+def soak_from_env(duration=None):
+    # REPTILE_SOAK=2d (or `duration`) turns soak mode on; None when off.
+    # Call before the pacer and the display are set up: it switches to the
+    # dummy video and audio drivers and to uncapped pacing.
+    duration = duration or os.environ.get("REPTILE_SOAK")
+    if not duration:
+        return None
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    os.environ["REPTILE_PACING"] = "uncapped"
+    if pygame.display.get_init() and pygame.display.get_driver() != "dummy":
+        pygame.display.quit()
+        pygame.display.init()
+    if pygame.mixer.get_init():
+        pygame.mixer.quit()
+        pygame.mixer.init()
+    path = os.environ.get("REPTILE_SOAK_CURSOR")
+    return Soak(parse_duration(duration), parse_limits(os.environ.get("REPTILE_SOAK_LIMITS")),
+                load_cursor(path) if path else None, int(os.environ.get("REPTILE_SOAK_DRAW", DRAW_EVERY)))
+
+
+def record(path):
+    # Record the mouse for replaying in a soak: move it around, ESC stops
+    pygame.init()
+    screen = pygame.display.set_mode((800, 600), pygame.RESIZABLE)
+    pygame.display.set_caption("Recording the cursor - ESC stops")
+    clock = pygame.time.Clock()
+    font = pygame.font.Font(None, 24)
+    points = []
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                running = False
+        width, height = screen.get_size()
+        x, y = pygame.mouse.get_pos()
+        points.append((x / width, y / height))
+        screen.fill((0, 0, 0))
+        screen.blit(font.render(f"{len(points) / FPS:.0f}s recorded", True, (180, 180, 180)), (10, 10))
+        pygame.draw.circle(screen, (0, 255, 0), (x, y), 5, 2)
+        pygame.display.flip()
+        clock.tick(FPS)
+    pygame.quit()
+    with open(path, "w") as f:
+        for fx, fy in points:
+            f.write(f"{fx:.4f} {fy:.4f}\n")
+    print(f"Wrote {len(points)} frames ({len(points) / FPS:.0f}s) to '{path}'")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "record":
+        print("usage: python soak.py record cursor.txt\n"
+              "then:  REPTILE_SOAK=2d REPTILE_SOAK_CURSOR=cursor.txt python new.py")
+        sys.exit(2)
+    record(sys.argv[2])
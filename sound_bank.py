@@ -0,0 +1,203 @@
+import hashlib
+import os
+import random
+import time
+import numpy as np
+import pygame
+
+# Pre-built sound variants.
+#
+# All DSP happens once: at startup the bank resamples touch.wav into a few
+# pitches and gain levels and synthesizes short footsteps and clicks with
+# NumPy, then turns each into a pygame Sound with pygame.sndarray. The
+# result is cached on disk (keyed by the source file and the mixer format),
+# so later starts only load arrays. At runtime picking a sound is a list
+# lookup and Sound.play().
+#
+#   python sound_bank.py     rebuild the cache and play through the bank
+
+BANK_VERSION = 1
+CACHE_FILE = "sound_bank.npz"
+SOURCE_FILE = "touch.wav"
+
+PITCHES = (0.8, 0.9, 1.0, 1.12, 1.25)  # touch, slow head .. fast head
+GAINS = (0.35, 0.6, 1.0)               # touch, light .. strong contact
+STEP_VARIANTS = 6
+CLICK_VARIANTS = 4
+STEP_VOLUME = 0.25
+CLICK_VOLUME = 0.15
+
+
+def mixer_format():
+    freq, size, channels = pygame.mixer.get_init()
+    return freq, size, channels
+
+
+def to_float(samples, size):
+    # Mixer samples -> float32 in -1..1, shape (frames, channels)
+    samples = samples.astype(np.float32)
+    if size > 0:
+        samples -= 2 ** (abs(size) - 1)  # unsigned formats are offset
+    if abs(size) != 32:
+        samples /= 2 ** (abs(size) - 1)
+    return samples.reshape(len(samples), -1)
+
+
+def to_mixer(samples, fmt):
+    # float32 (frames,) or (frames, channels) -> array pygame.sndarray accepts
+    freq, size, channels = fmt
+    if samples.ndim == 1:
+        samples = samples[:, None]
+    if samples.shape[1] != channels:
+        samples = np.repeat(samples.mean(axis=1, keepdims=True), channels, axis=1)
+    samples = np.clip(samples, -1.0, 1.0)
+    if abs(size) == 32:
+        out = samples.astype(np.float32)
+    else:
+        scale = 2 ** (abs(size) - 1) - 1
+        out = samples * scale
+        if size > 0:
+            out += scale + 1
+        dtype = {8: np.uint8, -8: np.int8, 16: np.uint16, -16: np.int16}[size]
+        out = out.astype(dtype)
+    if channels == 1:
+        out = out[:, 0]
+    return np.ascontiguousarray(out)
+
+
+def resample(samples, ratio):
+    # Plays `ratio` times faster: pitch goes up by the same factor
+    frames = len(samples)
+    positions = np.arange(0, frames - 1, ratio)
+    base = np.arange(frames)
+    return np.stack([np.interp(positions, base, samples[:, c]) for c in range(samples.shape[1])], axis=1)
+
+
+def envelope(length, attack, decay):
+    t = np.arange(length, dtype=np.float32)
+    return np.minimum(1.0, t / max(1, attack)) * np.exp(-t / decay)
+
+
+def synth_step(rng, freq):
+    # Soft padded footfall: low thump plus a little filtered noise
+    length = int(freq * rng.uniform(0.05, 0.08))
+    t = np.arange(length) / freq
+    thump = np.sin(2 * np.pi * rng.uniform(70, 110) * t)
+    noise = np.convolve(rng.standard_normal(length), np.ones(12) / 12, mode='same')
+    return (thump * 0.6 + noise * 1.5) * envelope(length, freq * 0.002, freq * 0.015)
+
+
+def synth_click(rng, freq):
+    # Short bony tick (also stands in for touch.wav when it is missing)
+    length = int(freq * 0.03)
+    t = np.arange(length) / freq
+    tone = np.sin(2 * np.pi * rng.uniform(1800, 2600) * t) + 0.3 * rng.standard_normal(length)
+    return tone * envelope(length, 8, freq * 0.004)
+
+
+def source_key(path, fmt):
+    digest = hashlib.sha1()
+    digest.update(f"{BANK_VERSION}:{fmt}".encode())
+    try:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    except OSError:
+        digest.update(b"no source")
+    return digest.hexdigest()
+
+
+class SoundBank:
+    def __init__(self, source=SOURCE_FILE, cache=CACHE_FILE, load=True):
+        # load=False gives a silent bank (a stand-in while the real one loads)
+        self.touch = []   # touch[pitch][gain]
+        self.steps = []
+        self.clicks = []
+        self.enabled = load and pygame.mixer.get_init() is not None
+        if not self.enabled:
+            return
+        fmt = mixer_format()
+        key = source_key(source, fmt)
+        arrays = self.load_cache(cache, key)
+        if arrays is None:
+            arrays = self.build(source, fmt)
+            self.save_cache(cache, key, arrays)
+        self.touch = [[pygame.sndarray.make_sound(arrays[f"touch_{p}_{g}"]) for g in range(len(GAINS))]
+                      for p in range(len(PITCHES))]
+        self.steps = [pygame.sndarray.make_sound(arrays[f"step_{i}"]) for i in range(STEP_VARIANTS)]
+        self.clicks = [pygame.sndarray.make_sound(arrays[f"click_{i}"]) for i in range(CLICK_VARIANTS)]
+        for sound in self.steps:
+            sound.set_volume(STEP_VOLUME)
+        for sound in self.clicks:
+            sound.set_volume(CLICK_VOLUME)
+
+    def load_cache(self, path, key):
+        try:
+            with np.load(path) as data:
+                if str(data["key"]) != key:
+                    return None
+                return {name: data[name] for name in data.files}
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def save_cache(self, path, key, arrays):
+        try:
+            np.savez(path, key=np.array(key), **arrays)
+        except OSError as e:
+            print(f"Could not write sound cache '{path}': {e}")
+
+    def build(self, source, fmt):
+        freq, size, _ = fmt
+        rng = np.random.default_rng(7)  # same bank every time
+        arrays = {}
+        for i in range(CLICK_VARIANTS):
+            arrays[f"click_{i}"] = to_mixer(synth_click(rng, freq), fmt)
+        for i in range(STEP_VARIANTS):
+            arrays[f"step_{i}"] = to_mixer(synth_step(rng, freq), fmt)
+
+        try:
+            base = to_float(pygame.sndarray.array(pygame.mixer.Sound(source)), size)
+        except (pygame.error, FileNotFoundError):
+            print(f"⚠️ Could not load '{source}', using synthesized clicks for touch.")
+            base = synth_click(rng, freq)[:, None]
+        for p, pitch in enumerate(PITCHES):
+            shifted = resample(base, pitch)
+            for g, gain in enumerate(GAINS):
+                arrays[f"touch_{p}_{g}"] = to_mixer(shifted * gain, fmt)
+        return arrays
+
+    def play_touch(self, strength):
+        # strength 0..1 (e.g. head speed / max speed): faster means higher and louder
+        if not self.enabled:
+            return
+        strength = min(1.0, max(0.0, strength))
+        p = round(strength * (len(PITCHES) - 1)) + random.choice((-1, 0, 0, 1))
+        p = min(len(PITCHES) - 1, max(0, p))
+        g = min(len(GAINS) - 1, int(strength * len(GAINS)))
+        self.touch[p][g].play()
+
+    def play_step(self):
+        if self.enabled:
+            random.choice(self.steps).play()
+
+    def play_click(self):
+        if self.enabled:
+            random.choice(self.clicks).play()
+
+
+if __name__ == "__main__":
+    pygame.mixer.init()
+    if os.path.exists(CACHE_FILE):
+        os.remove(CACHE_FILE)
+    start = time.perf_counter()
+    bank = SoundBank()
+    print(f"built in {(time.perf_counter() - start) * 1000:.0f}ms, cached to {CACHE_FILE}")
+    start = time.perf_counter()
+    SoundBank()
+    print(f"loaded from cache in {(time.perf_counter() - start) * 1000:.0f}ms")
+    for p in range(len(PITCHES)):
+        for g in range(len(GAINS)):
+            bank.touch[p][g].play()
+            pygame.time.wait(250)
+    for _ in range(8):
+        bank.play_step()
+        pygame.time.wait(150)
@@ -0,0 +1,157 @@
+import math
+
+# Species specs.
+#
+# A spec is a plain dict describing a body: the spine (segment count,
+# spacing, taper), the limb pairs (which segment they hang from, bone
+# lengths, toes) and the ribs. compile_spec() turns it into a Body of
+# flat tables once, at startup: per-segment radii and link widths, which
+# limb pair (if any) hangs from each segment, per-limb bone lengths and
+# toe angle offsets, rib segments and lengths. update() and draw() then
+# index those tables instead of working out the layout every frame, and a
+# new creature is just another spec.
+#
+# The scripts draw limbs differently, so a limb uses the keys its script
+# reads:
+#
+#   swinging legs (reptile_cursor.py)  upper, lower, foot_bend, toes, toe_step, toe_length
+#   IK limbs (new.py)                  upper, lower, width, bend, phase, toes, toe_step, toe_length
+#   rigid limbs (reptile_new.py)       knee, foot, phase, toes, toe_start, toe_step, toe_lengths
+#
+# Angles are radians, except toe_start/toe_step of rigid limbs (degrees,
+# as they are read off a drawing). phase is (left, right).
+
+
+def spread_along(segments, pairs):
+    # Evenly spaced attachment segments, as many pairs as fit
+    step = segments // (pairs + 1)
+    return [step * (k + 1) - 1 for k in range(pairs)]
+
+
+# Many-legged skeleton that chases the cursor (reptile_cursor.py)
+CENTIPEDE = {
+    "segments": 30,
+    "spacing": 10,
+    "size": 5,
+    "taper": 0.08,
+    "taper_limit": 2,
+    "limbs": [{"segment": segment, "upper": 20 * 0.6, "lower": 20 * 0.4,
+               "foot_bend": 0.7 if k % 2 == 0 else -0.3,
+               "toes": 3, "toe_step": 0.4, "toe_length": 5}
+              for k, segment in enumerate(spread_along(30, 10))],
+}
+
+# Lizard with IK arms and legs and a fan of ribs (new.py)
+LIZARD = {
+    "segments": 24,
+    "spacing": 14,
+    "size": 7,
+    "taper": 0.08,
+    "taper_limit": 2,
+    "thick_links": 4, "link_width": 5, "thin_link_width": 3,
+    "limbs": [
+        # Arms: elbows point back; diagonal pairs step together
+        {"segment": 6, "upper": 48 * 0.8, "lower": 48 * 0.7, "width": 7, "bend": -1, "phase": (0.0, 0.5),
+         "toes": 5, "toe_step": 0.18, "toe_length": 13},
+        # Legs: knees point forward
+        {"segment": 16, "upper": 48, "lower": 48 * 0.9, "width": 8, "bend": 1, "phase": (0.5, 0.0),
+         "toes": 5, "toe_step": 0.18, "toe_length": 14},
+    ],
+    "ribs": {"first": 4, "count": 7, "length": 40, "shorten": 18, "fan": math.pi / 2},
+}
+
+# Side-view walking skeleton (reptile_new.py)
+SKELETON = {
+    "segments": 20,
+    "spacing": 15,
+    "tail_segments": 15,
+    "tail_spacing": 12,
+    "limbs": [
+        # knee/foot are offsets from the shoulder for the left limb, mirrored for the right
+        {"segment": 3, "knee": (25, 15), "foot": (40, 35), "phase": (0.0, math.pi),
+         "toes": 5, "toe_start": (-30, 210), "toe_step": 15, "toe_lengths": (8, 10, 12, 8, 6)},
+        {"segment": 11, "knee": (30, 20), "foot": (45, 45), "phase": (math.pi, 0.0),
+         "toes": 5, "toe_start": (-30, 210), "toe_step": 15, "toe_lengths": (8, 10, 12, 8, 6)},
+    ],
+    "ribs": {"first": 2, "stop": -3, "length": 25, "taper": 1.5, "min": 5},
+}
+
+
+class Body:
+    def __init__(self, spec):
+        n = spec["segments"]
+        self.segments = n
+        self.spacing = spec["spacing"]
+        self.tail_segments = spec.get("tail_segments", 0)
+        self.tail_spacing = spec.get("tail_spacing", 0)
+
+        # Spine: radius and link width per segment
+        size = spec.get("size", 0)
+        limit = spec.get("taper_limit", 0)
+        self.sizes = [size - min(limit, i * spec.get("taper", 0)) for i in range(n)]
+        thick = spec.get("thick_links", 0)
+        self.link_widths = [spec.get("link_width", 2) if i < thick else spec.get("thin_link_width", 2)
+                            for i in range(n)]
+
+        # Limb pairs: one column per property, indexed by pair
+        limbs = spec.get("limbs", [])
+        for limb in limbs:
+            if not 0 <= limb["segment"] < n:
+                raise ValueError(f"limb on segment {limb['segment']}, the spine has {n}")
+        self.limb_count = len(limbs)
+        self.limb_segment = [limb["segment"] for limb in limbs]
+        self.limb_upper = [limb.get("upper", 0) for limb in limbs]
+        self.limb_lower = [limb.get("lower", 0) for limb in limbs]
+        self.limb_width = [limb.get("width", 2) for limb in limbs]
+        self.limb_bend = [limb.get("bend", 1) for limb in limbs]
+        self.limb_phase = [limb.get("phase", (0.0, 0.0)) for limb in limbs]
+        self.limb_knee = [limb.get("knee", (0, 0)) for limb in limbs]
+        self.limb_foot = [limb.get("foot", (0, 0)) for limb in limbs]
+        self.foot_bend = [limb.get("foot_bend", 0.0) for limb in limbs]
+        self.toe_length = [limb.get("toe_length", 0) for limb in limbs]
+        # Toe angles relative to the foot, centered on it
+        self.toe_angles = []
+        for limb in limbs:
+            count = limb.get("toes", 0)
+            self.toe_angles.append(tuple((t - (count - 1) / 2) * limb.get("toe_step", 0) for t in range(count)))
+        # Rigid limbs: absolute toe offsets per side, (dx, dy) from the foot
+        self.toe_offsets = []
+        for limb in limbs:
+            sides = []
+            for start in limb.get("toe_start", ()):
+                toes = []
+                for i, length in enumerate(limb["toe_lengths"]):
+                    angle = math.radians(start + i * limb["toe_step"])
+                    toes.append((length * math.cos(angle), length * math.sin(angle)))
+                sides.append(toes)
+            self.toe_offsets.append(sides)
+        # Which pair hangs from each segment (-1: none)
+        self.limb_at = [-1] * n
+        for k, segment in enumerate(self.limb_segment):
+            self.limb_at[segment] = k
+        # How far a foot gets from its segment (toes not included), for culling bounds
+        self.limb_reach = max([upper + lower for upper, lower in zip(self.limb_upper, self.limb_lower)]
+                              + [max(abs(foot[0]), abs(foot[1])) for foot in self.limb_foot] + [0])
+
+        # Ribs: (segment, length) rows, plus fixed end offsets for fanned ribs
+        self.ribs = []
+        self.rib_offsets = []  # (segment, dx, dy), left then right per rib
+        ribs = spec.get("ribs")
+        if ribs is not None and "fan" in ribs:
+            count = ribs["count"]
+            for i in range(ribs["first"], ribs["first"] + count):
+                frac = (i - ribs["first"]) / (count - 1) - 0.5
+                angle = math.pi / 2 + frac * ribs["fan"]
+                length = ribs["length"] - abs(frac) * ribs["shorten"]
+                self.ribs.append((i, length))
+                for side in (-1, 1):
+                    self.rib_offsets.append((i, math.cos(angle * side) * length, math.sin(angle * side) * length))
+        elif ribs is not None:
+            for i in range(ribs["first"], n + ribs["stop"]):
+                length = ribs["length"] - i * ribs["taper"]
+                if length > ribs["min"]:
+                    self.ribs.append((i, length))
+
+
+def compile_spec(spec):
+    return Body(spec)
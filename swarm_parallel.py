@@ -0,0 +1,272 @@
+import argparse
+import math
+import multiprocessing
+import os
+import random
+import struct
+import sys
+import time
+from multiprocessing import shared_memory
+
+import kernels
+import obstacles
+import snapshot
+from flowfield import FlowField
+from reptile_cursor import SkeletalReptile, WIDTH, HEIGHT
+
+# Multi-core swarm simulation.
+#
+# Every reptile's state already lives in one flat buffer (snapshot.py), so
+# the whole swarm is just those buffers back to back in one shared memory
+# block. Worker processes each own a contiguous slice of reptiles and
+# update it in place; the main process only writes the cursor and head positions and
+# reads positions back for drawing. Ticks are delimited by a barrier:
+#
+#   main: store scalars, write cursor -> barrier -> (workers update) -> barrier -> load scalars
+#
+# Scalars (x, y, targets, ...) are stored into the buffers on both sides,
+# so the main process may also rewrite a reptile between ticks (rewind,
+# loading a checkpoint) and the workers pick that up.
+#
+# Given the main process's ObstacleGrid, workers steer around the same walls
+# as one process would: walls and panels are sent to every worker (over a queue, only
+# when the layout changes), each worker keeps its own copy of the grid and of
+# the flow field (stepped with the same goal, so it is the same field), and
+# every reptile's head position is published in the block at the start of the
+# tick. One process follows the same rule (reptile_cursor.py moves the heads'
+# obstacles only after every reptile has updated), so with or without walls
+# the result is bit-for-bit the same.
+#
+#   python swarm_parallel.py --swarm 400    check against one process (open floor and
+#                                           walled), then time 1..N workers
+
+CONTROL = struct.Struct('=ddBxxxI')  # cursor x, cursor y, stop, layout version
+HEAD = struct.Struct('=dd')          # per reptile, after CONTROL: head x, y at the start of the tick
+
+
+def static_layout(grid):
+    # Walls and panels (obstacles without an owner) as plain tuples for the workers
+    layout = []
+    for obstacle in grid.obstacles:
+        if obstacle.owner is not None:
+            continue
+        if isinstance(obstacle, obstacles.Rect):
+            layout.append(("rect", obstacle.left, obstacle.top,
+                           obstacle.right - obstacle.left, obstacle.bottom - obstacle.top))
+        else:
+            layout.append(("circle", obstacle.x, obstacle.y, obstacle.radius))
+    return layout
+
+
+def worker(name, start, stop, count, size, barrier, layouts):
+    # Child processes share the parent's resource tracker, so a plain attach is right here
+    shm = shared_memory.SharedMemory(name=name)
+    kernels.warm_up()  # before the first barrier, so no tick waits on a compile
+    base = CONTROL.size + count * HEAD.size
+    reptiles = []
+    for i in range(start, stop):
+        reptile = SkeletalReptile(0, 0)
+        reptile.attach(shm.buf[base + i * size:base + (i + 1) * size])
+        reptiles.append(reptile)
+    # Every head is a moving obstacle; the ones owned elsewhere just need some owner,
+    # so they aren't taken for walls
+    grid = obstacles.ObstacleGrid(WIDTH, HEIGHT)
+    bodies = []
+    for i in range(count):
+        owner = reptiles[i - start] if start <= i < stop else i
+        bodies.append(grid.add(obstacles.Circle(0.0, 0.0, reptiles[0].head_size, owner=owner)))
+    flow = FlowField(WIDTH, HEIGHT, grid) if count > 1 else None
+    walls = []
+    version = 0
+    try:
+        while True:
+            barrier.wait()
+            mx, my, quit, layout = CONTROL.unpack_from(shm.buf, 0)
+            if quit:
+                break
+            mouse_pos = (mx, my)
+            if layout != version:
+                # The main process queued the new layout before releasing the barrier
+                for wall in walls:
+                    grid.remove(wall)
+                walls = []
+                for kind, *args in layouts.get():
+                    walls.append(grid.add(obstacles.Rect(*args) if kind == "rect" else obstacles.Circle(*args)))
+                if not version:
+                    for reptile in reptiles:
+                        reptile.obstacles = grid
+                        reptile.flow = flow
+                version = layout
+            if version:
+                for i, body in enumerate(bodies):
+                    grid.move(body, *HEAD.unpack_from(shm.buf, CONTROL.size + i * HEAD.size))
+                if flow is not None:
+                    flow.set_goal(mx, my)
+                    flow.step()
+            for reptile in reptiles:
+                snapshot.load_scalars(reptile)
+                reptile.update(mouse_pos)
+                snapshot.store_scalars(reptile)
+            barrier.wait()
+    finally:
+        # The reptiles' array views pin the mapping; they and the grid point at each other
+        grid.clear()
+        reptiles = reptile = owner = grid = bodies = body = flow = None
+        shm.close()
+
+
+class ParallelSwarm:
+    def __init__(self, positions, workers=None, name=None):
+        count = len(positions)
+        workers = max(1, min(count, workers or os.cpu_count() or 1))
+        probe = SkeletalReptile(0, 0)
+        size = snapshot.state_size(probe.num_segments, probe.leg_count)
+        base = CONTROL.size + count * HEAD.size
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=base + count * size)
+        self.reptiles = []
+        for i, (x, y) in enumerate(positions):
+            view = self.shm.buf[base + i * size:base + (i + 1) * size]
+            self.reptiles.append(SkeletalReptile(x, y, buffer=view))
+        for reptile in self.reptiles:
+            snapshot.store_scalars(reptile)
+        self.layout = 0
+        self.grid_version = None
+
+        self.barrier = multiprocessing.Barrier(workers + 1)
+        self.workers = []
+        self.layouts = []
+        for w in range(workers):
+            start = count * w // workers
+            stop = count * (w + 1) // workers
+            layouts = multiprocessing.Queue()
+            process = multiprocessing.Process(target=worker, daemon=True,
+                                              args=(self.shm.name, start, stop, count, size, self.barrier, layouts))
+            process.start()
+            self.workers.append(process)
+            self.layouts.append(layouts)
+
+    def update(self, mouse_pos, grid=None):
+        # With `grid`, reptiles steer around its walls and each other's heads
+        if grid is not None and grid.version != self.grid_version:
+            layout = static_layout(grid)
+            for layouts in self.layouts:
+                layouts.put(layout)
+            self.layout += 1
+            self.grid_version = grid.version
+        for i, reptile in enumerate(self.reptiles):
+            snapshot.store_scalars(reptile)
+            HEAD.pack_into(self.shm.buf, CONTROL.size + i * HEAD.size, reptile.x, reptile.y)
+        CONTROL.pack_into(self.shm.buf, 0, mouse_pos[0], mouse_pos[1], 0, self.layout)
+        self.barrier.wait()  # workers go
+        self.barrier.wait()  # workers done
+        for reptile in self.reptiles:
+            snapshot.load_scalars(reptile)
+            reptile.measure_bounds()
+
+    def close(self):
+        CONTROL.pack_into(self.shm.buf, 0, 0.0, 0.0, 1, self.layout)
+        self.barrier.wait()
+        for process in self.workers:
+            process.join()
+        # The reptiles' array views pin the mapping; they are unusable from here on
+        for reptile in self.reptiles:
+            reptile.kernel_state = None  # NumPy arrays over the views (with numba) would pin them too
+            for view in (reptile.seg_x, reptile.seg_y, reptile.seg_size,
+                         reptile.leg_angles, reptile.leg_animation_speeds, reptile.state):
+                view.release()
+        self.reptiles = []
+        self.shm.close()
+        self.shm.unlink()
+
+
+def cursor_path(tick):
+    t = tick / 60
+    return (WIDTH / 2 + math.cos(t * 0.9) * WIDTH * 0.4, HEIGHT / 2 + math.sin(t * 1.7) * HEIGHT * 0.35)
+
+
+def start_positions(count, seed=1):
+    rng = random.Random(seed)
+    return [(rng.randint(50, WIDTH - 50), rng.randint(50, HEIGHT - 50)) for _ in range(count)]
+
+
+def add_walls(grid):
+    # A ring of posts and a UI panel for the walled check
+    for k in range(10):
+        angle = k * math.tau / 10
+        grid.add(obstacles.Circle(WIDTH / 2 + math.cos(angle) * 180, HEIGHT / 2 + math.sin(angle) * 140, 18))
+    grid.add(obstacles.Rect(WIDTH - 260, 40, 220, 140))
+    return grid
+
+
+def run_single(count, ticks, walls=False):
+    # Steps the reptiles the way reptile_cursor.py does without --workers
+    reptiles = [SkeletalReptile(x, y) for x, y in start_positions(count)]
+    grid = flow = None
+    if walls:
+        grid = obstacles.ObstacleGrid(WIDTH, HEIGHT)
+        bodies = [grid.add(obstacles.Circle(reptile.x, reptile.y, reptile.head_size, owner=reptile))
+                  for reptile in reptiles]
+        add_walls(grid)
+        flow = FlowField(WIDTH, HEIGHT, grid)
+        for reptile in reptiles:
+            reptile.obstacles = grid
+            if count > 1:
+                reptile.flow = flow
+    start = time.perf_counter()
+    for tick in range(ticks):
+        mouse_pos = cursor_path(tick)
+        if grid is not None:
+            flow.set_goal(*mouse_pos)
+            flow.step()
+        for reptile in reptiles:
+            reptile.update(mouse_pos)
+        if grid is not None:
+            for reptile, body in zip(reptiles, bodies):
+                grid.move(body, reptile.x, reptile.y)
+    elapsed = time.perf_counter() - start
+    for reptile in reptiles:
+        snapshot.store_scalars(reptile)
+    return [bytes(reptile.state) for reptile in reptiles], elapsed
+
+
+def run_parallel(count, ticks, workers, walls=False):
+    swarm = ParallelSwarm(start_positions(count), workers)
+    grid = add_walls(obstacles.ObstacleGrid(WIDTH, HEIGHT)) if walls else None
+    try:
+        swarm.update(cursor_path(0), grid)  # workers are up once the first tick is through
+        start = time.perf_counter()
+        for tick in range(1, ticks):
+            swarm.update(cursor_path(tick), grid)
+        elapsed = time.perf_counter() - start
+        states = [bytes(reptile.state) for reptile in swarm.reptiles]
+    finally:
+        swarm.close()
+    return states, elapsed * ticks / max(1, ticks - 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel swarm check and benchmark")
+    parser.add_argument("--swarm", type=int, default=400, help="number of reptiles")
+    parser.add_argument("--ticks", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="benchmark 1..N workers")
+    args = parser.parse_args()
+
+    reference, single = run_single(args.swarm, args.ticks)
+    walled, _ = run_single(args.swarm, args.ticks, walls=True)
+    print(f"{args.swarm} reptiles, {args.ticks} ticks")
+    print(f"  1 process  : {single / args.ticks * 1000:7.2f}ms/tick")
+    mismatches = 0
+    for workers in range(1, args.workers + 1):
+        states, elapsed = run_parallel(args.swarm, args.ticks, workers)
+        walled_states, _ = run_parallel(args.swarm, args.ticks, workers, walls=True)
+        match = "exact match" if states == reference else "MISMATCH"
+        walled_match = "exact match" if walled_states == walled else "MISMATCH"
+        mismatches += (states != reference) + (walled_states != walled)
+        print(f"  {workers} worker(s): {elapsed / args.ticks * 1000:7.2f}ms/tick  "
+              f"x{single / elapsed:.2f}  {match}, with walls: {walled_match}")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import random
+
+import obstacles
+from flowfield import FlowField, INF
+
+# Repairing the field after the cursor moves has to end where a rebuild from
+# scratch ends, with every direction pointing one step down the distances.
+
+
+def rebuilt(field):
+    fresh = FlowField(800, 600, field.obstacles, budget=INF)
+    row, col = divmod(field.goal, field.cols)
+    fresh.set_goal((col + 0.5) * field.cell_size, (row + 0.5) * field.cell_size)
+    fresh.step()
+    return fresh
+
+
+def check(field):
+    assert field.dist == rebuilt(field).dist
+    for cell in range(field.cols * field.rows):
+        if field.dist[cell] >= INF or cell == field.goal or field.blocked[cell]:
+            continue
+        row, col = divmod(cell, field.cols)
+        dc = (field.dir_x[cell] > 0.1) - (field.dir_x[cell] < -0.1)
+        dr = (field.dir_y[cell] > 0.1) - (field.dir_y[cell] < -0.1)
+        parent = (row + dr) * field.cols + col + dc
+        assert field.dist[parent] + (14 if dc and dr else 10) == field.dist[cell]
+
+
+def test_repair_matches_rebuild():
+    rng = random.Random(3)
+    for budget in (INF, 60, 7):
+        grid = obstacles.ObstacleGrid(800, 600)
+        for _ in range(15):
+            grid.add(obstacles.Circle(rng.uniform(0, 800), rng.uniform(0, 600), rng.uniform(10, 60)))
+        field = FlowField(800, 600, grid, budget=budget)
+        x, y = 400, 300
+        for _ in range(80):
+            x = min(799, max(0, x + rng.uniform(-40, 40)))
+            y = min(599, max(0, y + rng.uniform(-40, 40)))
+            field.set_goal(x, y)
+            if not field.step():
+                continue
+            check(field)
+
+
+def test_repair_settles_fewer_cells_than_a_rebuild():
+    field = FlowField(800, 600)
+    field.set_goal(400, 300)
+    field.step()
+    assert field.settled == field.cols * field.rows
+    field.set_goal(432, 300)
+    field.step()
+    assert field.settled < field.cols * field.rows * 3 // 4
@@ -0,0 +1,57 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+# The compiled kernels (kernels.py) have to leave SkeletalReptile bit-for-bit
+# where the Python versions do. kernels.ENABLED is fixed at import, so each
+# side runs in its own process and prints the reptiles' state bytes and a
+# drawn frame.
+
+pytest.importorskip("numba")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SIMULATION = """
+import hashlib, math, sys
+import pygame
+import kernels, obstacles, snapshot
+from reptile_cursor import SkeletalReptile
+
+assert kernels.ENABLED == (sys.argv[1] == "numba")
+# One reptile in the open (the whole spine is one kernel call), one pushed out of walls
+grid = obstacles.ObstacleGrid(800, 600)
+for k in range(8):
+    grid.add(obstacles.Circle(400 + math.cos(k) * 120, 300 + math.sin(k) * 120, 15))
+free, walled = SkeletalReptile(400, 300), SkeletalReptile(200, 200)
+walled.obstacles = grid
+screen = pygame.Surface((800, 600))
+for step in range(600):
+    # Chase a figure-eight, stopping now and then so the legs settle too
+    t = step / 60 if step % 200 < 150 else 2.5
+    cursor = (400 + math.cos(t * 0.9) * 320, 300 + math.sin(t * 1.7) * 240)
+    free.update(cursor)
+    walled.update(cursor)
+screen.fill((0, 0, 0))
+free.draw(screen)
+walled.draw(screen)
+for reptile in (free, walled):
+    snapshot.store_scalars(reptile)
+    print(bytes(reptile.state).hex())
+print(hashlib.sha256(pygame.image.tobytes(screen, "RGB")).hexdigest())
+"""
+
+
+def simulate(kernels):
+    env = dict(os.environ, REPTILE_KERNELS=kernels, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy")
+    result = subprocess.run([sys.executable, "-c", SIMULATION, kernels], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    return result.stdout.split()[-3:]
+
+
+def test_compiled_kernels_match_python():
+    compiled = simulate("numba")
+    python = simulate("python")
+    assert compiled[:2] == python[:2], "reptile state differs"
+    assert compiled[2] == python[2], "drawn frame differs"
@@ -0,0 +1,81 @@
+import asyncio
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from reptile_client import Sender, Viewer
+from reptile_server import ENTRY_HEADER, SNAPSHOT_HEADER, FULL, DELTA, ReptileServer, quantize
+
+# Two clients steer over loopback while the test drives the server's ticks, so
+# every snapshot can be checked against the server's own reptiles.
+
+
+def entry_kinds(data):
+    # FULL or DELTA for every entry of a snapshot packet
+    _, _, count, removed = SNAPSHOT_HEADER.unpack_from(data, 0)
+    offset = SNAPSHOT_HEADER.size + 2 * removed
+    kinds = []
+    for _ in range(count):
+        _, kind, _, _, npoints = ENTRY_HEADER.unpack_from(data, offset)
+        offset += ENTRY_HEADER.size
+        if kind == FULL:
+            offset += npoints * 4
+        else:
+            mask = data[offset:offset + (npoints + 7) // 8]
+            offset += len(mask) + 2 * sum(bin(b).count('1') for b in mask)
+        kinds.append(kind)
+    return kinds
+
+
+class RecordingViewer(Viewer):
+    def __init__(self):
+        super().__init__()
+        self.kinds = []  # entry kinds of every snapshot received, in order
+
+    def datagram_received(self, data, addr):
+        if data[:1] == b'S':
+            self.kinds.extend(entry_kinds(data))
+        super().datagram_received(data, addr)
+
+
+async def until(condition, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out waiting for the server"
+        await asyncio.sleep(0.01)
+
+
+async def session():
+    loop = asyncio.get_running_loop()
+    transport, server = await loop.create_datagram_endpoint(ReptileServer, local_addr=('127.0.0.1', 0))
+    addr = transport.get_extra_info('sockname')
+    _, left = await loop.create_datagram_endpoint(Sender, remote_addr=addr)
+    _, right = await loop.create_datagram_endpoint(Sender, remote_addr=addr)
+    viewer_transport, viewer = await loop.create_datagram_endpoint(RecordingViewer, remote_addr=addr)
+    try:
+        await until(lambda: viewer_transport.get_extra_info('sockname') in server.viewers)
+
+        # Tick 1 sends both reptiles in full, later ticks as deltas against the one before
+        for tick in range(1, 6):
+            left.send(200 + tick * 15, 150 + tick * 5)
+            right.send(600 - tick * 10, 450 - tick * 12)
+            await until(lambda: len(server.clients) == 2 and all(c.seq == tick for c in server.clients.values()))
+            server.tick()
+            await until(lambda: len(viewer.kinds) == 2 * tick)
+            assert viewer.kinds[-2:] == ([FULL, FULL] if tick == 1 else [DELTA, DELTA])
+            assert len(viewer.states) == 2
+            for client in server.clients.values():
+                ticked, echo, points = viewer.states[client.id]
+                assert ticked == tick
+                assert echo == client.echo
+                assert points == quantize(client.reptile)
+    finally:
+        left.close()
+        right.close()
+        viewer_transport.close()
+        transport.close()
+
+
+def test_full_and_delta_snapshots_match_the_server():
+    asyncio.run(session())
@@ -0,0 +1,33 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pytest
+
+import snapshot
+from reptile_cursor import SkeletalReptile
+from reptile_new import ReptileSkeleton
+
+
+def test_skeletal_round_trip_and_bad_sizes():
+    reptile = SkeletalReptile(400, 300)
+    for _ in range(30):
+        reptile.update((600, 200))
+    blob = reptile.snapshot()
+    assert bytes(SkeletalReptile.from_snapshot(blob).state) == blob
+    for bad in (blob[:-8], blob[:-3], blob + b'\0' * 8, blob[:snapshot.HEADER.size - 1]):
+        with pytest.raises(snapshot.SnapshotError):
+            reptile.restore(bad)
+
+
+def test_skeleton_round_trip_and_bad_sizes():
+    reptile = ReptileSkeleton(400, 300)
+    blob = snapshot.pack_skeleton(reptile)
+    other = ReptileSkeleton(100, 100)
+    snapshot.unpack_skeleton(other, blob)
+    assert snapshot.pack_skeleton(other) == blob
+    # Truncated or padded blobs fail with SnapshotError, not deep inside memoryview.cast()
+    for bad in (blob[:-16], blob[:-3], blob + b'\0' * 8, blob[:snapshot.HEADER.size - 1]):
+        with pytest.raises(snapshot.SnapshotError):
+            snapshot.unpack_skeleton(other, bad)
@@ -0,0 +1,80 @@
+from collections import OrderedDict
+import pygame
+
+# Cached text rendering.
+#
+# font.render() rasterizes the string with FreeType every call, which is
+# far more expensive than anything else a HUD does. TextCache keeps the
+# rendered surfaces keyed by (text, color, font, antialias) and evicts the
+# least recently used one once it is full, so values that come back
+# (FPS readings, toggled states) are rendered once.
+#
+# TextPanel is a block of HUD lines. It compares each line's new text
+# with what it shows and only goes to the cache when that changed;
+# drawing all lines is one blits() call. Lines are rendered in white and
+# tinted to the panel color (a multiply, pixel-identical to rendering in
+# that color), so a color that changes every frame, like reptile_new.py's
+# hue animation, costs a copy per line and never floods the cache.
+
+CAPACITY = 256
+WHITE = (255, 255, 255)
+
+
+class TextCache:
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, antialias=True, color=WHITE):
+        key = (text, color, font, antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+
+class TextPanel:
+    def __init__(self, font, pos, rows, spacing, color=WHITE, cache=None):
+        self.font = font
+        self.color = color
+        self.cache = cache if cache is not None else TextCache()
+        self.rows = [""] * rows
+        self.positions = [(pos[0], pos[1] + i * spacing) for i in range(rows)]
+        self.white = [None] * rows  # each row's text as rendered (and cached) in white
+        self.lines = [None] * rows  # (surface, position) per row, as blits() takes them
+
+    def set(self, row, text):
+        if self.rows[row] != text:
+            self.rows[row] = text
+            self.white[row] = None
+            self.lines[row] = None
+
+    def set_color(self, color):
+        if self.color != color:
+            self.color = color
+            self.lines = [None] * len(self.rows)
+
+    def draw(self, screen):
+        lines = self.lines
+        for row, line in enumerate(lines):
+            if line is None:
+                surface = self.white[row]
+                if surface is None:
+                    surface = self.white[row] = self.cache.render(self.font, self.rows[row], True, WHITE)
+                if self.color != WHITE:
+                    surface = surface.copy()  # the cached one stays white
+                    surface.fill(self.color, special_flags=pygame.BLEND_RGB_MULT)
+                lines[row] = (surface, self.positions[row])
+        screen.blits(lines, False)